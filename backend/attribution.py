@@ -0,0 +1,184 @@
+"""
+Per-prediction feature contributions from the churn forest's decision paths
+
+Path-based (Saabas) attribution: walking a tree from the root to a leaf, every
+split on feature f moves the node's churn probability from the parent's value
+to the child's, and that change is credited to f. Averaged over all trees,
+
+    churn probability = base value + sum of feature contributions
+
+holds exactly for every row. The per-node changes are precomputed once per
+model as a sparse (nodes x features) matrix, so a whole batch is explained by
+one ``decision_path`` call and one sparse matrix product. Compacted forests
+are walked with the same vectorized traversal as ``CompactForest.predict_proba``.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+
+class PathAttribution:
+    """Precomputed path contributions of one fitted churn forest"""
+
+    def __init__(self, forest):
+        self.forest = forest
+        self.n_features = forest.n_features_in_
+        if hasattr(forest, 'estimators_'):
+            self._init_sklearn(forest)
+        else:
+            self._init_compact(forest)
+
+    def _init_sklearn(self, forest):
+        rows, cols, deltas, roots = [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            counts = tree.value[:, 0, :]
+            proba = counts[:, 1] / counts.sum(axis=1)
+            split = np.flatnonzero(tree.children_left != -1)
+            for children in (tree.children_left[split], tree.children_right[split]):
+                rows.append(children + offset)
+                cols.append(tree.feature[split])
+                deltas.append(proba[children] - proba[split])
+            roots.append(proba[0])
+            offset += tree.node_count
+        n_trees = len(forest.estimators_)
+        self.weights = sparse.csr_matrix(
+            (np.concatenate(deltas) / n_trees, (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, self.n_features)
+        )
+        self.base_value = float(np.mean(roots))
+
+    def _init_compact(self, forest):
+        roots = forest.value[forest.tree_offsets.astype(np.int64)]
+        self.base_value = float(np.mean(roots))
+
+    def explain(self, X, batch_size=4096):
+        """Feature contributions (rows x features); each row sums to its churn probability minus base_value"""
+        X = np.asarray(X, dtype=np.float32)
+        contributions = np.empty((len(X), self.n_features))
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            if hasattr(self, 'weights'):
+                indicator, _ = self.forest.decision_path(batch)
+                contributions[start:start + len(batch)] = (indicator @ self.weights).toarray()
+            else:
+                contributions[start:start + len(batch)] = self._explain_compact(batch)
+        return contributions
+
+    def _explain_compact(self, batch):
+        forest = self.forest
+        offsets = forest.tree_offsets.astype(np.int64)
+        rows = np.arange(len(batch))[:, None]
+        node = np.broadcast_to(offsets, (len(batch), len(offsets)))
+        totals = np.zeros(len(batch) * self.n_features)
+        for _ in range(forest.max_depth):
+            feature = forest.feature[node].astype(np.int64)
+            go_left = batch[rows, feature] <= forest.threshold[node]
+            child = offsets + np.where(go_left, forest.left[node], forest.right[node])
+            # Leaves point to themselves, so their change is zero
+            delta = forest.value[child].astype(np.float64) - forest.value[node]
+            totals += np.bincount((rows * self.n_features + feature).ravel(), weights=delta.ravel(),
+                                  minlength=len(totals))
+            node = child
+        return totals.reshape(len(batch), self.n_features) / len(offsets)
+
+
+class AttributionEngine:
+    """Batched forest attributions with an LRU cache keyed by model version and customer"""
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._paths = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _attribution(self, detector):
+        version = detector.model_version
+        with self._lock:
+            paths = self._paths.get(version)
+        if paths is None:
+            paths = PathAttribution(detector.churn_model)
+            with self._lock:
+                # Only the serving model and the one being swapped in are kept
+                self._paths[version] = paths
+                while len(self._paths) > 2:
+                    del self._paths[next(iter(self._paths))]
+        return paths
+
+    def base_value(self, detector):
+        return self._attribution(detector).base_value
+
+    def explain(self, detector, X_scaled, customer_ids):
+        """Contributions for scaled feature rows, reusing cached rows of the same customer and model
+
+        A cached entry is only used if the customer's feature row is unchanged.
+        """
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        version = detector.model_version
+        contributions = np.empty((len(X_scaled), X_scaled.shape[1]))
+        missing = []
+        with self._lock:
+            for i, customer_id in enumerate(customer_ids):
+                entry = self._entries.get((version, customer_id))
+                if entry is not None and entry[0] == X_scaled[i].tobytes():
+                    self._entries.move_to_end((version, customer_id))
+                    contributions[i] = entry[1]
+                else:
+                    missing.append(i)
+            self.hits += len(X_scaled) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = self._attribution(detector).explain(X_scaled[missing])
+            contributions[missing] = computed
+            if self.max_size > 0:
+                with self._lock:
+                    for i, values in zip(missing, computed):
+                        key = (version, customer_ids[i])
+                        self._entries[key] = (X_scaled[i].tobytes(), values)
+                        self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+        return contributions
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "modelVersions": list(self._paths)
+            }
+
+
+def top_contributions(contributions, feature_names, k=3):
+    """Indices of the k features that raise each row's churn risk the most, strongest first"""
+    k = min(k, len(feature_names))
+    top = np.argpartition(-contributions, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(contributions, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def explanation(contributions, feature_names, base_value, limit=8):
+    """One row's contributions as a list for API responses, largest effect first"""
+    order = np.argsort(-np.abs(contributions))[:limit]
+    return {
+        "baseValue": round(base_value, 4),
+        "contributions": [
+            {
+                "feature": feature_names[j],
+                "contribution": round(float(contributions[j]), 4),
+                "effect": "increases risk" if contributions[j] > 0 else "decreases risk"
+            }
+            for j in order
+        ]
+    }
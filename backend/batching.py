@@ -0,0 +1,115 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatchDispatcher:
+    """Collect single-record scoring requests and score them in one batch call
+
+    Requests wait at most ``max_wait_ms`` for company, and a batch is dispatched
+    early once it holds ``max_batch_size`` records or every in-flight request,
+    so a lone request under light load is not delayed by the window.
+    """
+
+    def __init__(self, score_fn, max_batch_size=32, max_wait_ms=2.0):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._worker = None
+        self._worker_pid = None
+        self.batches = 0
+        self.records = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so pre-forked workers start their own
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pending = 0
+            self._worker = threading.Thread(target=self._run, name='micro-batch-dispatcher', daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def submit(self, record):
+        """Queue a record for scoring and return a Future for its result"""
+        self._ensure_worker()
+        future = Future()
+        with self._lock:
+            self._pending += 1
+        self._queue.put((record, future))
+        return future
+
+    def score(self, record, timeout=None):
+        """Score a single record through the batcher and wait for the result"""
+        return self.submit(record).result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            with self._lock:
+                everyone_waiting = len(batch) >= self._pending
+            if everyone_waiting and self._queue.empty():
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            records = [record for record, _ in batch]
+
+            try:
+                outcomes = [(result, None) for result in self.score_fn(records)]
+            except Exception as e:
+                # One bad record must not fail the requests that happened to share its batch
+                outcomes = [(None, e)] if len(batch) == 1 else [self._score_alone(record) for record in records]
+
+            with self._lock:
+                self._pending -= len(batch)
+                self.batches += 1
+                self.records += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _score_alone(self, record):
+        """Result and exception of scoring one record as a batch of its own"""
+        try:
+            return self.score_fn([record])[0], None
+        except Exception as e:
+            return None, e
+
+    def stats(self):
+        """Get batch size metrics"""
+        with self._lock:
+            return {
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": self.max_wait * 1000.0,
+                "batches": self.batches,
+                "records": self.records,
+                "averageBatchSize": round(self.records / self.batches, 2) if self.batches else 0.0,
+                "largestBatch": self.largest_batch,
+                "pending": self._pending
+            }
@@ -0,0 +1,84 @@
+"""
+Throughput/latency trade-off of the /api/predict micro-batching dispatcher
+
+Usage: python benchmarks/bench_batching.py [--concurrency 16] [--duration 5] [--windows 0 1 2 5 10]
+"""
+
+import argparse
+import threading
+import time
+
+import pandas as pd
+
+from common import load_detector, latency_summary
+
+from batching import MicroBatchDispatcher
+
+
+def make_score_fn(detector):
+    def score_records(records):
+        customer_df = pd.DataFrame(records)
+        churn_proba, risk_levels = detector.predict_churn_risk(customer_df)
+        is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(customer_df)
+        return list(zip(churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types))
+    return score_records
+
+
+def run_load(score_one, records, concurrency, duration):
+    """Drive score_one from several threads and collect per-call latencies"""
+    latencies = [[] for _ in range(concurrency)]
+    stop_at = time.perf_counter() + duration
+
+    def client(worker_id):
+        i = worker_id
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            score_one(records[i % len(records)])
+            latencies[worker_id].append(time.perf_counter() - start)
+            i += concurrency
+
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    flat = [lat for per_thread in latencies for lat in per_thread]
+    return len(flat) / elapsed, latency_summary(flat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--windows', type=float, nargs='+', default=[0, 1, 2, 5, 10],
+                        help='batch windows in ms; 0 means no batching')
+    args = parser.parse_args()
+
+    detector = load_detector()
+    score_records = make_score_fn(detector)
+    records = detector.generate_synthetic_data(n_samples=1000).drop(columns=['churn', 'is_anomaly']).to_dict('records')
+
+    print(f"\nconcurrency={args.concurrency} duration={args.duration}s max_batch_size={args.max_batch_size}")
+    print(f"{'window_ms':>10} {'req/s':>10} {'p50_ms':>10} {'p99_ms':>10} {'avg_batch':>10}")
+
+    for window in args.windows:
+        if window <= 0:
+            throughput, latency = run_load(lambda r: score_records([r])[0], records,
+                                           args.concurrency, args.duration)
+            avg_batch = 1.0
+        else:
+            dispatcher = MicroBatchDispatcher(score_records, max_batch_size=args.max_batch_size,
+                                              max_wait_ms=window)
+            throughput, latency = run_load(dispatcher.score, records, args.concurrency, args.duration)
+            avg_batch = dispatcher.stats()['averageBatchSize']
+
+        print(f"{window:>10g} {throughput:>10.1f} {latency['p50_ms']:>10.2f} "
+              f"{latency['p99_ms']:>10.2f} {avg_batch:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
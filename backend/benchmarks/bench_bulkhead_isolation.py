@@ -0,0 +1,149 @@
+"""
+/api/predict latency while a burst of exports hits the same server worker
+
+Starts serve.py with one worker and a fixed number of request threads, then
+measures predict latency from a few sequential clients in three phases:
+
+  - baseline: predict traffic only
+  - burst: the same traffic while ``--burst`` clients request
+    /api/export/customers back to back
+  - unbudgeted: the burst again on a server whose shared heavy-request
+    budget is raised to the sum of the pools' own limits, which is how the
+    bulkheads behaved before the budget existed
+
+Run it from a directory containing saved models, or the server trains fresh
+ones at startup.
+
+Usage:
+    python benchmarks/bench_bulkhead_isolation.py [--threads 4] [--burst 8] [--duration 15] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from common import BACKEND_DIR, latency_summary
+from bench_load import HttpTransport, ROUTES
+
+# Sum of the default concurrency and queue of the reports, exports and analytics pools
+UNBUDGETED_SLOTS = (2 + 4) + (2 + 4) + (4 + 8)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(threads, heavy_slots=None):
+    port = free_port()
+    env = dict(os.environ)
+    if heavy_slots is not None:
+        env['HEAVY_REQUEST_SLOTS'] = str(heavy_slots)
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'serve.py'), '--workers', '1', '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--max-requests', '0'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 180
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/health', timeout=2) as response:
+                if response.status == 200:
+                    return server, url
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise SystemExit("Server did not become healthy within 180s")
+
+
+def run_phase(url, predict_clients, burst, duration):
+    """Predict latencies and export status counts for one phase"""
+    transport = HttpTransport(url, timeout=120)
+    stop_at = time.perf_counter() + duration
+    latencies, predict_errors = [], []
+    export_statuses = {}
+    lock = threading.Lock()
+
+    def predict_client(seed):
+        rng = random.Random(seed)
+        send = transport.session()
+        method, path, body_factory = ROUTES['predict']
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                status = send(method, path, body_factory(rng))
+            except OSError:
+                status = 'exception'
+            with lock:
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    predict_errors.append(status)
+
+    def export_client():
+        send = transport.session()
+        method, path, _ = ROUTES['export']
+        while time.perf_counter() < stop_at:
+            try:
+                status = str(send(method, path, None))
+            except OSError:
+                status = 'exception'
+            with lock:
+                export_statuses[status] = export_statuses.get(status, 0) + 1
+            if status == '429':
+                # Rejected clients come back quickly, like a retrying caller would
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=predict_client, args=(i,)) for i in range(predict_clients)]
+    threads += [threading.Thread(target=export_client) for _ in range(burst)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"predict": dict(latency_summary(latencies), errors=len(predict_errors)), "exports": export_statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=4, help='request threads of the server worker')
+    parser.add_argument('--burst', type=int, default=8, help='concurrent export clients')
+    parser.add_argument('--predict-clients', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    report = {"threads": args.threads, "burst": args.burst, "predictClients": args.predict_clients}
+    phases = [('baseline', None, 0), ('burst', None, args.burst), ('unbudgeted', UNBUDGETED_SLOTS, args.burst)]
+    print(f"{'phase':>11} {'predicts':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7} {'exports 200':>12} "
+          f"{'exports 429':>12}")
+    for name, heavy_slots, burst in phases:
+        server, url = start_server(args.threads, heavy_slots)
+        try:
+            # Warm up the model and caches so the first phase is not penalised
+            run_phase(url, args.predict_clients, 0, 2)
+            result = run_phase(url, args.predict_clients, burst, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        report[name] = result
+        predict, exports = result['predict'], result['exports']
+        print(f"{name:>11} {predict['count']:>9} {predict['p50_ms'] or 0:>9.1f} {predict['p99_ms'] or 0:>9.1f} "
+              f"{predict['max_ms'] or 0:>9.1f} {predict['errors']:>7} {exports.get('200', 0):>12} "
+              f"{exports.get('429', 0):>12}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark incremental rescoring against rescoring every customer
+
+Seeds a score table with a synthetic export, then re-imports copies in which
+a given fraction of customers have changed usage and times
+``IncrementalScorer.run`` against scoring the whole export from scratch.
+
+Usage:
+    python benchmarks/bench_incremental_scoring.py [--rows 100000] [--changed 0.001 0.01 0.1]
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from bench_pipeline import quiet
+from common import load_detector
+
+from incremental_scoring import IncrementalScorer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--changed', type=float, nargs='+', default=[0.001, 0.01, 0.1])
+    args = parser.parse_args()
+
+    detector = quiet(load_detector)
+    detector.model_version = 'bench'
+    export = quiet(detector.generate_synthetic_data, n_samples=args.rows)
+    rng = np.random.default_rng(0)
+
+    directory = tempfile.mkdtemp(prefix='bench_incremental_')
+    try:
+        scorer = IncrementalScorer(detector, directory)
+        start = time.perf_counter()
+        quiet(scorer.score, export)
+        full = time.perf_counter() - start
+        quiet(scorer.run, export)
+
+        print(f"{args.rows} customers; scoring all of them takes {full:.2f}s\n")
+        print(f"{'changed':>8} {'rescored':>9} {'skipped':>8} {'transitions':>12} {'run (s)':>8} {'speedup':>8}")
+        for fraction in args.changed:
+            updated = export.copy()
+            rows = rng.choice(args.rows, int(args.rows * fraction), replace=False)
+            updated.loc[rows, 'complaints'] += 3
+            stats = quiet(scorer.run, updated)
+            print(f"{fraction:>8.1%} {stats['rescored']:>9} {stats['skipped']:>8} {stats['riskTransitions']:>12} "
+                  f"{stats['seconds']:>8.2f} {full / stats['seconds']:>7.1f}x")
+            # Reset the table to the original export for the next fraction
+            quiet(scorer.run, export)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Peak memory of generating, preprocessing and scoring customers with default vs lean dtypes
+
+Each mode runs in its own process so its peak RSS is measured from a clean
+start. The process generates synthetic customers, preprocesses them with the
+saved scaler and encoders and predicts churn, recording the peak RSS after
+every stage. The churn probabilities of both modes are then compared.
+
+Usage:
+    python benchmarks/bench_lean_dtypes.py [--rows 10000000] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_pipeline import quiet
+from common import load_detector
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_mode(lean, rows, output):
+    """Run the pipeline in this process and write the stage report to ``output``"""
+    detector = quiet(load_detector)
+    stages = {"baseline": peak_rss_mb()}
+    start = time.perf_counter()
+
+    data = quiet(detector.generate_synthetic_data, n_samples=rows, lean=lean)
+    stages["generate"] = peak_rss_mb()
+    frame_mb = data.memory_usage(deep=True).sum() / 1024**2
+
+    X_scaled, _ = detector.preprocess_data(data, fit=False, lean=lean)
+    stages["preprocess"] = peak_rss_mb()
+
+    churn_proba, _ = detector.churn_risk_from_features(X_scaled)
+    stages["predict"] = peak_rss_mb()
+
+    np.save(output + '.npy', churn_proba)
+    with open(output, 'w') as f:
+        json.dump({"frameMB": frame_mb, "matrixMB": X_scaled.nbytes / 1024**2, "peakMB": stages,
+                   "seconds": time.perf_counter() - start}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--json', help='also write the report to this file')
+    parser.add_argument('--mode', choices=['default', 'lean'], help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode == 'lean', args.rows, args.output)
+        return
+
+    directory = tempfile.mkdtemp(prefix='bench_lean_')
+    report = {"rows": args.rows}
+    print(f"{'mode':>8} {'frame (MB)':>11} {'matrix (MB)':>12} {'generate':>9} {'preprocess':>11} "
+          f"{'predict':>8} {'seconds':>8}")
+    for mode in ('default', 'lean'):
+        output = os.path.join(directory, mode + '.json')
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), '--mode', mode,
+                                 '--rows', str(args.rows), '--output', output])
+        if result.returncode != 0:
+            # Most likely killed by the kernel for running out of memory
+            print(f"{mode:>8} failed with exit code {result.returncode}")
+            report[mode] = {"returncode": result.returncode}
+            continue
+        with open(output) as f:
+            report[mode] = json.load(f)
+        peak = report[mode]['peakMB']
+        print(f"{mode:>8} {report[mode]['frameMB']:>11,.0f} {report[mode]['matrixMB']:>12,.0f} "
+              f"{peak['generate']:>9,.0f} {peak['preprocess']:>11,.0f} {peak['predict']:>8,.0f} "
+              f"{report[mode]['seconds']:>8.1f}")
+
+    if 'frameMB' in report['default'] and 'frameMB' in report['lean']:
+        default = np.load(os.path.join(directory, 'default.json.npy'))
+        lean = np.load(os.path.join(directory, 'lean.json.npy'))
+        report['maxProbabilityDifference'] = float(np.abs(default - lean).max())
+        report['changedPredictions'] = int((default != lean).sum())
+        print(f"\nPeak RSS columns in MB. Churn probabilities differ in {report['changedPredictions']} of "
+              f"{args.rows} rows (max difference {report['maxProbabilityDifference']:.4f})")
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
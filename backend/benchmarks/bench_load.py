@@ -0,0 +1,242 @@
+"""
+Offline HTTP load harness for the Flask API
+
+Drives flask_api.app in-process through the Flask test client (default) or a
+locally started server (--url) from several client threads, and reports
+per-route throughput, latency percentiles and error rates.
+
+Usage:
+    python benchmarks/bench_load.py [--concurrency 8] [--duration 30] [--mix predict=10,customers=2]
+    python benchmarks/bench_load.py --url http://127.0.0.1:5000 --mix all --json results.json
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from common import latency_summary
+
+SAMPLE_CUSTOMER = {
+    "id": "LOAD_001", "tenure": 24.0, "age": 35, "monthlyCharges": 75.5, "totalCharges": 1812.0,
+    "dataUsageGB": 25.5, "callMinutes": 450, "smsCount": 120, "complaints": 1, "serviceCalls": 2,
+    "downtimeHours": 0.5, "contractType": "One year", "paymentMethod": "Credit card",
+    "internetService": "Fiber optic"
+}
+
+# name -> (method, path or path factory, json body factory)
+ROUTES = {
+    'health': ('GET', '/health', None),
+    'customers': ('GET', '/api/customers', None),
+    'customers_page': ('GET', lambda rng: '/api/customers?' + rng.choice([
+        'riskLevel=High&sort=churnProbability',
+        'riskLevel=High,Medium&contractType=Month-to-month&sort=monthlyCharges&order=asc',
+        'anomalyType=Billing%20Anomaly&sort=anomalyScore',
+        'sort=churnProbability'
+    ]) + f'&page={rng.randint(1, 5)}&pageSize=50', None),
+    'customer': ('GET', lambda rng: f'/api/customers/CUST_{rng.randrange(10000):06d}', None),
+    'predict': ('POST', '/api/predict', lambda rng: dict(
+        SAMPLE_CUSTOMER,
+        tenure=round(rng.uniform(0, 72), 1),
+        monthlyCharges=round(rng.uniform(20, 150), 2),
+        complaints=rng.randint(0, 6)
+    )),
+    'analytics': ('GET', '/api/analytics', None),
+    'alerts': ('GET', '/api/alerts', None),
+    'investigate': ('GET', '/api/alerts/alert_1/investigate', None),
+    'alert_action': ('POST', '/api/alerts/alert_1/actions', lambda rng: {"action": "escalate", "notes": "load test"}),
+    'notifications': ('GET', '/api/notifications', None),
+    'notification_read': ('POST', '/api/notifications/notif_1/read', lambda rng: {}),
+    'notifications_read_all': ('POST', '/api/notifications/mark-all-read', lambda rng: {}),
+    'export': ('GET', '/api/export/customers', None),
+    'report': ('POST', '/api/reports/generate', lambda rng: {"type": "comprehensive"}),
+    'detail_report': ('POST', '/api/reports/generate',
+                      lambda rng: {"type": "detail", "riskLevels": ["High"], "maxRows": 500}),
+    'schedule_report': ('POST', '/api/reports/schedule', lambda rng: {"type": "weekly", "recipients": []}),
+    'schedules': ('GET', '/api/reports/schedules', None),
+    'metrics': ('GET', '/metrics', None)
+}
+
+
+def parse_mix(spec):
+    """Parse 'predict=10,customers=2' (or 'all') into route weights"""
+    if spec == 'all':
+        return {name: 1.0 for name in ROUTES}
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ROUTES:
+            raise SystemExit(f"Unknown route '{name}'. Choose from: {', '.join(ROUTES)}")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+class TestClientTransport:
+    """Send requests to flask_api.app in-process"""
+
+    def __init__(self):
+        from flask_api import app
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(method, path, body):
+            response = client.open(path, method=method, json=body)
+            response.get_data()
+            return response.status_code
+
+        return send
+
+
+class HttpTransport:
+    """Send requests to a running server over HTTP"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def session(self):
+        def send(method, path, body):
+            data = json.dumps(body).encode('utf-8') if body is not None else None
+            request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                             headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as e:
+                e.read()
+                return e.code
+
+        return send
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies = []
+        self.status_counts = {}
+        self.exceptions = 0
+
+    def record(self, latency, status):
+        self.latencies.append(latency)
+        key = str(status)
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+
+def run_load(transport, mix, concurrency, duration, warmup, seed):
+    """Run the request mix and return per-route stats and measured wall time"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    per_worker = [{name: RouteStats() for name in names} for _ in range(concurrency)]
+    start_barrier = threading.Barrier(concurrency + 1)
+    timing = {}
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        send = transport.session()
+        stats = per_worker[worker_id]
+        start_barrier.wait()
+        measure_from = timing['start'] + warmup
+        stop_at = measure_from + duration
+
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            name = rng.choices(names, weights)[0]
+            method, path, body_factory = ROUTES[name]
+            path = path(rng) if callable(path) else path
+            body = body_factory(rng) if body_factory else None
+            started = time.perf_counter()
+            try:
+                status = send(method, path, body)
+            except Exception:
+                status = 'exception'
+            finished = time.perf_counter()
+            if started >= measure_from:
+                if status == 'exception':
+                    stats[name].exceptions += 1
+                stats[name].record(finished - started, status)
+
+    threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    timing['start'] = time.perf_counter()
+    start_barrier.wait()
+    for t in threads:
+        t.join()
+    wall_time = time.perf_counter() - timing['start'] - warmup
+
+    merged = {name: RouteStats() for name in names}
+    for stats in per_worker:
+        for name, route_stats in stats.items():
+            merged[name].latencies.extend(route_stats.latencies)
+            merged[name].exceptions += route_stats.exceptions
+            for status, count in route_stats.status_counts.items():
+                merged[name].status_counts[status] = merged[name].status_counts.get(status, 0) + count
+    return merged, wall_time
+
+
+def summarise(merged, wall_time):
+    report = {}
+    for name, stats in merged.items():
+        total = len(stats.latencies)
+        errors = stats.exceptions + sum(count for status, count in stats.status_counts.items()
+                                        if status.isdigit() and int(status) >= 500)
+        rejected = stats.status_counts.get('429', 0)
+        report[name] = {
+            "requests": total,
+            "throughput_rps": round(total / wall_time, 2) if wall_time > 0 else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "rejected_rate": round(rejected / total, 4) if total else 0.0,
+            "status_counts": stats.status_counts,
+            **latency_summary(stats.latencies)
+        }
+    return report
+
+
+def print_report(report, wall_time, concurrency):
+    total = sum(r['requests'] for r in report.values())
+    print(f"\n{total} requests in {wall_time:.1f}s with {concurrency} clients "
+          f"({total / wall_time:.1f} req/s overall)\n")
+    print(f"{'route':<24} {'reqs':>7} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'errors':>7} {'429s':>7}")
+    for name, r in sorted(report.items(), key=lambda item: -item[1]['requests']):
+        if not r['requests']:
+            continue
+        print(f"{name:<24} {r['requests']:>7} {r['throughput_rps']:>8.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p90_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['error_rate']:>7.1%} {r['rejected_rate']:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='base URL of a running server (default: in-process test client)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds excluded from the results')
+    parser.add_argument('--mix', default='all', help="route weights, e.g. 'predict=10,customers=2', or 'all'")
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-request timeout with --url')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the report to this JSON file')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    transport = HttpTransport(args.url, args.timeout) if args.url else TestClientTransport()
+    merged, wall_time = run_load(transport, mix, args.concurrency, args.duration, args.warmup, args.seed)
+    report = summarise(merged, wall_time)
+    print_report(report, wall_time, args.concurrency)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"concurrency": args.concurrency, "duration_s": round(wall_time, 3),
+                       "mix": mix, "routes": report}, f, indent=2)
+        print(f"\nReport saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare response size and client decode time per negotiated format
+
+Requests /api/customers and /api/export/customers through the Flask test
+client with every supported Accept / Accept-Encoding combination, then
+decodes each body the way a client would.
+
+Usage:
+    python benchmarks/bench_negotiation.py [--repeat 20]
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+
+from common import time_call
+
+from serialization import ARROW, CSV, JSON, MSGPACK, content_encodings, media_types, msgpack, pa, zstandard
+
+
+def decompress(body, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(body)
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    return body
+
+
+def decode(body, media_type):
+    if media_type == ARROW:
+        return pa.ipc.open_stream(body).read_all()
+    if media_type == MSGPACK:
+        return msgpack.unpackb(body, raw=False)
+    if media_type == CSV:
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    return json.loads(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='decode repetitions per format')
+    args = parser.parse_args()
+
+    from flask_api import app
+    client = app.test_client()
+
+    print(f"{'path':<24} {'media type':<38} {'encoding':<9} {'KB':>8} {'decode ms':>10}")
+    for path, default in (('/api/customers', JSON), ('/api/export/customers', CSV)):
+        for media_type in media_types(default):
+            for encoding in [None] + content_encodings():
+                headers = {'Accept': media_type}
+                if encoding:
+                    headers['Accept-Encoding'] = encoding
+                response = client.get(path, headers=headers)
+                body = response.get_data()
+                sent_encoding = response.headers.get('Content-Encoding')
+                elapsed = time_call(lambda: decode(decompress(body, sent_encoding), media_type), args.repeat)['median_s']
+                print(f"{path:<24} {media_type:<38} {sent_encoding or 'identity':<9} "
+                      f"{len(body) / 1024:>8.1f} {elapsed * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Micro-benchmarks for the ML pipeline with stored JSON baselines
+
+Usage:
+    python benchmarks/bench_pipeline.py run [--sizes 1 100 10000 1000000] [--output results.json]
+    python benchmarks/bench_pipeline.py compare baselines/baseline.json results.json [--threshold 0.2]
+
+`run` times each pipeline step at every size and writes a JSON report.
+`compare` prints the change for every benchmark and size present in both
+reports. It exits with status 1 if any benchmark is slower than the baseline
+by more than the threshold.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from common import BACKEND_DIR, load_detector, time_call
+
+from data_loader import DatasetLoader
+
+DEFAULT_SIZES = [1, 100, 10000, 100000, 1000000]
+
+# The anomaly loops and forest training are too slow to run at 1M rows by
+# default; --max-size can lift these caps
+DEFAULT_SIZE_CAPS = {
+    'detect_anomalies': 100000,
+    'train_churn_model': 100000,
+    'update_churn_model': 100000,
+    'train_anomaly_model': 100000
+}
+
+# Training needs enough rows for a stratified train/test split
+MIN_SIZES = {
+    'train_churn_model': 100,
+    'update_churn_model': 100,
+    'train_anomaly_model': 2
+}
+
+
+def quiet(fn, *args, **kwargs):
+    """Call fn with its progress printing suppressed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+class PipelineBenchmarks:
+    """Setup and timed body for every benchmarked pipeline step"""
+
+    def __init__(self, max_rows):
+        self.detector = load_detector()
+        self.data = quiet(self.detector.generate_synthetic_data, n_samples=max_rows)
+        self.loader = DatasetLoader()
+        self.column_mapping = quiet(self.loader.load_mapping_config,
+                                    os.path.join(BACKEND_DIR, 'column_mapping.json'))
+        self.raw_export = pd.read_csv(os.path.join(BACKEND_DIR, 'churn.csv'))
+
+    def sample(self, n):
+        return self.data.head(n)
+
+    def raw_sample(self, n):
+        repeats = int(np.ceil(n / len(self.raw_export)))
+        return pd.concat([self.raw_export] * repeats, ignore_index=True).head(n)
+
+    def cases(self):
+        """Map benchmark name to (setup(n) -> state, body(state))"""
+        detector = self.detector
+        return {
+            'generate_synthetic_data': (
+                lambda n: n,
+                lambda n: detector.generate_synthetic_data(n_samples=n)
+            ),
+            'preprocess_data': (
+                self.sample,
+                lambda data: detector.preprocess_data(data, fit=False)
+            ),
+            'predict_churn_risk': (
+                self.sample,
+                lambda data: detector.predict_churn_risk(data)
+            ),
+            'detect_anomalies': (
+                self.sample,
+                lambda data: detector.detect_anomalies(data)
+            ),
+            'train_churn_model': (
+                lambda n: (copy.deepcopy(detector), self.sample(n)),
+                lambda state: quiet(state[0].train_churn_model, state[1])
+            ),
+            'update_churn_model': (
+                lambda n: (copy.deepcopy(detector), self.sample(n)),
+                lambda state: quiet(state[0].update_churn_model, state[1])
+            ),
+            'train_anomaly_model': (
+                lambda n: (copy.deepcopy(detector), self.sample(n)),
+                lambda state: quiet(state[0].train_anomaly_model, state[1])
+            ),
+            'transform_dataset': (
+                self.raw_sample,
+                lambda df: quiet(self.loader.transform_dataset, df, self.column_mapping)
+            )
+        }
+
+
+def time_case(setup, body, n, repeat, budget_seconds):
+    """Time body over fresh setups; stop repeating once the time budget is used"""
+    timing = time_call(body, repeat, setup=lambda: setup(n), budget_seconds=budget_seconds)
+    median = timing['median_s']
+    return {
+        "median_s": round(median, 6),
+        "min_s": round(timing['min_s'], 6),
+        "runs": timing['runs'],
+        "rows_per_s": round(n / median, 1) if median > 0 else None
+    }
+
+
+def run(args):
+    caps = dict(DEFAULT_SIZE_CAPS)
+    if args.max_size is not None:
+        caps = {name: args.max_size for name in caps}
+
+    benchmarks = PipelineBenchmarks(max(args.sizes))
+    cases = benchmarks.cases()
+    selected = args.only or list(cases)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat
+        },
+        "results": {}
+    }
+
+    for name in selected:
+        setup, body = cases[name]
+        report["results"][name] = {}
+        for n in args.sizes:
+            if n < MIN_SIZES.get(name, 1) or n > caps.get(name, n):
+                print(f"{name:<24} {n:>9} rows  skipped")
+                continue
+            result = time_case(setup, body, n, args.repeat, args.budget)
+            report["results"][name][str(n)] = result
+            print(f"{name:<24} {n:>9} rows  median {result['median_s'] * 1000:>11.2f} ms"
+                  f"  ({result['runs']} runs)")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    print(f"{'benchmark':<24} {'rows':>9} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name in sorted(set(baseline) & set(current)):
+        for size in sorted(set(baseline[name]) & set(current[name]), key=int):
+            before = baseline[name][size]["median_s"]
+            after = current[name][size]["median_s"]
+            change = (after - before) / before if before > 0 else 0.0
+
+            flag = ''
+            # Sub-millisecond timings are dominated by noise
+            if max(before, after) >= args.min_seconds:
+                if change > args.threshold:
+                    flag = 'REGRESSION'
+                    regressions.append((name, size, change))
+                elif change < -args.threshold:
+                    flag = 'improved'
+
+            print(f"{name:<24} {size:>9} {before * 1000:>12.2f} {after * 1000:>12.2f} "
+                  f"{change:>+7.1%}  {flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and save a JSON report')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--only', nargs='+', help='benchmark names to run')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--budget', type=float, default=10.0,
+                            help='stop repeating a case after this many seconds')
+    run_parser.add_argument('--max-size', type=int,
+                            help='row cap for the slow benchmarks (default: 100000)')
+    run_parser.add_argument('--output', default='benchmark_results.json')
+
+    compare_parser = subparsers.add_parser('compare', help='compare a report against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='relative slowdown that counts as a regression')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.001,
+                                help='ignore cases faster than this in both reports')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Per-worker memory of serve.py with shared (preloaded) vs per-worker model loading
+
+Starts serve.py twice on a local port, warms every worker up with a few
+requests and reads /proc/<pid>/smaps_rollup for the parent and each worker.
+Linux only.
+
+Usage: python benchmarks/bench_prefork_memory.py [--workers 4] [--port 5055]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from common import BACKEND_DIR
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+SAMPLE_CUSTOMER = {
+    "id": "BENCH_001", "tenure": 24.0, "age": 35, "monthlyCharges": 75.5, "totalCharges": 1812.0,
+    "dataUsageGB": 25.5, "callMinutes": 450, "smsCount": 120, "complaints": 1, "serviceCalls": 2,
+    "downtimeHours": 0.5, "contractType": "One year", "paymentMethod": "Credit card",
+    "internetService": "Fiber optic"
+}
+
+
+def read_smaps(pid):
+    """Memory counters in MB from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            key = parts[0].rstrip(':')
+            if key in SMAPS_FIELDS:
+                values[key] = int(parts[1]) / 1024.0
+    return values
+
+
+def child_pids(pid):
+    children = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            children.extend(int(c) for c in f.read().split())
+    return children
+
+
+def wait_until_ready(base_url, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'{base_url}/health', timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError('server did not become ready')
+
+
+def warm_up(base_url, n_requests):
+    body = json.dumps(SAMPLE_CUSTOMER).encode('utf-8')
+    for _ in range(n_requests):
+        urllib.request.urlopen(f'{base_url}/api/customers', timeout=60).read()
+        request = urllib.request.Request(f'{base_url}/api/predict', data=body,
+                                         headers={'Content-Type': 'application/json'})
+        urllib.request.urlopen(request, timeout=60).read()
+
+
+def measure(workers, port, preload, warm_requests):
+    cmd = [sys.executable, os.path.join(BACKEND_DIR, 'serve.py'), '--workers', str(workers),
+           '--threads', '2', '--bind', f'127.0.0.1:{port}', '--max-requests', '0']
+    if not preload:
+        cmd.append('--no-preload')
+
+    server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_ready(base_url)
+        # Give the remaining workers time to finish loading before warming up
+        deadline = time.time() + 300
+        while len(child_pids(server.pid)) < workers and time.time() < deadline:
+            time.sleep(0.5)
+        time.sleep(2 if preload else 15)
+        warm_up(base_url, warm_requests * workers)
+
+        parent = read_smaps(server.pid)
+        children = [read_smaps(pid) for pid in child_pids(server.pid)]
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    def avg(field):
+        return sum(c[field] for c in children) / len(children)
+
+    return {
+        "mode": "preload (shared)" if preload else "per-worker load",
+        "workers": len(children),
+        "worker_rss_mb": avg('Rss'),
+        "worker_pss_mb": avg('Pss'),
+        "worker_private_mb": avg('Private_Clean') + avg('Private_Dirty'),
+        "total_pss_mb": parent['Pss'] + sum(c['Pss'] for c in children)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--warm-requests', type=int, default=5,
+                        help='warm-up requests per worker before measuring')
+    args = parser.parse_args()
+
+    results = [measure(args.workers, args.port, preload, args.warm_requests) for preload in (True, False)]
+
+    print(f"\n{'mode':<18} {'workers':>7} {'RSS/worker':>11} {'PSS/worker':>11} "
+          f"{'private/worker':>15} {'total PSS':>10}")
+    for r in results:
+        print(f"{r['mode']:<18} {r['workers']:>7} {r['worker_rss_mb']:>9.1f}MB {r['worker_pss_mb']:>9.1f}MB "
+              f"{r['worker_private_mb']:>13.1f}MB {r['total_pss_mb']:>8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark response serialization for scored customer batches
+
+Compares the former per-row dict building + jsonify path with the column-wise
+encoder (row-object and columnar shapes) at several batch sizes, then times
+/api/customers and /api/analytics end to end through the Flask test client.
+
+Usage:
+    python benchmarks/bench_serialization.py [--sizes 50 1000 10000] [--repeat 5]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bench_pipeline import quiet
+from common import load_detector, time_call
+
+
+def legacy_customers(app, data, churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types):
+    """Row-by-row response building as /api/customers did before column encoding"""
+    from flask import jsonify
+    with app.app_context():
+        customers = []
+        for i, row in data.iterrows():
+            customers.append({
+                "id": row['customer_id'],
+                "tenure": round(row['tenure'], 1),
+                "age": int(row['age']),
+                "monthlyCharges": round(row['monthly_charges'], 2),
+                "totalCharges": round(row['total_charges'], 2),
+                "dataUsageGB": round(row['data_usage_gb'], 2),
+                "callMinutes": round(row['call_minutes'], 0),
+                "smsCount": int(row['sms_count']),
+                "complaints": int(row['complaints']),
+                "serviceCalls": int(row['service_calls']),
+                "downtimeHours": round(row['downtime_hours'], 2),
+                "contractType": row['contract_type'],
+                "paymentMethod": row['payment_method'],
+                "internetService": row['internet_service'],
+                "churnProbability": round(churn_proba[i], 4),
+                "riskLevel": risk_levels[i],
+                "isAnomaly": bool(is_anomaly[i]),
+                "anomalyScore": round(anomaly_scores[i], 4),
+                "anomalyType": anomaly_types[i],
+                "actualChurn": bool(row['churn']),
+                "lastActivity": (datetime.now() - timedelta(days=np.random.randint(0, 30))).isoformat()
+            })
+        return jsonify({"customers": customers}).get_data()
+
+
+def columnar_customers(shape, data, *predictions):
+    from serialization import customer_columns, json_response, shape_columns
+    columns = customer_columns(data, *predictions)
+    return json_response({"customers": shape_columns(columns, shape)}).get_data()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    detector = load_detector()
+    from flask_api import app
+
+    print(f"{'rows':>7} {'legacy ms':>10} {'rows ms':>9} {'columnar ms':>12} {'speedup':>8} "
+          f"{'legacy KB':>10} {'columnar KB':>12}")
+    for n in args.sizes:
+        data = quiet(detector.generate_synthetic_data, n_samples=n)
+        churn_proba, risk_levels = detector.predict_churn_risk(data)
+        predictions = (churn_proba, risk_levels) + tuple(detector.detect_anomalies(data))
+
+        legacy = time_call(lambda: legacy_customers(app, data, *predictions), args.repeat)['median_s']
+        rows = time_call(lambda: columnar_customers('rows', data, *predictions), args.repeat)['median_s']
+        columnar = time_call(lambda: columnar_customers('columnar', data, *predictions), args.repeat)['median_s']
+        legacy_size = len(legacy_customers(app, data, *predictions)) / 1024
+        columnar_size = len(columnar_customers('columnar', data, *predictions)) / 1024
+        print(f"{n:>7} {legacy * 1000:>10.2f} {rows * 1000:>9.2f} {columnar * 1000:>12.2f} "
+              f"{legacy / rows:>7.1f}x {legacy_size:>10.1f} {columnar_size:>12.1f}")
+
+    print(f"\n{'endpoint':<40} {'median ms':>10}")
+    client = app.test_client()
+    for path in ('/api/customers', '/api/customers?format=columnar',
+                 '/api/analytics', '/api/analytics?format=columnar'):
+        elapsed = time_call(lambda: client.get(path).get_data(), args.repeat)['median_s']
+        print(f"{path:<40} {elapsed * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Throughput of loading a directory of dataset shards with 1 to N worker processes
+
+Writes synthetic customers as shards in CSV and JSON (and Excel, when
+openpyxl is installed) with export-style column names and text churn labels,
+then times ``DatasetLoader.load_datasets`` on the directory with each worker
+count. Every run must return the same frame as the single-worker run.
+
+Usage:
+    python benchmarks/bench_sharded_loading.py [--rows 1000000] [--shards 24] [--workers 1 2 4 8]
+                                               [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_pipeline import quiet
+
+from data_loader import DatasetLoader
+from ml_models import TelecomChurnAnomalyDetector
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+def write_shards(directory, rows, shards):
+    data = TelecomChurnAnomalyDetector().generate_synthetic_data(n_samples=rows)
+    data = data.rename(columns={'customer_id': 'CustomerID', 'monthly_charges': 'MonthlyCharges',
+                                'total_charges': 'TotalCharges', 'churn': 'Churn'})
+    data['Churn'] = np.where(data['Churn'] == 1, 'Yes', 'No')
+    formats = ['csv', 'json', 'xlsx'] if openpyxl is not None else ['csv', 'json']
+    for i, part in enumerate(np.array_split(data, shards)):
+        fmt = formats[i % len(formats)]
+        path = os.path.join(directory, f'customers_{i:03d}.{fmt}')
+        if fmt == 'csv':
+            part.to_csv(path, index=False)
+        elif fmt == 'json':
+            part.to_json(path, orient='records')
+        else:
+            part.to_excel(path, index=False)
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--shards', type=int, default=24)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    loader = DatasetLoader()
+    directory = tempfile.mkdtemp(prefix='bench_shards_')
+    try:
+        formats = quiet(write_shards, directory, args.rows, args.shards)
+        report = {"rows": args.rows, "shards": args.shards, "formats": formats,
+                  "cpuCount": os.cpu_count(), "runs": []}
+        print(f"{args.rows} customers in {args.shards} shards ({', '.join(formats)}), "
+              f"{os.cpu_count()} CPU(s)\n")
+        print(f"{'workers':>7} {'seconds':>8} {'rows/s':>10} {'speedup':>8}")
+        reference = None
+        for n_workers in args.workers:
+            start = time.perf_counter()
+            data = quiet(loader.load_datasets, directory, n_workers=n_workers)
+            seconds = time.perf_counter() - start
+            if reference is None:
+                reference = data
+            else:
+                pd.testing.assert_frame_equal(data, reference)
+            run = {"workers": n_workers, "seconds": round(seconds, 3),
+                   "rowsPerSecond": round(args.rows / seconds),
+                   "speedup": round(report['runs'][0]['seconds'] / seconds, 2) if report['runs'] else 1.0}
+            report['runs'].append(run)
+            print(f"{n_workers:>7} {seconds:>8.2f} {run['rowsPerSecond']:>10,} {run['speedup']:>7.2f}x")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
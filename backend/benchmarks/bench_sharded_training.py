@@ -0,0 +1,69 @@
+"""
+Compare sharded multi-process churn training with single-process training
+
+Trains the churn forest once with train_churn_model and once per shard count
+with train_churn_model_sharded on the same synthetic data, and reports hold-out
+ROC-AUC and wall-clock time for each run.
+
+Usage:
+    python benchmarks/bench_sharded_training.py [--rows 100000] [--shards 2 4 8] [--workers 4] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from bench_pipeline import quiet
+
+from ml_models import TelecomChurnAnomalyDetector
+from sharded_training import train_churn_model_sharded
+
+
+def single_process(data):
+    detector = TelecomChurnAnomalyDetector()
+    start = time.perf_counter()
+    quiet(detector.train_churn_model, data)
+    elapsed = time.perf_counter() - start
+
+    X_scaled, df = detector.preprocess_data(data, fit=False)
+    _, X_test, _, y_test = train_test_split(X_scaled, df['churn'], test_size=0.2,
+                                            random_state=42, stratify=df['churn'])
+    auc = roc_auc_score(y_test, detector.churn_model.predict_proba(X_test)[:, 1])
+    return {"rows": len(data), "shards": 1, "workers": 1, "trees": detector.churn_model.n_estimators,
+            "rocAuc": round(auc, 4), "totalSeconds": round(elapsed, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--workers', type=int, help='worker processes (default: min(shards, CPUs))')
+    parser.add_argument('--json', help='also write the report to this JSON file')
+    args = parser.parse_args()
+
+    data = quiet(TelecomChurnAnomalyDetector().generate_synthetic_data, n_samples=args.rows)
+    runs = [single_process(data)]
+    for n_shards in args.shards:
+        runs.append(quiet(train_churn_model_sharded, TelecomChurnAnomalyDetector(), data,
+                          n_shards=n_shards, n_workers=args.workers))
+
+    print(f"{args.rows} rows, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':<20} {'workers':>8} {'trees':>6} {'ROC-AUC':>8} {'seconds':>9} {'speedup':>8}")
+    baseline = runs[0]['totalSeconds']
+    for run in runs:
+        mode = 'single process' if run['shards'] == 1 else f"{run['shards']} shards"
+        print(f"{mode:<20} {run['workers']:>8} {run['trees']:>6} {run['rocAuc']:>8.4f} "
+              f"{run['totalSeconds']:>9.2f} {baseline / run['totalSeconds']:>7.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"cpuCount": os.cpu_count(), "runs": runs}, f, indent=2)
+        print(f"\nReport saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Pages per second and peak memory of customer detail reports
+
+Builds a synthetic feature store once, then writes detail reports of
+increasing size two ways, each in a fresh process so its peak RSS is its own:
+
+  - in-memory: the whole story list is built first and the PDF goes to a BytesIO
+  - streaming: ``write_detail_report``, one page-sized table at a time into a temporary file
+
+Usage:
+    python benchmarks/bench_streaming_report.py [--customers 200000] [--rows 10000 50000 100000 200000]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench_pipeline import quiet
+from common import load_detector
+
+from customer_index import CustomerIndex
+from feature_store import FeatureStore
+from streaming_report import detail_document, detail_flowables, detail_report_file
+
+RISK_LEVELS = ['High', 'Medium', 'Low']
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+
+
+class RssSampler:
+    """Highest resident set size seen while the block runs, sampled every few milliseconds"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def in_memory_report(index, rows):
+    """The pattern generate_report uses: every flowable in a list, the PDF in memory"""
+    story = list(detail_flowables(index, rows, "Customer Detail Report"))
+    buffer = io.BytesIO()
+    doc = detail_document(buffer, "Customer Detail Report")
+    doc.build(story)
+    return doc.page, buffer.getbuffer().nbytes
+
+
+def run_mode(mode, store_dir, rows):
+    detector = quiet(load_detector)
+    index = quiet(CustomerIndex, FeatureStore(store_dir), detector)
+    before = rss_mb()
+    start = time.perf_counter()
+    with RssSampler() as sampler:
+        if mode == 'streaming':
+            output, stats = detail_report_file(index, RISK_LEVELS, max_rows=rows)
+            pages = stats['pages']
+            size = os.fstat(output.fileno()).st_size
+            output.close()
+        else:
+            selected, _ = index.query({'riskLevel': RISK_LEVELS}, 'churnProbability', limit=rows)
+            pages, size = in_memory_report(index, selected)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"pages": pages, "bytes": size, "seconds": seconds,
+                      "baselineMB": before, "peakMB": sampler.peak}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--customers', type=int, default=200000, help='customers in the feature store')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 100000, 200000])
+    parser.add_argument('--modes', nargs='+', default=['in-memory', 'streaming'])
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--store', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.store, args.rows[0])
+        return
+
+    directory = tempfile.mkdtemp(prefix='bench_report_')
+    try:
+        detector = quiet(load_detector)
+        data = quiet(detector.generate_synthetic_data, n_samples=args.customers)
+        store_dir = os.path.join(directory, 'store')
+        quiet(FeatureStore.build, store_dir, detector, data)
+        del data
+
+        print(f"{'rows':>7} {'mode':>10} {'pages':>6} {'PDF (MB)':>9} {'pages/s':>8} {'peak RSS (MB)':>14} "
+              f"{'report (MB)':>12}")
+        for rows in args.rows:
+            for mode in args.modes:
+                result = subprocess.run([sys.executable, os.path.abspath(__file__), '--mode', mode,
+                                         '--store', store_dir, '--rows', str(rows)],
+                                        capture_output=True, text=True)
+                if result.returncode != 0:
+                    print(f"{rows:>7} {mode:>10} failed with exit code {result.returncode}")
+                    continue
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                print(f"{rows:>7} {mode:>10} {stats['pages']:>6} {stats['bytes'] / 1024**2:>9.1f} "
+                      f"{stats['pages'] / stats['seconds']:>8.1f} {stats['peakMB']:>14,.0f} "
+                      f"{stats['peakMB'] - stats['baselineMB']:>12,.0f}")
+        print("\nreport (MB) is how far RSS rose above its level before the report")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
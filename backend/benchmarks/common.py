@@ -0,0 +1,56 @@
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from ml_models import TelecomChurnAnomalyDetector
+
+
+def load_detector(filepath_prefix='telecom_models', n_samples=10000):
+    """Load saved models, or train fresh ones on synthetic data"""
+    detector = TelecomChurnAnomalyDetector()
+    try:
+        detector.load_models(filepath_prefix)
+    except FileNotFoundError:
+        training_data = detector.generate_synthetic_data(n_samples=n_samples)
+        detector.train_churn_model(training_data)
+        detector.train_anomaly_model(training_data)
+    return detector
+
+
+def time_call(fn, repeat=5, setup=None, budget_seconds=None):
+    """Wall time of ``fn`` over ``repeat`` runs, in seconds
+
+    Every benchmark reports ``median_s``; ``min_s`` is kept for reference. With
+    ``setup``, each run times ``fn(setup())`` so preparing fresh input is not
+    measured. With ``budget_seconds``, repeating stops once that much time
+    has been measured.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+        if budget_seconds is not None and sum(timings) > budget_seconds:
+            break
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "runs": len(timings)}
+
+
+def latency_summary(latencies_s):
+    """Summarise a list of latencies in seconds as milliseconds percentiles"""
+    if not latencies_s:
+        return {"count": 0, "p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+    ms = np.asarray(latencies_s) * 1000.0
+    return {
+        "count": int(ms.size),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3)
+    }
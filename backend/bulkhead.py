@@ -0,0 +1,178 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BulkheadFull(Exception):
+    """Raised when a bulkhead has no free worker or queue slot"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"'{name}' pool is saturated, retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class RequestBudget:
+    """Number of request threads that all bulkheads together may hold
+
+    A request admitted to a bulkhead keeps its server thread waiting for the
+    result, so the sum of every pool's concurrency and queue must stay below
+    the server's thread count or a burst of heavy requests still takes all of
+    them. The budget caps that sum; the remaining threads are left to
+    /api/predict and the other light endpoints.
+    """
+
+    def __init__(self, slots):
+        if slots < 1:
+            raise ValueError("A request budget needs at least one slot")
+        self.slots = slots
+        self._semaphore = threading.BoundedSemaphore(slots)
+        self._lock = threading.Lock()
+        self.held = 0
+        self.peak_held = 0
+        self.rejected = 0
+
+    def try_acquire(self):
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.held += 1
+            self.peak_held = max(self.peak_held, self.held)
+        return True
+
+    def release(self):
+        with self._lock:
+            self.held -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "held": self.held,
+                "peakHeld": self.peak_held,
+                "rejected": self.rejected
+            }
+
+
+class Bulkhead:
+    """Bounded thread pool that isolates one class of heavy requests
+
+    At most ``max_concurrent`` tasks run at once and at most ``max_queue``
+    more may wait; anything beyond that is rejected immediately so callers
+    can answer with a fast 429 instead of tying up shared request threads.
+    Bulkheads sharing a ``RequestBudget`` are also rejected once the budget
+    is used up, whatever room their own pool has left.
+    """
+
+    def __init__(self, name, max_concurrent, max_queue, budget=None):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.budget = budget
+        self._admission = threading.BoundedSemaphore(max_concurrent + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self.active = 0
+        self.queued = 0
+        self.peak_active = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self):
+        # Pools do not survive fork, so each pre-forked worker builds its own
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                                    thread_name_prefix=f'bulkhead-{self.name}')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def retry_after(self):
+        """Estimate seconds until a slot frees up, for the Retry-After header"""
+        with self._lock:
+            finished = self.completed + self.failed
+            avg_run = self.total_run_seconds / finished if finished else 1.0
+            backlog = self.queued + self.active
+        return max(1, math.ceil(avg_run * backlog / self.max_concurrent))
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn in the pool and return a Future, or raise BulkheadFull"""
+        if not self._admission.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise BulkheadFull(self.name, self.retry_after())
+        if self.budget is not None and not self.budget.try_acquire():
+            self._admission.release()
+            with self._lock:
+                self.rejected += 1
+            raise BulkheadFull(self.name, self.retry_after())
+
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        try:
+            return self._get_executor().submit(self._run, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+            self._release()
+            raise
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+        start = time.perf_counter()
+        succeeded = False
+        try:
+            result = fn(*args, **kwargs)
+            succeeded = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.active -= 1
+                self.total_run_seconds += elapsed
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._release()
+
+    def _release(self):
+        if self.budget is not None:
+            self.budget.release()
+        self._admission.release()
+
+    def stats(self):
+        """Get concurrency, queue depth and saturation metrics"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "name": self.name,
+                "maxConcurrent": self.max_concurrent,
+                "maxQueue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "utilization": round(self.active / self.max_concurrent, 4),
+                "queueFill": round(self.queued / self.max_queue, 4) if self.max_queue else 0.0,
+                "peakActive": self.peak_active,
+                "peakQueued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "averageRunSeconds": round(self.total_run_seconds / finished, 4) if finished else 0.0,
+                "budget": self.budget.stats() if self.budget is not None else None
+            }
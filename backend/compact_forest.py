@@ -0,0 +1,219 @@
+"""
+Compact array representation of the churn random forest
+
+All trees are flattened into a handful of contiguous arrays: float32 split
+thresholds, the narrowest integer type that fits feature ids and per-tree
+child indices, and one float32 churn probability per node. Thresholds are
+rounded down to the nearest float32, and the trees (like scikit-learn's)
+compare float32 inputs, so every split takes the same branch as in the
+original forest.
+
+Optional lossy steps:
+  - ``prune_tolerance`` turns a subtree into a leaf when all of its leaves
+    predict probabilities within that distance of each other, so each tree's
+    output moves by at most the tolerance.
+  - ``max_trees`` keeps only the first trees of the forest.
+
+Usage:
+    python compact_forest.py [--prefix telecom_models] [--output telecom_models_compact]
+                             [--prune-tolerance 0.01] [--max-trees 50]
+"""
+
+import argparse
+import io
+import os
+
+import joblib
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+
+class CompactForest:
+    """Read-only binary forest classifier with predict_proba and feature_importances_"""
+
+    def __init__(self, feature, threshold, left, right, value, tree_offsets, max_depth,
+                 classes, n_features_in, feature_importances):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.tree_offsets = tree_offsets
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.feature_importances_ = feature_importances
+
+    @property
+    def n_estimators(self):
+        return len(self.tree_offsets)
+
+    @property
+    def nbytes(self):
+        arrays = (self.feature, self.threshold, self.left, self.right, self.value, self.tree_offsets)
+        return sum(array.nbytes for array in arrays)
+
+    @classmethod
+    def from_forest(cls, forest, prune_tolerance=0.0, max_trees=None):
+        """Compact a fitted binary RandomForestClassifier"""
+        if len(forest.classes_) != 2:
+            raise ValueError("CompactForest supports binary classifiers only")
+        estimators = forest.estimators_[:max_trees] if max_trees else forest.estimators_
+
+        trees = [_flatten_tree(estimator.tree_, prune_tolerance) for estimator in estimators]
+        sizes = [len(tree[0]) for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        feature, threshold, left, right, value, depth = (list(column) for column in zip(*trees))
+
+        importances = np.mean([estimator.feature_importances_ for estimator in estimators], axis=0)
+        return cls(
+            feature=np.concatenate(feature).astype(np.min_scalar_type(forest.n_features_in_ - 1)),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left).astype(np.min_scalar_type(max(sizes) - 1)),
+            right=np.concatenate(right).astype(np.min_scalar_type(max(sizes) - 1)),
+            value=np.concatenate(value),
+            tree_offsets=offsets.astype(np.min_scalar_type(int(offsets[-1]))),
+            max_depth=max(depth),
+            classes=forest.classes_,
+            n_features_in=forest.n_features_in_,
+            feature_importances=importances / importances.sum()
+        )
+
+    def predict_proba(self, X, batch_size=4096):
+        X = np.asarray(X, dtype=np.float32)
+        positive = np.empty(len(X))
+        offsets = self.tree_offsets.astype(np.int64)
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            rows = np.arange(len(batch))[:, None]
+            # Walk every tree for every row at once; leaves point to themselves
+            node = np.broadcast_to(offsets, (len(batch), len(offsets)))
+            for _ in range(self.max_depth):
+                go_left = batch[rows, self.feature[node]] <= self.threshold[node]
+                node = offsets + np.where(go_left, self.left[node], self.right[node])
+            positive[start:start + len(batch)] = self.value[node].mean(axis=1)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def _float32_at_most(values):
+    """Largest float32 not above each float64 value, so x32 <= t32 exactly when x32 <= t"""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _flatten_tree(tree, prune_tolerance):
+    """Pre-order arrays of one (optionally pruned) sklearn tree with local child indices"""
+    children_left = tree.children_left
+    children_right = tree.children_right
+    counts = tree.value[:, 0, :]
+    proba = counts[:, 1] / counts.sum(axis=1)
+
+    # Range of leaf probabilities below every node; children always follow their parent
+    low = proba.copy()
+    high = proba.copy()
+    for node in range(tree.node_count - 1, -1, -1):
+        if children_left[node] != -1:
+            low[node] = min(low[children_left[node]], low[children_right[node]])
+            high[node] = max(high[children_left[node]], high[children_right[node]])
+
+    order = []
+    is_leaf = []
+    depth = {0: 0}
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        leaf = children_left[node] == -1 or high[node] - low[node] <= prune_tolerance
+        order.append(node)
+        is_leaf.append(leaf)
+        if not leaf:
+            depth[children_left[node]] = depth[children_right[node]] = depth[node] + 1
+            stack.extend((children_right[node], children_left[node]))
+
+    order = np.array(order)
+    is_leaf = np.array(is_leaf)
+    local = np.full(tree.node_count, -1)
+    local[order] = np.arange(len(order))
+
+    left = np.where(is_leaf, np.arange(len(order)), local[children_left[order]])
+    right = np.where(is_leaf, np.arange(len(order)), local[children_right[order]])
+    feature = np.where(is_leaf, 0, tree.feature[order])
+    threshold = np.where(is_leaf, np.inf, _float32_at_most(tree.threshold[order])).astype(np.float32)
+    return feature, threshold, left, right, proba[order].astype(np.float32), max(depth.values())
+
+
+def compaction_report(original, compact, X, y):
+    """Size, load time, inference speed and accuracy of a compact forest against the original"""
+    from benchmarks.common import time_call
+
+    def seconds(fn, repeat=5):
+        return time_call(fn, repeat)['median_s']
+
+    report = {}
+    for name, model in (('original', original), ('compact', compact)):
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        payload = buffer.getvalue()
+        proba = model.predict_proba(X)[:, 1]
+        report[name] = {
+            "trees": model.n_estimators,
+            "bytes": len(payload),
+            "loadSeconds": round(seconds(lambda: joblib.load(io.BytesIO(payload))), 4),
+            "singleRowMs": round(seconds(lambda: model.predict_proba(X[:1]), repeat=20) * 1000, 3),
+            "batchRowsPerSecond": round(len(X) / seconds(lambda: model.predict_proba(X)), 1),
+            "rocAuc": round(roc_auc_score(y, proba), 4)
+        }
+    report["bytesSaved"] = report["original"]["bytes"] - report["compact"]["bytes"]
+    report["rocAucDelta"] = round(report["compact"]["rocAuc"] - report["original"]["rocAuc"], 4)
+    report["maxProbabilityDelta"] = float(np.max(np.abs(
+        original.predict_proba(X)[:, 1] - compact.predict_proba(X)[:, 1]
+    )))
+    return report
+
+
+def print_report(report):
+    print(f"{'':<22} {'original':>14} {'compact':>14}")
+    for key, label in (('trees', 'Trees'), ('bytes', 'Pickled bytes'), ('loadSeconds', 'Load time (s)'),
+                       ('singleRowMs', 'Single row (ms)'), ('batchRowsPerSecond', 'Batch rows/s'),
+                       ('rocAuc', 'ROC-AUC')):
+        print(f"{label:<22} {report['original'][key]:>14} {report['compact'][key]:>14}")
+    saved = report['bytesSaved'] / report['original']['bytes']
+    print(f"\nBytes saved: {report['bytesSaved']} ({saved:.1%})")
+    print(f"ROC-AUC delta: {report['rocAucDelta']:+.4f}")
+    print(f"Max churn probability change: {report['maxProbabilityDelta']:.4f}")
+
+
+def main():
+    from ml_models import TelecomChurnAnomalyDetector
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prefix', default='telecom_models', help='prefix of the saved models to compact')
+    parser.add_argument('--output', default='telecom_models_compact', help='prefix for the compact models')
+    parser.add_argument('--prune-tolerance', type=float, default=0.0)
+    parser.add_argument('--max-trees', type=int)
+    parser.add_argument('--eval-samples', type=int, default=20000)
+    args = parser.parse_args()
+
+    detector = TelecomChurnAnomalyDetector()
+    detector.load_models(args.prefix)
+    original = detector.churn_model
+    compact = CompactForest.from_forest(original, args.prune_tolerance, args.max_trees)
+
+    eval_data = detector.generate_synthetic_data(n_samples=args.eval_samples)
+    X_scaled, df = detector.preprocess_data(eval_data, fit=False)
+    print_report(compaction_report(original, compact, X_scaled, df['churn'].to_numpy()))
+
+    detector.churn_model = compact
+    detector.save_models(args.output)
+    print(f"In-memory arrays: {compact.nbytes} bytes")
+    print(f"Compact model files written to {os.path.abspath(args.output)}_*.joblib")
+
+
+if __name__ == "__main__":
+    # Run through the importable module so pickles reference compact_forest.CompactForest
+    from compact_forest import main as run
+    run()
@@ -0,0 +1,201 @@
+"""
+Parallel stratified k-fold evaluation of the churn model
+
+``train_churn_model`` scores a single 80/20 split, which is too noisy to
+compare changes with. This runs (repeated) stratified k-fold cross-validation
+with the production forest settings instead:
+
+  - the scaled feature matrix and churn labels are written once to
+    memory-mapped .npy files (``write_feature_memmap``)
+  - the fold of every row in every repeat is written once to folds.npy
+  - each (repeat, fold) is a task for a worker process, which maps the files
+    and copies only the rows it trains and tests on
+
+The scaler and encoders are fitted on all rows. That does not leak labels,
+and standard scaling never changes which rows a tree split separates.
+
+Usage:
+    python cross_validation.py [--export churn.csv --mapping column_mapping.json] [--rows 10000]
+                               [--folds 5] [--repeats 1] [--workers 4] [--json cv_report.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import RepeatedStratifiedKFold
+
+from ml_models import CHURN_FOREST_PARAMS, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, TelecomChurnAnomalyDetector
+from sharded_training import write_feature_memmap
+
+RISK_TIERS = ['High', 'Medium', 'Low']
+
+
+def write_folds(y, directory, n_folds=5, n_repeats=1, random_state=42):
+    """Assign every row to a test fold per repeat and write the (repeats x rows) table to folds.npy"""
+    folds = np.empty((n_repeats, len(y)), dtype=np.int16)
+    splitter = RepeatedStratifiedKFold(n_splits=n_folds, n_repeats=n_repeats, random_state=random_state)
+    for i, (_, test_rows) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[i // n_folds, test_rows] = i % n_folds
+    path = os.path.join(directory, 'folds.npy')
+    np.save(path, folds)
+    return path
+
+
+def tier_metrics(y_true, churn_proba):
+    """Precision and recall of each risk tier
+
+    A tier's precision is the churn rate of the customers in it and its recall
+    the share of all churners that fall in it.
+    """
+    tiers = np.where(churn_proba > HIGH_RISK_THRESHOLD, 'High',
+                     np.where(churn_proba > MEDIUM_RISK_THRESHOLD, 'Medium', 'Low'))
+    churners = max(int(y_true.sum()), 1)
+    result = {}
+    for tier in RISK_TIERS:
+        in_tier = tiers == tier
+        hits = int(y_true[in_tier].sum())
+        result[tier] = {
+            "customers": int(in_tier.sum()),
+            "precision": hits / in_tier.sum() if in_tier.any() else 0.0,
+            "recall": hits / churners
+        }
+    return result
+
+
+def evaluate_fold(X_path, y_path, folds_path, repeat, fold, forest_params):
+    """Fit the churn forest on all folds but one and score the held-out fold"""
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    in_test = np.load(folds_path, mmap_mode='r')[repeat] == fold
+    train_rows, test_rows = np.flatnonzero(~in_test), np.flatnonzero(in_test)
+
+    start = time.perf_counter()
+    forest = RandomForestClassifier(**forest_params).fit(X[train_rows], y[train_rows])
+    fitted = time.perf_counter()
+    churn_proba = forest.predict_proba(X[test_rows])[:, 1]
+    predicted = time.perf_counter()
+
+    y_test = np.asarray(y[test_rows])
+    return {
+        "repeat": repeat,
+        "fold": fold,
+        "trainRows": len(train_rows),
+        "testRows": len(test_rows),
+        "rocAuc": roc_auc_score(y_test, churn_proba),
+        "tiers": tier_metrics(y_test, churn_proba),
+        "fitSeconds": round(fitted - start, 3),
+        "predictSeconds": round(predicted - fitted, 3)
+    }
+
+
+def summarize(values):
+    return {"mean": round(float(np.mean(values)), 4), "std": round(float(np.std(values)), 4)}
+
+
+def cross_validate(data, n_folds=5, n_repeats=1, n_workers=None, forest_params=None, workdir=None):
+    """Evaluate the churn model with repeated stratified k-fold and return a structured report"""
+    forest_params = dict(CHURN_FOREST_PARAMS, **(forest_params or {}))
+    n_tasks = n_folds * n_repeats
+    n_workers = n_workers or min(n_tasks, os.cpu_count() or 1)
+    directory = workdir or tempfile.mkdtemp(prefix='churn_cv_')
+    print(f"Evaluating churn model with {n_repeats}x{n_folds}-fold cross-validation "
+          f"on {len(data)} customers with {n_workers} worker processes...")
+
+    try:
+        start = time.perf_counter()
+        X_path, y_path = write_feature_memmap(TelecomChurnAnomalyDetector(), data, directory)
+        folds_path = write_folds(np.load(y_path), directory, n_folds, n_repeats, forest_params['random_state'])
+        prepared = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [pool.submit(evaluate_fold, X_path, y_path, folds_path, repeat, fold, forest_params)
+                       for repeat in range(n_repeats) for fold in range(n_folds)]
+            folds = [future.result() for future in futures]
+        evaluated = time.perf_counter()
+    finally:
+        if workdir is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    for fold in folds:
+        fold['rocAuc'] = round(fold['rocAuc'], 4)
+        for metrics in fold['tiers'].values():
+            metrics['precision'] = round(metrics['precision'], 4)
+            metrics['recall'] = round(metrics['recall'], 4)
+
+    return {
+        "rows": len(data),
+        "folds": n_folds,
+        "repeats": n_repeats,
+        "workers": n_workers,
+        "forestParams": forest_params,
+        "rocAuc": summarize([fold['rocAuc'] for fold in folds]),
+        "tiers": {
+            tier: {
+                "customers": summarize([fold['tiers'][tier]['customers'] for fold in folds]),
+                "precision": summarize([fold['tiers'][tier]['precision'] for fold in folds]),
+                "recall": summarize([fold['tiers'][tier]['recall'] for fold in folds])
+            }
+            for tier in RISK_TIERS
+        },
+        "fitSeconds": summarize([fold['fitSeconds'] for fold in folds]),
+        "predictSeconds": summarize([fold['predictSeconds'] for fold in folds]),
+        "prepareSeconds": round(prepared - start, 3),
+        "totalSeconds": round(evaluated - start, 3),
+        "perFold": folds
+    }
+
+
+def print_report(report):
+    print(f"\n{'repeat':>6} {'fold':>4} {'ROC-AUC':>8} {'fit (s)':>8} {'predict (s)':>11}")
+    for fold in report['perFold']:
+        print(f"{fold['repeat']:>6} {fold['fold']:>4} {fold['rocAuc']:>8.4f} "
+              f"{fold['fitSeconds']:>8.2f} {fold['predictSeconds']:>11.3f}")
+    auc = report['rocAuc']
+    print(f"\nROC-AUC: {auc['mean']:.4f} ± {auc['std']:.4f}")
+    print(f"\n{'tier':>6} {'customers':>10} {'precision':>16} {'recall':>16}")
+    for tier, metrics in report['tiers'].items():
+        precision, recall = metrics['precision'], metrics['recall']
+        print(f"{tier:>6} {metrics['customers']['mean']:>10.0f} "
+              f"{precision['mean']:>8.4f} ± {precision['std']:.4f} {recall['mean']:>8.4f} ± {recall['std']:.4f}")
+    print(f"\nPrepared in {report['prepareSeconds']}s, finished in {report['totalSeconds']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--export', help='labelled customer export (CSV, Excel or JSON, or a directory or glob of them); '
+                        'synthetic data if omitted')
+    parser.add_argument('--mapping', default='column_mapping.json', help='saved column mapping for --export')
+    parser.add_argument('--rows', type=int, default=10000, help='synthetic customers to generate')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    if args.export:
+        from data_loader import DatasetLoader
+        loader = DatasetLoader()
+        data = loader.load_datasets(args.export, loader.load_mapping_config(args.mapping))
+        if data is None:
+            raise SystemExit(f"Could not normalize {args.export}")
+    else:
+        data = TelecomChurnAnomalyDetector().generate_synthetic_data(n_samples=args.rows)
+
+    report = cross_validate(data, args.folds, args.repeats, args.workers)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
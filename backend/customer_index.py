@@ -0,0 +1,200 @@
+"""
+Sort permutations and category bitmaps over the scored customer population
+
+A ``CustomerIndex`` scores every customer in the feature store once per model
+version and keeps:
+
+  - one ascending argsort permutation per sortable field
+  - one packed bitmap per value of each filterable field
+
+A filtered, sorted page combines the filter bitmaps with byte-wise AND/OR and
+then walks the sort permutation, testing only the bits of the rows it visits,
+until the page is full, so a top-N query touches about N / selectivity rows
+instead of filtering and sorting everything. The combined bitmap, its match
+count and its summary are cached per filter, so only the first page of a
+filter pays for a pass over the population.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Query field -> scored or raw column
+SORT_FIELDS = {
+    'churnProbability': 'churn_proba',
+    'anomalyScore': 'anomaly_scores',
+    'monthlyCharges': 'monthly_charges'
+}
+
+FILTER_FIELDS = {
+    'riskLevel': 'risk_levels',
+    'anomalyType': 'anomaly_types',
+    'contractType': 'contract_type',
+    'internetService': 'internet_service'
+}
+
+# Filter combinations whose bitmap, match count and summary are kept per index
+MAX_CACHED_SELECTIONS = 64
+
+# Set bits per byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+
+def popcount(bitmap):
+    return int(POPCOUNT[bitmap].sum())
+
+
+class CustomerIndex:
+    """Scores, sort permutations and filter bitmaps of all stored customers for one model version"""
+
+    def __init__(self, store, detector, chunk_size=50000):
+        self.store = store
+        self.model_version = detector.model_version
+        self.size = len(store)
+
+        scored = [store.score(detector, np.arange(start, min(start + chunk_size, self.size)))
+                  for start in range(0, self.size, chunk_size)]
+        fields = {name: np.concatenate([part[0][name] for part in scored]) for name in scored[0][0]}
+        self.scores = {
+            'churn_proba': np.concatenate([part[1] for part in scored]),
+            'risk_levels': np.concatenate([part[2] for part in scored]).astype(object),
+            'is_anomaly': np.concatenate([part[3] for part in scored]),
+            'anomaly_scores': np.concatenate([part[4] for part in scored]),
+            'anomaly_types': np.array([t for part in scored for t in part[5]], dtype=object)
+        }
+        columns = {**fields, **self.scores}
+
+        self.permutations = {
+            field: np.argsort(columns[source], kind='stable').astype(np.int32)
+            for field, source in SORT_FIELDS.items()
+        }
+        self.bitmaps = {
+            field: {value: np.packbits(columns[source] == value) for value in np.unique(columns[source])}
+            for field, source in FILTER_FIELDS.items()
+        }
+        self._selections = OrderedDict()
+        self._overall_summary = None
+        self._lock = threading.Lock()
+
+    def select(self, filters):
+        """Packed bitmap of customers matching every field, any of the values within a field"""
+        selected = None
+        for field, values in filters.items():
+            bitmaps = self.bitmaps[field]
+            matches = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+            for value in values:
+                if value in bitmaps:
+                    matches |= bitmaps[value]
+            selected = matches if selected is None else selected & matches
+        return selected
+
+    def _selection(self, filters):
+        """Cached [bitmap, match count, summary] of a filter; the summary is filled in on first use"""
+        key = tuple(sorted((field, tuple(sorted(set(values)))) for field, values in filters.items()))
+        with self._lock:
+            selection = self._selections.get(key)
+            if selection is not None:
+                self._selections.move_to_end(key)
+                return selection
+        selected = self.select(filters)
+        selection = [selected, popcount(selected), None]
+        with self._lock:
+            selection = self._selections.setdefault(key, selection)
+            while len(self._selections) > MAX_CACHED_SELECTIONS:
+                self._selections.popitem(last=False)
+        return selection
+
+    def query(self, filters=None, sort=None, descending=True, offset=0, limit=50):
+        """Row numbers of one page and the number of matching customers"""
+        if sort is None:
+            order = np.arange(self.size)
+        else:
+            order = self.permutations[sort]
+            order = order[::-1] if descending else order
+
+        if not filters:
+            return order[offset:offset + limit], self.size
+
+        selected, total, _ = self._selection(filters)
+        needed = min(offset + limit, total)
+        found = []
+        count = 0
+        start = 0
+        step = max(2 * needed, 1024)
+        while count < needed:
+            chunk = order[start:start + step]
+            hits = chunk[(selected[chunk >> 3] & (0x80 >> (chunk & 7))) != 0]
+            found.append(hits)
+            count += len(hits)
+            start += step
+            step *= 2
+        rows = np.concatenate(found)[offset:needed] if found else np.empty(0, dtype=order.dtype)
+        return rows, total
+
+    def summary(self, filters=None):
+        """Risk and anomaly counts plus mean churn probability of the customers matching ``filters``"""
+        if not filters:
+            if self._overall_summary is None:
+                self._overall_summary = self._summarize(None, self.size)
+            return self._overall_summary
+        selection = self._selection(filters)
+        if selection[2] is None:
+            selection[2] = self._summarize(selection[0], selection[1])
+        return selection[2]
+
+    def _summarize(self, selected, total):
+        empty = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        if selected is None:
+            churn = self.scores['churn_proba']
+        else:
+            churn = self.scores['churn_proba'][np.unpackbits(selected, count=self.size).view(bool)]
+
+        def count(field, value):
+            bitmap = self.bitmaps[field].get(value, empty)
+            return popcount(bitmap if selected is None else bitmap & selected)
+
+        return {
+            "total": total,
+            "highRisk": count('riskLevel', 'High'),
+            "mediumRisk": count('riskLevel', 'Medium'),
+            "lowRisk": count('riskLevel', 'Low'),
+            "anomalies": total - count('anomalyType', 'Normal'),
+            "averageChurnProb": round(float(np.mean(churn)), 4) if total else 0.0
+        }
+
+    def page(self, rows):
+        """Raw fields and scores of the given rows, in the argument order of ``customer_columns``"""
+        return (self.store.fields(rows),) + tuple(
+            self.scores[name][rows]
+            for name in ('churn_proba', 'risk_levels', 'is_anomaly', 'anomaly_scores', 'anomaly_types')
+        )
+
+
+class CustomerIndexCache:
+    """Customer indexes of the most recently used model versions"""
+
+    def __init__(self, store, max_versions=2):
+        self.store = store
+        self.max_versions = max_versions
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, detector):
+        """The index for the detector's model version, built on first use"""
+        version = detector.model_version
+        with self._lock:
+            index = self._indexes.get(version)
+            if index is not None:
+                self._indexes.move_to_end(version)
+                return index
+
+        # Build outside the lock so requests on other versions are not held up
+        print(f"Indexing {len(self.store)} customers for model version {version}...")
+        index = CustomerIndex(self.store, detector)
+        with self._lock:
+            index = self._indexes.setdefault(version, index)
+            self._indexes.move_to_end(version)
+            while len(self._indexes) > self.max_versions:
+                self._indexes.popitem(last=False)
+        return index
@@ -1,31 +1,128 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import warnings
+from ml_models import to_lean_dtypes
 warnings.filterwarnings('ignore')
 
+
+def dtype_kind(series):
+    """Coarse type of a column for comparing shards; None when it holds no values"""
+    if series.isnull().all():
+        return None
+    if pd.api.types.is_bool_dtype(series):
+        return 'boolean'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'number'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    return 'text'
+
+
+def read_shard(filepath, column_mapping):
+    """Read one shard and keep only its mapped columns, renamed to our feature names; runs in a worker
+    
+    Numeric features that arrive as text and churn labels are converted here too, since
+    neither needs other files' rows. Returns the frame, a list of problems (mapped columns
+    the file lacks or could not parse) and the row count of the file.
+    """
+    loader = DatasetLoader()
+    raw = loader.read_dataset(filepath)
+    problems = [f"{filepath} has no column {column}" for column in column_mapping.values()
+                if column not in raw.columns]
+    present = {feature: column for feature, column in column_mapping.items() if column in raw.columns}
+    shard = pd.DataFrame({feature: raw[column] for feature, column in present.items()})
+    for col in loader.NUMERIC_FEATURES:
+        if col in shard.columns and shard[col].dtype == 'object':
+            parsed = pd.to_numeric(shard[col], errors='coerce')
+            if parsed.isnull().all() and shard[col].notnull().any():
+                problems.append(f"{filepath} has no numbers in column {present[col]}")
+            shard[col] = parsed
+    if 'churn' in shard.columns:
+        shard['churn'] = loader.binary_churn(shard['churn'])
+    return shard, problems, len(raw)
+
+
 class DatasetLoader:
+    NUMERIC_FEATURES = ['tenure', 'age', 'monthly_charges', 'total_charges', 'data_usage_gb',
+                        'call_minutes', 'sms_count', 'complaints', 'service_calls', 'downtime_hours']
+    SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.json')
+    
     def __init__(self):
         self.label_encoders = {}
         self.scaler = StandardScaler()
         self.column_mapping = {}
         
+    def read_dataset(self, filepath, nrows=None):
+        """Read a CSV, Excel or JSON file into a DataFrame, optionally only its first rows"""
+        # Try different file formats
+        if filepath.endswith(('.xlsx', '.xls')):
+            return pd.read_excel(filepath, nrows=nrows)
+        elif filepath.endswith('.json'):
+            df = pd.read_json(filepath)
+            return df if nrows is None else df.head(nrows)
+        else:
+            # Try CSV as default
+            return pd.read_csv(filepath, nrows=nrows)
+    
+    def expand_sources(self, sources):
+        """The files behind a path, directory, glob pattern or list of those, in sorted order"""
+        if isinstance(sources, str):
+            sources = [sources]
+        files = []
+        for source in sources:
+            if os.path.isdir(source):
+                matches = sorted(os.path.join(source, name) for name in os.listdir(source)
+                                 if name.lower().endswith(self.SUPPORTED_EXTENSIONS))
+            elif glob.has_magic(source):
+                matches = sorted(path for path in glob.glob(source) if os.path.isfile(path))
+            else:
+                matches = [source]
+            files.extend(path for path in matches if path not in files)
+        if not files:
+            raise ValueError(f"No dataset files found in {', '.join(sources)}")
+        return files
+    
+    def _pool_size(self, n_files, n_workers):
+        return max(1, min(n_files, n_workers or os.cpu_count() or 1))
+    
+    def read_datasets(self, files, n_workers=None):
+        """Read several files into DataFrames, in parallel when there is more than one"""
+        n_workers = self._pool_size(len(files), n_workers)
+        if n_workers == 1:
+            return [self.read_dataset(path) for path in files]
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            return list(pool.map(self.read_dataset, files))
+    
     def analyze_dataset(self, filepath):
-        """Analyze the structure of your dataset"""
+        """Analyze the structure of your dataset
+        
+        ``filepath`` may also be a directory, glob pattern or list of files; their rows are
+        analyzed together.
+        """
         print("🔍 ANALYZING YOUR DATASET")
         print("=" * 50)
         
         try:
-            # Try different file formats
-            if filepath.endswith('.csv'):
-                df = pd.read_csv("C:/Users/soham/customer_churn/backend/churn.csv")
-            elif filepath.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(filepath)
-            elif filepath.endswith('.json'):
-                df = pd.read_json(filepath)
+            files = self.expand_sources(filepath)
+            if len(files) == 1:
+                df = self.read_dataset(files[0])
             else:
-                # Try CSV as default
-                df = pd.read_csv(filepath)
+                frames = self.read_datasets(files)
+                print(f"📂 {len(files)} files:")
+                for path, frame in zip(files, frames):
+                    print(f"   {path}: {len(frame)} rows")
+                columns = set(frames[0].columns).union(*(frame.columns for frame in frames[1:]))
+                for col in sorted(columns):
+                    lacking = [path for path, frame in zip(files, frames) if col not in frame.columns]
+                    if lacking:
+                        print(f"   ⚠️  {col} is missing from {len(lacking)} file(s), e.g. {lacking[0]}")
+                df = pd.concat(frames, ignore_index=True)
             
             print(f"✅ Dataset loaded successfully!")
             print(f"📊 Shape: {df.shape[0]} rows, {df.shape[1]} columns")
@@ -191,8 +288,12 @@ class DatasetLoader:
         
         return auto_mapping
     
-    def transform_dataset(self, df, column_mapping):
-        """Transform your dataset to match our model format"""
+    def transform_dataset(self, df, column_mapping, lean=False):
+        """Transform your dataset to match our model format
+        
+        With ``lean=True`` the result uses float32 numbers, small integers,
+        categorical strings and compact ids (see ``to_lean_dtypes``).
+        """
         print(f"\n🔄 TRANSFORMING DATASET")
         print("=" * 50)
         
@@ -245,6 +346,12 @@ class DatasetLoader:
             # Clean and validate data
             print(f"\n🧹 CLEANING DATA")
             
+            # Numeric features can arrive as text (e.g. blank TotalCharges); unparseable values become missing
+            for col in self.NUMERIC_FEATURES:
+                if col in transformed_df.columns and transformed_df[col].dtype == 'object':
+                    transformed_df[col] = pd.to_numeric(transformed_df[col], errors='coerce')
+                    print(f"   🔧 Converted {col} to numbers")
+            
             # Handle missing values
             numeric_columns = transformed_df.select_dtypes(include=[np.number]).columns
             for col in numeric_columns:
@@ -265,24 +372,13 @@ class DatasetLoader:
             if 'churn' in transformed_df.columns:
                 unique_churn_values = transformed_df['churn'].unique()
                 print(f"   🎯 Churn values found: {unique_churn_values}")
-                
-                if transformed_df['churn'].dtype == 'object':
-                    # Convert text values to binary
-                    churn_mapping = {
-                        'yes': 1, 'no': 0,
-                        'true': 1, 'false': 0,
-                        '1': 1, '0': 0,
-                        1: 1, 0: 0
-                    }
-                    
-                    transformed_df['churn'] = transformed_df['churn'].str.lower().map(
-                        lambda x: churn_mapping.get(x, x)
-                    )
-                
-                # Ensure binary values
-                transformed_df['churn'] = pd.to_numeric(transformed_df['churn'], errors='coerce')
-                transformed_df['churn'].fillna(0, inplace=True)
-                transformed_df['churn'] = transformed_df['churn'].astype(int)
+                transformed_df['churn'] = self.binary_churn(transformed_df['churn'])
+            
+            if lean:
+                before = transformed_df.memory_usage(deep=True).sum() / 1024**2
+                transformed_df = to_lean_dtypes(transformed_df)
+                after = transformed_df.memory_usage(deep=True).sum() / 1024**2
+                print(f"   📦 Lean dtypes: {before:.1f} MB -> {after:.1f} MB")
             
             print(f"\n✅ Dataset transformation completed!")
             print(f"📊 Final shape: {transformed_df.shape}")
@@ -296,6 +392,98 @@ class DatasetLoader:
             traceback.print_exc()
             return None
     
+    def load_datasets(self, sources, column_mapping=None, n_workers=None, lean=False):
+        """Read, map and transform a set of dataset files into one DataFrame
+        
+        ``sources`` is a file, directory, glob pattern or list of those, in any mix of CSV,
+        Excel and JSON. Worker processes read the files, keep only the mapped columns and
+        convert numbers and churn labels (``read_shard``), so parsing scales with the number
+        of cores. The combined rows then go through ``transform_dataset`` once, so defaults,
+        missing-value medians and generated customer ids are the same as for one file holding
+        every row. Without a mapping, the columns of
+        the first file are auto-detected and the result applies to all files.
+        
+        Files that lack a mapped column, have no numbers in a numeric one, or whose columns hold
+        a different kind of value than other files (e.g. numeric codes in one, names in
+        another) are reported and nothing is returned.
+        Customer ids that appear in more than one file only produce a warning.
+        """
+        print(f"\n📚 LOADING DATASET FILES")
+        print("=" * 50)
+        
+        try:
+            start = time.perf_counter()
+            files = self.expand_sources(sources)
+            if not column_mapping:
+                column_mapping = self.auto_detect_columns(self.read_dataset(files[0], nrows=100))
+            n_workers = self._pool_size(len(files), n_workers)
+            print(f"📂 Reading {len(files)} files with {n_workers} worker process(es)")
+            
+            if n_workers == 1:
+                results = [read_shard(path, column_mapping) for path in files]
+            else:
+                # Largest files first so one big file does not finish alone at the end
+                order = sorted(files, key=os.path.getsize, reverse=True)
+                with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                    futures = {path: pool.submit(read_shard, path, column_mapping) for path in order}
+                    results = [futures[path].result() for path in files]
+            read_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"❌ Error reading dataset files: {str(e)}")
+            return None
+        
+        # Schema consistency across files
+        problems = []
+        kinds = {}
+        for path, (shard, shard_problems, _) in zip(files, results):
+            problems.extend(shard_problems)
+            for col in shard.columns:
+                kind = dtype_kind(shard[col])
+                if kind is not None:
+                    kinds.setdefault(col, {}).setdefault(kind, path)
+        for col, seen in kinds.items():
+            if len(seen) > 1:
+                examples = ', '.join(f"{kind} in {path}" for kind, path in seen.items())
+                problems.append(f"{col} holds different kinds of values: {examples}")
+        if problems:
+            for problem in problems:
+                print(f"   ❌ {problem}")
+            print("💡 Fix or remove the listed files, or use a column mapping that fits all of them")
+            return None
+        
+        shards = [shard for shard, _, _ in results]
+        for path, (shard, _, rows) in zip(files, results):
+            print(f"   ✅ {path}: {rows} rows")
+        combined = pd.concat(shards, ignore_index=True)
+        del shards, results
+        
+        if 'customer_id' in combined.columns:
+            duplicated = combined['customer_id'].duplicated(keep=False)
+            if duplicated.any():
+                print(f"   ⚠️  {combined.loc[duplicated, 'customer_id'].nunique()} customer ids "
+                      f"appear more than once across the files")
+        
+        transformed_df = self.transform_dataset(combined, {col: col for col in combined.columns}, lean=lean)
+        if transformed_df is not None:
+            print(f"⏱️  Read in {read_seconds:.1f}s, finished in {time.perf_counter() - start:.1f}s")
+        return transformed_df
+    
+    def binary_churn(self, churn):
+        """Churn labels such as Yes/No, True/False or 1/0 as 0/1 integers; unknown labels become 0"""
+        if churn.dtype == 'object':
+            # Convert text values to binary
+            churn_mapping = {
+                'yes': 1, 'no': 0,
+                'true': 1, 'false': 0,
+                '1': 1, '0': 0,
+                1: 1, 0: 0
+            }
+            
+            churn = churn.str.lower().map(lambda x: churn_mapping.get(x, x))
+        
+        # Ensure binary values
+        return pd.to_numeric(churn, errors='coerce').fillna(0).astype(int)
+    
     def save_mapping_config(self, column_mapping, filepath="column_mapping.json"):
         """Save column mapping for future use"""
         import json
@@ -327,7 +515,7 @@ def main():
     loader = DatasetLoader()
     
     # Get dataset path
-    dataset_path = input("📂 Enter path to your dataset file: ").strip()
+    dataset_path = input("📂 Enter path to your dataset file, directory or glob pattern: ").strip()
     
     if not dataset_path:
         print("❌ No dataset path provided")
@@ -359,7 +547,10 @@ def main():
     
     if column_mapping:
         # Transform dataset
-        transformed_df = loader.transform_dataset(df, column_mapping)
+        if len(loader.expand_sources(dataset_path)) > 1:
+            transformed_df = loader.load_datasets(dataset_path, column_mapping)
+        else:
+            transformed_df = loader.transform_dataset(df, column_mapping)
         
         if transformed_df is not None:
             # Save transformed dataset
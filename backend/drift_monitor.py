@@ -0,0 +1,157 @@
+"""
+Bounded-memory drift monitoring of scored traffic
+
+Every scored batch adds its scaled feature rows to the current time bucket:
+per-feature counts in the reference histogram's bins plus per-feature sums.
+The buckets form a fixed ring (``n_buckets`` of ``bucket_seconds``),
+so memory stays at n_buckets x features x bins counters however much traffic
+arrives. Sliding windows are sums over the most recent buckets.
+
+For each window and feature the report gives:
+
+  - psi        population stability index against the training histogram
+  - ks         largest gap between the live and training CDFs at the bin edges
+  - meanShift  live mean minus training mean, in training standard deviations
+
+PSI below 0.1 is reported as stable, up to 0.25 as moderate drift and above
+that as significant drift. The reference is recorded by ``fit_anomaly_model``,
+so models trained before drift monitoring existed must be retrained.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Bin share used in place of zero so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def population_stability_index(expected, actual):
+    """PSI per feature of two (features x bins) arrays of bin shares"""
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+
+
+def drift_status(psi):
+    if psi >= PSI_SIGNIFICANT:
+        return 'significant'
+    if psi >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class DriftMonitor:
+    """Sliding-window drift scores of scored feature rows against the training reference"""
+
+    def __init__(self, bucket_seconds=60, n_buckets=60, windows=(5, 60), min_rows=100):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.windows = sorted({min(w, n_buckets) for w in windows})
+        self.min_rows = min_rows
+        self._lock = threading.Lock()
+        self._model_version = None
+        self._reference = None
+
+    def _reset(self, detector):
+        """Start over for a new model version; its reference defines the bins"""
+        self._model_version = detector.model_version
+        self._reference = (detector.anomaly_model or {}).get('reference')
+        if self._reference is None:
+            return
+        n_features, n_edges = self._reference['edges'].shape
+        self._feature_names = list(detector.feature_names)
+        self._reference_mean = np.array([detector.anomaly_model['feature_stats'][f]['mean']
+                                         for f in self._feature_names])
+        self._reference_std = np.array([detector.anomaly_model['feature_stats'][f]['std']
+                                        for f in self._feature_names])
+        self._bucket_ids = np.full(self.n_buckets, -1, dtype=np.int64)
+        self._rows = np.zeros(self.n_buckets, dtype=np.int64)
+        self._counts = np.zeros((self.n_buckets, n_features, n_edges + 1), dtype=np.int64)
+        self._sums = np.zeros((self.n_buckets, n_features))
+
+    def _check_model_version(self, detector):
+        if detector.model_version != self._model_version:
+            self._reset(detector)
+
+    def update(self, detector, X_scaled, now=None):
+        """Add a batch of scaled feature rows scored by ``detector``"""
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        with self._lock:
+            self._check_model_version(detector)
+            if self._reference is None or len(X_scaled) == 0:
+                return
+            edges = self._reference['edges']
+            n_bins = edges.shape[1] + 1
+            bins = np.column_stack([np.searchsorted(edges[j], X_scaled[:, j], side='left')
+                                    for j in range(edges.shape[0])])
+            flat = bins + np.arange(edges.shape[0]) * n_bins
+            counts = np.bincount(flat.ravel(), minlength=edges.shape[0] * n_bins).reshape(-1, n_bins)
+
+            slot = bucket % self.n_buckets
+            if self._bucket_ids[slot] != bucket:
+                self._bucket_ids[slot] = bucket
+                self._rows[slot] = 0
+                self._counts[slot] = 0
+                self._sums[slot] = 0
+            self._rows[slot] += len(X_scaled)
+            self._counts[slot] += counts
+            self._sums[slot] += X_scaled.sum(axis=0)
+
+    def report(self, detector, now=None):
+        """Drift scores per sliding window for the detector's model version"""
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        with self._lock:
+            self._check_model_version(detector)
+            if self._reference is None:
+                return {
+                    "modelVersion": self._model_version,
+                    "available": False,
+                    "reason": "The anomaly model has no training reference; retrain it to enable drift monitoring"
+                }
+            windows = [self._window_report(bucket, n) for n in self.windows]
+        return {
+            "modelVersion": self._model_version,
+            "available": True,
+            "referenceRows": int(self._reference['count']),
+            "bucketSeconds": self.bucket_seconds,
+            "thresholds": {"moderate": PSI_MODERATE, "significant": PSI_SIGNIFICANT},
+            "windows": windows
+        }
+
+    def _window_report(self, bucket, n_buckets):
+        live = (self._bucket_ids > bucket - n_buckets) & (self._bucket_ids <= bucket)
+        rows = int(self._rows[live].sum())
+        window = {"seconds": n_buckets * self.bucket_seconds, "rows": rows}
+        if rows < self.min_rows:
+            window.update(status='insufficient data', features=[])
+            return window
+
+        actual = self._counts[live].sum(axis=0) / rows
+        expected = self._reference['proportions']
+        psi = population_stability_index(expected, actual)
+        ks = np.abs(np.cumsum(actual, axis=1) - np.cumsum(expected, axis=1)).max(axis=1)
+        mean_shift = (self._sums[live].sum(axis=0) / rows - self._reference_mean) / (self._reference_std + 1e-6)
+
+        features = sorted((
+            {
+                "feature": name,
+                "psi": round(float(psi[j]), 4),
+                "ks": round(float(ks[j]), 4),
+                "meanShift": round(float(mean_shift[j]), 4),
+                "status": drift_status(psi[j])
+            }
+            for j, name in enumerate(self._feature_names)
+        ), key=lambda f: f['psi'], reverse=True)
+        window.update(
+            status=drift_status(psi.max()),
+            maxPsi=round(float(psi.max()), 4),
+            driftedFeatures=[f['feature'] for f in features if f['status'] != 'stable'],
+            features=features
+        )
+        return window
@@ -0,0 +1,259 @@
+"""
+Memory-mapped customer feature store with a customer_id hash index
+
+A store directory holds plain .npy files:
+
+  - features.npy    scaled model features (the ``preprocess_data`` output)
+  - numeric.npy     raw numeric fields, one column per name in meta.json
+  - categories.npy  category codes of the raw categorical fields
+  - ids.npy         customer ids as fixed-width bytes
+  - index.npy       open-addressing hash table mapping id hashes to rows
+
+The files are opened with ``mmap_mode='r'``, so worker processes forked from
+(or started next to) the process that opened the store share the same page
+cache instead of each holding a copy. Looking up a customer hashes the id,
+probes a few table slots and compares ids, and fetching its features is a
+single row read: no DataFrame is built on the request path.
+
+Usage:
+    python feature_store.py build [--dir feature_store] [--rows 10000] [--prefix telecom_models]
+    python feature_store.py lookup <customer_id> [--dir feature_store]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from ml_models import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+
+NUMERIC_FIELDS = [
+    'tenure', 'age', 'monthly_charges', 'total_charges', 'data_usage_gb', 'call_minutes',
+    'sms_count', 'complaints', 'service_calls', 'downtime_hours', 'churn'
+]
+
+# Numeric fields that are counts or flags; stored as float64 like the rest
+INTEGER_FIELDS = {'age', 'sms_count', 'complaints', 'service_calls', 'churn'}
+
+EMPTY_SLOT = -1
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix64(x):
+    """splitmix64 finalizer; wraps around on uint64 overflow"""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def hash_ids(ids):
+    """Stable 64-bit hashes of an array of fixed-width byte ids (width a multiple of 8)"""
+    words = np.ascontiguousarray(ids).view(np.uint64).reshape(len(ids), -1)
+    hashes = np.zeros(len(ids), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in words.T:
+            hashes = _mix64(hashes ^ column ^ _GOLDEN)
+    return hashes
+
+
+def build_index(hashes):
+    """Open-addressing table (linear probing, load factor <= 0.5) of row numbers"""
+    size = 1 << max(4, int(2 * len(hashes) - 1).bit_length())
+    mask = np.uint64(size - 1)
+    table = np.full(size, EMPTY_SLOT, dtype=np.int64)
+
+    pending = np.arange(len(hashes))
+    slots = (hashes & mask).astype(np.int64)
+    while len(pending):
+        # Rows whose slot is free claim it, one row per slot; the rest probe the next slot
+        free = table[slots] == EMPTY_SLOT
+        _, first = np.unique(slots[free], return_index=True)
+        claimed = np.flatnonzero(free)[first]
+        table[slots[claimed]] = pending[claimed]
+        waiting = np.ones(len(pending), dtype=bool)
+        waiting[claimed] = False
+        pending = pending[waiting]
+        slots = (slots[waiting] + 1) & (size - 1)
+    return table
+
+
+class FeatureStore:
+    """Read-only memory-mapped scaled features and raw fields, indexed by customer_id"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.features = self._load('features')
+        self.numeric = self._load('numeric')
+        self.categories = self._load('categories')
+        self.ids = self._load('ids')
+        self.index = self._load('index')
+        self.numeric_fields = self.meta['numericFields']
+        self.category_labels = {col: np.array(labels, dtype=object)
+                                for col, labels in self.meta['categoryLabels'].items()}
+        self.scaler_mean = np.array(self.meta['scalerMean'])
+        self.scaler_scale = np.array(self.meta['scalerScale'])
+        self._mask = len(self.index) - 1
+
+    def _load(self, name):
+        return np.load(os.path.join(self.directory, f'{name}.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, directory, detector, data):
+        """Write the store for a customer DataFrame, scaled with the detector's preprocessing
+
+        The files are written to a staging directory that is renamed into
+        place, so readers never see a partial store. If another process
+        finished building the same directory first, its store is used.
+        """
+        ids = data['customer_id'].astype(str).to_numpy()
+        if len(np.unique(ids)) != len(ids):
+            raise ValueError("Customer ids must be unique to build a feature store")
+        width = -(-max(len(s.encode('utf-8')) for s in ids) // 8) * 8
+
+        parent = os.path.dirname(os.path.abspath(directory))
+        staging = tempfile.mkdtemp(dir=parent, prefix='.feature_store_')
+        try:
+            X_scaled, _ = detector.preprocess_data(data, fit=False)
+            numeric_fields = [field for field in NUMERIC_FIELDS if field in data]
+            category_codes = []
+            category_labels = {}
+            for col in CATEGORICAL_COLUMNS:
+                codes, labels = data[col].factorize()
+                category_codes.append(codes)
+                category_labels[col] = labels.astype(str).tolist()
+            encoded_ids = ids.astype(f'S{width}')
+
+            np.save(os.path.join(staging, 'features.npy'), np.ascontiguousarray(X_scaled, dtype=np.float64))
+            np.save(os.path.join(staging, 'numeric.npy'),
+                    data[numeric_fields].to_numpy(dtype=np.float64))
+            np.save(os.path.join(staging, 'categories.npy'),
+                    np.column_stack(category_codes).astype(np.int16))
+            np.save(os.path.join(staging, 'ids.npy'), encoded_ids)
+            np.save(os.path.join(staging, 'index.npy'), build_index(hash_ids(encoded_ids)))
+            meta = {
+                "rows": len(ids),
+                "createdAt": datetime.now().isoformat(),
+                "modelVersion": detector.model_version,
+                "featureNames": list(detector.feature_names or FEATURE_COLUMNS),
+                "numericFields": numeric_fields,
+                "categoryLabels": category_labels,
+                "scalerMean": detector.scaler.mean_.tolist(),
+                "scalerScale": detector.scaler.scale_.tolist()
+            }
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isfile(os.path.join(directory, 'meta.json')):
+                raise
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return cls(directory)
+
+    def lookup(self, customer_id):
+        """Row number of a customer, or None if the id is not in the store"""
+        key = str(customer_id).encode('utf-8')
+        if len(key) > self.ids.dtype.itemsize:
+            return None
+        key_array = np.array([key], dtype=self.ids.dtype)
+        slot = int(hash_ids(key_array)[0]) & self._mask
+        while True:
+            row = int(self.index[slot])
+            if row == EMPTY_SLOT:
+                return None
+            if self.ids[row] == key_array[0]:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def scaled_features(self, rows, scaler=None):
+        """Scaled feature rows, re-scaled if ``scaler`` differs from the one used to build the store"""
+        X = np.asarray(self.features[rows], dtype=np.float64)
+        if scaler is not None and not (np.array_equal(scaler.mean_, self.scaler_mean)
+                                       and np.array_equal(scaler.scale_, self.scaler_scale)):
+            X = (X * self.scaler_scale + self.scaler_mean - scaler.mean_) / scaler.scale_
+        return X
+
+    def fields(self, rows):
+        """Raw customer fields of the given rows as a dict of column arrays"""
+        rows = np.atleast_1d(rows)
+        numeric = np.asarray(self.numeric[rows])
+        categories = np.asarray(self.categories[rows])
+        fields = {'customer_id': np.char.decode(np.asarray(self.ids[rows]), 'utf-8').astype(object)}
+        for i, field in enumerate(self.numeric_fields):
+            fields[field] = numeric[:, i]
+        for i, col in enumerate(CATEGORICAL_COLUMNS):
+            fields[col] = self.category_labels[col][categories[:, i]]
+        return fields
+
+    def record(self, row):
+        """One customer's raw fields as native Python values"""
+        record = {}
+        for field, values in self.fields([row]).items():
+            value = values[0]
+            if field in INTEGER_FIELDS:
+                value = int(value)
+            elif isinstance(value, np.generic):
+                value = value.item()
+            record[field] = value
+        return record
+
+    def score(self, detector, rows):
+        """Raw fields plus churn and anomaly predictions for the given rows"""
+        rows = np.atleast_1d(rows)
+        fields = self.fields(rows)
+        X_scaled = self.scaled_features(rows, detector.scaler)
+        churn_proba, risk_levels = detector.churn_risk_from_features(X_scaled)
+        is_anomaly, anomaly_scores, anomaly_types = detector.anomalies_from_features(X_scaled, fields)
+        return fields, churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types
+
+
+def open_or_build(directory, detector, n_samples=10000):
+    """Open the store in ``directory``, building it from synthetic customers if it does not exist"""
+    if os.path.isfile(os.path.join(directory, 'meta.json')):
+        return FeatureStore(directory)
+    print(f"Building feature store for {n_samples} customers in {directory}...")
+    data = detector.generate_synthetic_data(n_samples=n_samples)
+    return FeatureStore.build(directory, detector, data)
+
+
+def main():
+    from ml_models import TelecomChurnAnomalyDetector
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.environ.get('FEATURE_STORE_DIR', 'feature_store'))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='(re)build the store from synthetic customers')
+    build_parser.add_argument('--rows', type=int, default=int(os.environ.get('CUSTOMER_STORE_SIZE', 10000)))
+    build_parser.add_argument('--prefix', default='telecom_models')
+    lookup_parser = subparsers.add_parser('lookup', help='print one customer from the store')
+    lookup_parser.add_argument('customer_id')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        detector = TelecomChurnAnomalyDetector()
+        detector.load_models(args.prefix)
+        shutil.rmtree(args.dir, ignore_errors=True)
+        store = open_or_build(args.dir, detector, args.rows)
+        print(f"Feature store with {len(store)} customers written to {os.path.abspath(args.dir)}")
+    else:
+        store = FeatureStore(args.dir)
+        row = store.lookup(args.customer_id)
+        if row is None:
+            raise SystemExit(f"Customer {args.customer_id} not found")
+        print(json.dumps({"row": row, **store.record(row)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, copy_current_request_context, g, Response
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -7,114 +7,431 @@ import json
 import os
 import sys
 import io
-import csv
+import time
+import hmac
+import contextvars
+from functools import wraps
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
 from io import BytesIO
 import base64
 
 # Import our ML models
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from ml_models import TelecomChurnAnomalyDetector
+from model_registry import ModelRegistry, ModelHandle
+from feature_store import open_or_build
+from customer_index import CustomerIndexCache, FILTER_FIELDS, SORT_FIELDS
+from attribution import AttributionEngine, explanation, top_contributions
+from drift_monitor import DriftMonitor
+from report_charts import ChartRenderer, chart_aggregates
+from streaming_report import detail_report_file
+from prediction_cache import PredictionCache
+from batching import MicroBatchDispatcher
+from bulkhead import Bulkhead, BulkheadFull, RequestBudget
+import metrics
+from profiler import SamplingProfiler
+from serialization import (SHAPES, CSV, customer_columns, columns_to_rows, export_columns, frame_columns,
+                           shape_columns, json_response, negotiated_response)
 
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:5173", "http://localhost:3000"])  # Allow React dev server
 
-# Global model instance
-detector = TelecomChurnAnomalyDetector()
-
-# Load models on startup
-try:
-    detector.load_models()
-    print("Models loaded successfully!")
-except:
-    print("No pre-trained models found. Training new models...")
-    # Generate and train on synthetic data
-    training_data = detector.generate_synthetic_data(n_samples=10000)
-    detector.train_churn_model(training_data)
-    detector.train_anomaly_model(training_data)
-    detector.save_models()
-    print("New models trained and saved!")
+# Versioned model artifacts; ACTIVE names the version every worker should serve
+model_registry = ModelRegistry(os.environ.get('MODEL_REGISTRY_DIR', 'model_registry'))
+
+def load_initial_detector():
+    """Load the active registry version, or seed the registry from local or newly trained models"""
+    active = model_registry.active_version()
+    if active is not None:
+        detector = model_registry.load(active)
+        print(f"Models loaded from registry version {active}")
+        return detector
+    
+    detector = TelecomChurnAnomalyDetector()
+    
+    # Load models on startup
+    try:
+        detector.load_models()
+        print("Models loaded successfully!")
+    except:
+        print("No pre-trained models found. Training new models...")
+        # Generate and train on synthetic data
+        training_data = detector.generate_synthetic_data(n_samples=10000)
+        detector.train_churn_model(training_data)
+        detector.train_anomaly_model(training_data)
+        detector.save_models()
+        print("New models trained and saved!")
+    
+    version = model_registry.promote(model_registry.register(detector, notes='Initial models'))
+    detector.model_version = version
+    print(f"Registered initial models as version {version}")
+    return detector
+
+def warm_up_detector(detector):
+    """Run a small batch through a freshly loaded detector before it takes traffic"""
+    sample_data = detector.generate_synthetic_data(n_samples=32)
+    detector.predict_churn_risk(sample_data)
+    detector.detect_anomalies(sample_data)
+    customer_indexes.get(detector)
+
+# Requests read model_handle.current() once and keep that detector, so a new
+# version can load in the background and be swapped in between requests
+model_handle = ModelHandle(
+    load_initial_detector(),
+    model_registry,
+    poll_seconds=float(os.environ.get('MODEL_POLL_SECONDS', 5)),
+    warmup=warm_up_detector
+)
+
+# Memory-mapped features of the customer population with an id index; opened
+# before workers fork so they all share the same pages
+feature_store = open_or_build(
+    os.environ.get('FEATURE_STORE_DIR', 'feature_store'),
+    model_handle.current(),
+    n_samples=int(os.environ.get('CUSTOMER_STORE_SIZE', 10000))
+)
+
+# Stored customers checked for alerts by /api/alerts
+ALERT_SAMPLE_SIZE = int(os.environ.get('ALERT_SAMPLE_SIZE', 20))
+
+# Sort permutations and filter bitmaps of the scored population, per model version
+customer_indexes = CustomerIndexCache(feature_store)
+customer_indexes.get(model_handle.current())
+CUSTOMER_PAGE_SIZE_MAX = 500
+
+# Cache for repeated /api/predict calls; entries are keyed by the model version
+# so swapping in another version invalidates them automatically
+prediction_cache = PredictionCache(
+    max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+)
+
+def score_customer_records(detector, records):
+    """Score a batch of customer records with the detector's churn and anomaly models"""
+    with metrics.endpoint_scope('predict_customer'):
+        customer_df = pd.DataFrame(records)
+        X_scaled, _ = detector.preprocess_data(customer_df, fit=False)
+        churn_proba, risk_levels = detector.churn_risk_from_features(X_scaled)
+        is_anomaly, anomaly_scores, anomaly_types = detector.anomalies_from_features(X_scaled, customer_df)
+    drift_monitor.update(detector, X_scaled)
+    return list(zip(churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types))
+
+def score_queued_records(queued):
+    """Score batched (detector, record) pairs; a batch spanning a model swap makes one call per detector"""
+    results = [None] * len(queued)
+    groups = {}
+    for i, (detector, _) in enumerate(queued):
+        groups.setdefault(id(detector), (detector, []))[1].append(i)
+    for detector, positions in groups.values():
+        scored = score_customer_records(detector, [queued[i][1] for i in positions])
+        for i, result in zip(positions, scored):
+            results[i] = result
+    return results
+
+# Sliding-window drift of scored traffic against the training distribution;
+# counters are per worker process and bounded by the number of buckets
+drift_monitor = DriftMonitor(
+    bucket_seconds=int(os.environ.get('DRIFT_BUCKET_SECONDS', 60)),
+    n_buckets=int(os.environ.get('DRIFT_BUCKETS', 60))
+)
+
+# Report charts are rendered in a separate process pool (matplotlib is only
+# imported there) and cached on disk by their aggregates and report type
+chart_renderer = ChartRenderer(
+    cache_dir=os.environ.get('CHART_CACHE_DIR', 'chart_cache'),
+    max_workers=int(os.environ.get('CHART_WORKERS', 1)),
+    max_files=int(os.environ.get('CHART_CACHE_MAX_FILES', 200)),
+    timeout=float(os.environ.get('CHART_TIMEOUT_SECONDS', 30))
+)
+
+# Per-customer churn explanations from the forest's decision paths, cached by
+# model version and customer
+attributions = AttributionEngine(max_size=int(os.environ.get('ATTRIBUTION_CACHE_SIZE', 100000)))
+
+# Concurrent /api/predict calls are coalesced into one model call per window;
+# a window of 0 scores every request inline
+PREDICT_BATCH_WINDOW_MS = float(os.environ.get('PREDICT_BATCH_WINDOW_MS', 2))
+predict_batcher = MicroBatchDispatcher(
+    score_queued_records,
+    max_batch_size=int(os.environ.get('PREDICT_BATCH_MAX_SIZE', 32)),
+    max_wait_ms=PREDICT_BATCH_WINDOW_MS
+)
+
+# Opt-in request profiling: a sample of requests, or any request carrying the
+# debug header, is profiled into a bounded ring buffer on disk
+PROFILE_HEADER = 'X-Debug-Profile'
+profiler = SamplingProfiler(
+    enabled=os.environ.get('PROFILER_ENABLED', '0').lower() in ('1', 'true', 'yes'),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0.01)),
+    interval_ms=float(os.environ.get('PROFILE_INTERVAL_MS', 5)),
+    profile_dir=os.environ.get('PROFILE_DIR', 'profiles'),
+    max_profiles=int(os.environ.get('PROFILE_MAX_FILES', 100))
+)
+
+# A heavy request holds its server thread until its bulkhead job finishes, so
+# all bulkheads together may only hold the threads not reserved for predict.
+# SERVE_THREADS is set by serve.py; the development server has no fixed limit
+REQUEST_THREADS = int(os.environ.get('SERVE_THREADS', 4))
+PREDICT_RESERVED_THREADS = int(os.environ.get('PREDICT_RESERVED_THREADS', 2))
+heavy_request_budget = RequestBudget(int(os.environ.get(
+    'HEAVY_REQUEST_SLOTS', max(1, REQUEST_THREADS - PREDICT_RESERVED_THREADS))))
+
+def create_bulkhead(name, max_concurrent, max_queue):
+    """Create a bulkhead, sized by BULKHEAD_<NAME>_CONCURRENCY/_QUEUE if set"""
+    prefix = f'BULKHEAD_{name.upper()}'
+    return Bulkhead(
+        name,
+        max_concurrent=int(os.environ.get(f'{prefix}_CONCURRENCY', max_concurrent)),
+        max_queue=int(os.environ.get(f'{prefix}_QUEUE', max_queue)),
+        budget=heavy_request_budget
+    )
+
+# Heavy endpoints run in their own bounded pools so a burst of reports or
+# exports is rejected early instead of starving /api/predict of threads
+bulkheads = {
+    'reports': create_bulkhead('reports', max_concurrent=2, max_queue=4),
+    'exports': create_bulkhead('exports', max_concurrent=2, max_queue=4),
+    'analytics': create_bulkhead('analytics', max_concurrent=4, max_queue=8)
+}
+
+def run_in_bulkhead(name):
+    """Dispatch a view to a bulkhead pool, answering 429 when it is saturated"""
+    bulkhead = bulkheads[name]
+    
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                # Carry the metrics endpoint label and any active profile over to the pool thread
+                context = contextvars.copy_context()
+                task = profiler.attach(request.environ.get('profiler.session'), view)
+                future = bulkhead.submit(context.run, copy_current_request_context(task), *args, **kwargs)
+            except BulkheadFull as e:
+                response = jsonify({"error": str(e), "pool": e.name, "retryAfter": e.retry_after})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            return future.result()
+        return wrapper
+    return decorator
+
+def requested_shape():
+    """Response shape for scored batches: 'rows' (default) or 'columnar'"""
+    return request.args.get('format', 'rows')
+
+def customer_query():
+    """Filters, sort and page of a customer listing; raises ValueError for bad parameters"""
+    args = request.args
+    filters = {field: args[field].split(',') for field in FILTER_FIELDS if args.get(field)}
+    sort = args.get('sort')
+    if sort is not None and sort not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(SORT_FIELDS)}")
+    order = args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    try:
+        page = int(args.get('page', 1))
+        page_size = int(args.get('pageSize', 50))
+    except ValueError:
+        raise ValueError("page and pageSize must be integers")
+    if page < 1 or not 1 <= page_size <= CUSTOMER_PAGE_SIZE_MAX:
+        raise ValueError(f"page must be at least 1 and pageSize between 1 and {CUSTOMER_PAGE_SIZE_MAX}")
+    return filters, sort, order, page, page_size
+
+@app.before_request
+def refresh_model():
+    model_handle.poll()
+
+@app.before_request
+def start_request_timer():
+    if metrics.registry.enabled:
+        g.metrics_start = time.perf_counter()
+        metrics.set_endpoint(request.endpoint or 'unknown')
+
+@app.before_request
+def start_request_profile():
+    if profiler.enabled and profiler.should_profile(forced=PROFILE_HEADER in request.headers):
+        request.environ['profiler.session'] = profiler.start(f"{request.method} {request.path}")
+
+@app.after_request
+def tag_request_profile(response):
+    session = request.environ.get('profiler.session')
+    if session is not None:
+        request.environ['profiler.status'] = response.status_code
+        response.headers['X-Profile-Id'] = session.id
+    return response
+
+@app.teardown_request
+def finish_request_profile(exc):
+    # Teardown runs even when the view or an after_request hook raised, so the
+    # sampler never keeps a session of a finished request
+    session = request.environ.pop('profiler.session', None)
+    if session is not None:
+        status = request.environ.pop('profiler.status', 500 if exc is not None else None)
+        profiler.stop(session, status=status)
+
+@app.after_request
+def record_request_metrics(response):
+    if metrics.registry.enabled and 'metrics_start' in g:
+        labels = (('endpoint', request.endpoint or 'unknown'), ('method', request.method))
+        metrics.registry.observe('churn_request_duration_seconds', labels,
+                                 time.perf_counter() - g.metrics_start,
+                                 help_text='End-to-end request latency by endpoint')
+        metrics.registry.inc('churn_requests_total', labels + (('status', response.status_code),),
+                             help_text='Requests served by endpoint and status')
+    return response
+
+def collect_runtime_metrics():
+    """Expose cache, batching and bulkhead counters at scrape time"""
+    cache = prediction_cache.stats()
+    batching = predict_batcher.stats()
+    pools = [bulkhead.stats() for bulkhead in bulkheads.values()]
+    return [
+        ('churn_prediction_cache_hits_total', 'counter', 'Prediction cache hits', [((), cache['hits'])]),
+        ('churn_prediction_cache_misses_total', 'counter', 'Prediction cache misses', [((), cache['misses'])]),
+        ('churn_prediction_cache_entries', 'gauge', 'Entries held in the prediction cache', [((), cache['size'])]),
+        ('churn_predict_batches_total', 'counter', 'Micro-batches scored', [((), batching['batches'])]),
+        ('churn_predict_batched_records_total', 'counter', 'Records scored through micro-batches',
+         [((), batching['records'])]),
+        ('churn_bulkhead_active', 'gauge', 'Requests running in each bulkhead pool',
+         [((('pool', p['name']),), p['active']) for p in pools]),
+        ('churn_bulkhead_queued', 'gauge', 'Requests waiting in each bulkhead pool',
+         [((('pool', p['name']),), p['queued']) for p in pools]),
+        ('churn_bulkhead_rejected_total', 'counter', 'Requests rejected with 429 by each bulkhead pool',
+         [((('pool', p['name']),), p['rejected']) for p in pools]),
+        ('churn_heavy_request_slots_held', 'gauge', 'Request threads held by bulkhead requests',
+         [((), heavy_request_budget.stats()['held'])])
+    ]
+
+metrics.registry.register_collector(collect_runtime_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def require_admin(view):
+    """Require the X-Admin-Token header; admin and profile routes are disabled until ADMIN_TOKEN is configured"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Admin endpoints are disabled; set ADMIN_TOKEN to enable them"}), 503
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({"error": "Admin token required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/debug/profiles', methods=['GET'])
+@require_admin
+def list_profiles():
+    """List stored request profiles, newest first"""
+    if not profiler.enabled:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    return jsonify({"profiles": profiler.list_profiles()})
+
+@app.route('/debug/profiles/aggregate', methods=['GET'])
+@require_admin
+def get_aggregate_profile():
+    """Merged collapsed stacks of all stored profiles, optionally filtered by label"""
+    if not profiler.enabled:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    return Response(profiler.aggregate(request.args.get('label')), mimetype='text/plain')
+
+@app.route('/debug/profiles/<profile_id>', methods=['GET'])
+@require_admin
+def get_profile(profile_id):
+    """Collapsed stacks of one profile, for flamegraph.pl or speedscope"""
+    if not profiler.enabled:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    collapsed = profiler.read_collapsed(profile_id)
+    if collapsed is None:
+        return jsonify({"error": f"Profile {profile_id} not found"}), 404
+    return Response(collapsed, mimetype='text/plain')
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    detector = model_handle.current()
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "models_loaded": detector.churn_model is not None
+        "models_loaded": detector.churn_model is not None,
+        "modelVersion": detector.model_version
     })
 
 @app.route('/api/customers', methods=['GET'])
 def get_customers():
-    """Get sample customer data with predictions"""
+    """Get one page of scored customers, optionally filtered and sorted"""
+    detector = model_handle.current()
+    shape = requested_shape()
+    if shape not in SHAPES:
+        return jsonify({"error": f"Unknown format '{shape}', expected one of: {', '.join(SHAPES)}"}), 400
     try:
-        # Generate sample data
-        sample_data = detector.generate_synthetic_data(n_samples=50)
-        
-        # Get predictions
-        churn_proba, risk_levels = detector.predict_churn_risk(sample_data)
-        is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(sample_data)
+        filters, sort, order, page, page_size = customer_query()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        index = customer_indexes.get(detector)
+        rows, total = index.query(filters, sort, descending=order == 'desc',
+                                  offset=(page - 1) * page_size, limit=page_size)
         
         # Prepare response data
-        customers = []
-        for i, row in sample_data.iterrows():
-            customer = {
-                "id": row['customer_id'],
-                "tenure": round(row['tenure'], 1),
-                "age": int(row['age']),
-                "monthlyCharges": round(row['monthly_charges'], 2),
-                "totalCharges": round(row['total_charges'], 2),
-                "dataUsageGB": round(row['data_usage_gb'], 2),
-                "callMinutes": round(row['call_minutes'], 0),
-                "smsCount": int(row['sms_count']),
-                "complaints": int(row['complaints']),
-                "serviceCalls": int(row['service_calls']),
-                "downtimeHours": round(row['downtime_hours'], 2),
-                "contractType": row['contract_type'],
-                "paymentMethod": row['payment_method'],
-                "internetService": row['internet_service'],
-                "churnProbability": round(churn_proba[i], 4),
-                "riskLevel": risk_levels[i],
-                "isAnomaly": bool(is_anomaly[i]),
-                "anomalyScore": round(anomaly_scores[i], 4),
-                "anomalyType": anomaly_types[i],
-                "actualChurn": bool(row['churn']),
-                "lastActivity": (datetime.now() - timedelta(days=np.random.randint(0, 30))).isoformat()
+        with metrics.stage('build_response'):
+            columns = customer_columns(*index.page(rows))
+            summary = index.summary(filters)
+            pagination = {
+                "page": page,
+                "pageSize": page_size,
+                "total": total,
+                "totalPages": -(-total // page_size),
+                "sort": sort,
+                "order": order
             }
-            customers.append(customer)
+            
+            # JSON stays the default; Accept/Accept-Encoding select binary or compressed bodies
+            response = negotiated_response(
+                {"customers": shape_columns(columns, shape), "summary": summary, "pagination": pagination},
+                columns,
+                metadata={"summary": summary, "pagination": pagination}
+            )
         
-        return jsonify({
-            "customers": customers,
-            "summary": {
-                "total": len(customers),
-                "highRisk": sum(1 for c in customers if c['riskLevel'] == 'High'),
-                "mediumRisk": sum(1 for c in customers if c['riskLevel'] == 'Medium'),
-                "lowRisk": sum(1 for c in customers if c['riskLevel'] == 'Low'),
-                "anomalies": sum(1 for c in customers if c['isAnomaly']),
-                "averageChurnProb": round(np.mean([c['churnProbability'] for c in customers]), 4)
-            }
-        })
+        return response
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/customers/<customer_id>', methods=['GET'])
+def get_customer(customer_id):
+    """Get one customer from the feature store, scored with the current models"""
+    detector = model_handle.current()
+    row = feature_store.lookup(customer_id)
+    if row is None:
+        return jsonify({"error": f"Customer {customer_id} not found"}), 404
+    
+    try:
+        columns = customer_columns(*feature_store.score(detector, [row]))
+        return json_response({"customer": columns_to_rows(columns)[0], "modelVersion": detector.model_version})
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/predict', methods=['POST'])
 def predict_customer():
     """Predict churn and anomalies for a single customer"""
+    detector = model_handle.current()
     try:
         data = request.get_json()
         
-        # Convert to DataFrame
-        customer_df = pd.DataFrame([{
-            'customer_id': data.get('id', 'UNKNOWN'),
+        # Normalize the input record
+        record = {
             'tenure': float(data.get('tenure', 0)),
             'age': int(data.get('age', 0)),
             'monthly_charges': float(data.get('monthlyCharges', 0)),
@@ -128,21 +445,31 @@ def predict_customer():
             'contract_type': data.get('contractType', 'Month-to-month'),
             'payment_method': data.get('paymentMethod', 'Electronic check'),
             'internet_service': data.get('internetService', 'DSL')
-        }])
+        }
         
-        # Get predictions
-        churn_proba, risk_levels = detector.predict_churn_risk(customer_df)
-        is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(customer_df)
+        # The cache key, lookup and scoring all use the model this request started with
+        model_version = detector.model_version
+        prediction = prediction_cache.get(record, model_version)
+        if prediction is None:
+            customer_record = {'customer_id': data.get('id', 'UNKNOWN'), **record}
+            # Profiled requests score inline so their samples include the model work
+            if PREDICT_BATCH_WINDOW_MS > 0 and 'profiler.session' not in request.environ:
+                prediction = predict_batcher.score((detector, customer_record), timeout=30)
+            else:
+                prediction = score_customer_records(detector, [customer_record])[0]
+            prediction_cache.put(record, prediction, model_version)
+        
+        churn_prob, risk_level, customer_is_anomaly, anomaly_score, anomaly_type = prediction
         
         # Prepare response
         result = {
             "customerId": data.get('id', 'UNKNOWN'),
-            "churnProbability": round(churn_proba[0], 4),
-            "riskLevel": risk_levels[0],
-            "isAnomaly": bool(is_anomaly[0]),
-            "anomalyScore": round(anomaly_scores[0], 4),
-            "anomalyType": anomaly_types[0],
-            "recommendations": generate_recommendations(churn_proba[0], risk_levels[0], is_anomaly[0], anomaly_types[0])
+            "churnProbability": round(churn_prob, 4),
+            "riskLevel": risk_level,
+            "isAnomaly": bool(customer_is_anomaly),
+            "anomalyScore": round(anomaly_score, 4),
+            "anomalyType": anomaly_type,
+            "recommendations": generate_recommendations(churn_prob, risk_level, customer_is_anomaly, anomaly_type)
         }
         
         return jsonify(result)
@@ -150,9 +477,83 @@ def predict_customer():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get prediction cache hit-rate metrics"""
+    return jsonify(prediction_cache.stats())
+
+@app.route('/api/attributions/stats', methods=['GET'])
+def get_attribution_stats():
+    """Get attribution cache hit-rate metrics"""
+    return jsonify(attributions.stats())
+
+@app.route('/api/charts/stats', methods=['GET'])
+def get_chart_stats():
+    """Get report chart cache hit-rate and render pool metrics"""
+    return jsonify(chart_renderer.stats())
+
+@app.route('/api/drift', methods=['GET'])
+def get_drift():
+    """Get PSI, KS and mean-shift drift scores of recent predictions against the training data"""
+    return jsonify(drift_monitor.report(model_handle.current()))
+
+@app.route('/api/batching/stats', methods=['GET'])
+def get_batching_stats():
+    """Get micro-batching dispatcher metrics"""
+    return jsonify(predict_batcher.stats())
+
+@app.route('/api/bulkheads/stats', methods=['GET'])
+def get_bulkhead_stats():
+    """Get per-pool concurrency, queue depth and rejection metrics"""
+    return jsonify({name: bulkhead.stats() for name, bulkhead in bulkheads.items()})
+
+@app.route('/admin/models', methods=['GET'])
+@require_admin
+def list_model_versions():
+    """List registered model versions and what this worker is serving"""
+    return jsonify({
+        "active": model_registry.active_version(),
+        "worker": model_handle.status(),
+        "versions": model_registry.list_versions()
+    })
+
+def activate_version(version):
+    """Start loading a newly activated version in this worker; others follow on their next poll"""
+    if model_handle.current().model_version != version:
+        model_handle.load_in_background(version)
+    response = jsonify({"active": version, "worker": model_handle.status()})
+    response.status_code = 202
+    return response
+
+@app.route('/admin/models/<version>/promote', methods=['POST'])
+@require_admin
+def promote_model_version(version):
+    """Make a registered version the active one"""
+    try:
+        model_registry.promote(version)
+    except KeyError:
+        return jsonify({"error": f"Model version {version} not found"}), 404
+    return activate_version(version)
+
+@app.route('/admin/models/rollback', methods=['POST'])
+@require_admin
+def rollback_model_version():
+    """Re-activate the previously promoted version"""
+    try:
+        version = model_registry.rollback()
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 409
+    return activate_version(version)
+
 @app.route('/api/analytics', methods=['GET'])
+@run_in_bulkhead('analytics')
 def get_analytics():
     """Get analytics data for dashboard"""
+    detector = model_handle.current()
+    shape = requested_shape()
+    if shape not in SHAPES:
+        return jsonify({"error": f"Unknown format '{shape}', expected one of: {', '.join(SHAPES)}"}), 400
+    
     try:
         # Generate larger sample for analytics
         sample_data = detector.generate_synthetic_data(n_samples=1000)
@@ -161,32 +562,40 @@ def get_analytics():
         churn_proba, risk_levels = detector.predict_churn_risk(sample_data)
         is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(sample_data)
         
+        top_features = frame_columns(detector.get_feature_importance().head(10))
+        monthly_trends = frame_columns(pd.DataFrame(generate_monthly_trends()))
+        
         # Calculate analytics
-        analytics = {
-            "churnDistribution": {
-                "high": int(np.sum(np.array(risk_levels) == 'High')),
-                "medium": int(np.sum(np.array(risk_levels) == 'Medium')),
-                "low": int(np.sum(np.array(risk_levels) == 'Low'))
-            },
-            "anomalyDistribution": {
-                "normal": int(np.sum(~is_anomaly)),
-                "sudden_usage_drop": int(np.sum([t == 'Sudden Usage Drop' for t in anomaly_types])),
-                "billing_anomaly": int(np.sum([t == 'Billing Anomaly' for t in anomaly_types])),
-                "usage_spike": int(np.sum([t == 'Usage Spike' for t in anomaly_types])),
-                "service_abuse": int(np.sum([t == 'Service Abuse' for t in anomaly_types])),
-                "other": int(np.sum([t == 'Other Anomaly' for t in anomaly_types]))
-            },
-            "monthlyTrends": generate_monthly_trends(),
-            "topFeatures": detector.get_feature_importance().head(10).to_dict('records'),
-            "riskMetrics": {
-                "totalCustomers": len(sample_data),
-                "averageChurnProb": round(np.mean(churn_proba), 4),
-                "anomalyRate": round(np.sum(is_anomaly) / len(is_anomaly), 4),
-                "highRiskRevenue": round(sample_data[np.array(risk_levels) == 'High']['monthly_charges'].sum(), 2)
+        with metrics.stage('build_response'):
+            risk = np.asarray(risk_levels)
+            anomaly_counts = pd.Series(anomaly_types).value_counts()
+            analytics = {
+                "churnDistribution": {
+                    "high": int(np.sum(risk == 'High')),
+                    "medium": int(np.sum(risk == 'Medium')),
+                    "low": int(np.sum(risk == 'Low'))
+                },
+                "anomalyDistribution": {
+                    "normal": int(np.sum(~is_anomaly)),
+                    "sudden_usage_drop": int(anomaly_counts.get('Sudden Usage Drop', 0)),
+                    "billing_anomaly": int(anomaly_counts.get('Billing Anomaly', 0)),
+                    "usage_spike": int(anomaly_counts.get('Usage Spike', 0)),
+                    "service_abuse": int(anomaly_counts.get('Service Abuse', 0)),
+                    "other": int(anomaly_counts.get('Other Anomaly', 0))
+                },
+                "monthlyTrends": shape_columns(monthly_trends, shape),
+                "topFeatures": shape_columns(top_features, shape),
+                "riskMetrics": {
+                    "totalCustomers": len(sample_data),
+                    "averageChurnProb": round(float(np.mean(churn_proba)), 4),
+                    "anomalyRate": round(float(np.sum(is_anomaly) / len(is_anomaly)), 4),
+                    "highRiskRevenue": round(float(sample_data['monthly_charges'].to_numpy()[risk == 'High'].sum()), 2)
+                }
             }
-        }
+            
+            response = json_response(analytics)
         
-        return jsonify(analytics)
+        return response
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -194,22 +603,23 @@ def get_analytics():
 @app.route('/api/alerts', methods=['GET'])
 def get_alerts():
     """Get current alerts and notifications"""
+    detector = model_handle.current()
     try:
-        # Generate sample data for alerts
-        sample_data = detector.generate_synthetic_data(n_samples=20)
-        churn_proba, risk_levels = detector.predict_churn_risk(sample_data)
-        is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(sample_data)
+        # Alerts come from stored customers, so investigating an alert's customerId
+        # looks up the same customer
+        rows = np.arange(min(ALERT_SAMPLE_SIZE, len(feature_store)))
+        fields, churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types = feature_store.score(detector, rows)
         
         alerts = []
         
-        for i, row in sample_data.iterrows():
+        for i, customer_id in enumerate(fields['customer_id']):
             if churn_proba[i] > 0.8:
                 alerts.append({
                     "id": f"alert_{len(alerts)+1}",
                     "type": "high_churn_risk",
                     "severity": "critical",
-                    "customerId": row['customer_id'],
-                    "message": f"Customer {row['customer_id']} has {churn_proba[i]:.1%} churn probability",
+                    "customerId": customer_id,
+                    "message": f"Customer {customer_id} has {churn_proba[i]:.1%} churn probability",
                     "timestamp": datetime.now().isoformat(),
                     "actionRequired": True
                 })
@@ -220,8 +630,8 @@ def get_alerts():
                     "id": f"alert_{len(alerts)+1}",
                     "type": "anomaly_detected",
                     "severity": severity,
-                    "customerId": row['customer_id'],
-                    "message": f"Anomaly detected: {anomaly_types[i]} for customer {row['customer_id']}",
+                    "customerId": customer_id,
+                    "message": f"Anomaly detected: {anomaly_types[i]} for customer {customer_id}",
                     "timestamp": datetime.now().isoformat(),
                     "actionRequired": anomaly_types[i] in ['Billing Anomaly', 'Service Abuse']
                 })
@@ -297,8 +707,10 @@ def generate_monthly_trends():
     return trends
 
 @app.route('/api/export/customers', methods=['GET'])
+@run_in_bulkhead('exports')
 def export_customers():
-    """Export customer data to CSV"""
+    """Export customer data as CSV, JSON, MessagePack or Arrow"""
+    detector = model_handle.current()
     try:
         # Generate sample data
         sample_data = detector.generate_synthetic_data(n_samples=1000)
@@ -307,72 +719,83 @@ def export_customers():
         churn_proba, risk_levels = detector.predict_churn_risk(sample_data)
         is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(sample_data)
         
-        # Prepare export data
-        export_data = []
-        for i, row in sample_data.iterrows():
-            export_data.append({
-                "Customer_ID": row['customer_id'],
-                "Tenure_Months": round(row['tenure'], 1),
-                "Age": int(row['age']),
-                "Monthly_Charges": round(row['monthly_charges'], 2),
-                "Total_Charges": round(row['total_charges'], 2),
-                "Data_Usage_GB": round(row['data_usage_gb'], 2),
-                "Call_Minutes": round(row['call_minutes'], 0),
-                "SMS_Count": int(row['sms_count']),
-                "Complaints": int(row['complaints']),
-                "Service_Calls": int(row['service_calls']),
-                "Downtime_Hours": round(row['downtime_hours'], 2),
-                "Contract_Type": row['contract_type'],
-                "Payment_Method": row['payment_method'],
-                "Internet_Service": row['internet_service'],
-                "Churn_Probability": round(churn_proba[i], 4),
-                "Risk_Level": risk_levels[i],
-                "Is_Anomaly": bool(is_anomaly[i]),
-                "Anomaly_Score": round(anomaly_scores[i], 4),
-                "Anomaly_Type": anomaly_types[i],
-                "Actual_Churn": bool(row['churn']),
-                "Export_Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=export_data[0].keys())
-        writer.writeheader()
-        writer.writerows(export_data)
-        
-        # Convert to bytes
-        csv_data = output.getvalue()
-        output.close()
-        
-        # Create file-like object
-        csv_buffer = io.BytesIO()
-        csv_buffer.write(csv_data.encode('utf-8'))
-        csv_buffer.seek(0)
-        
-        filename = f"customer_data_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        # Prepare export data; CSV unless the client asks for another format
+        exported_at = datetime.now()
+        columns = export_columns(
+            customer_columns(sample_data, churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types),
+            exported_at
+        )
         
-        return send_file(
-            csv_buffer,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=filename
+        # Optionally name the three features pushing each customer's churn risk up the most
+        if request.args.get('explain', '').lower() in ('1', 'true', 'yes'):
+            X_scaled, _ = detector.preprocess_data(sample_data, fit=False)
+            contributions = attributions.explain(detector, X_scaled, columns['Customer_ID'])
+            top = top_contributions(contributions, detector.feature_names, k=3)
+            names = np.array(detector.feature_names, dtype=object)
+            for rank in range(top.shape[1]):
+                columns[f'Top_Risk_Factor_{rank + 1}'] = names[top[:, rank]].tolist()
+                columns[f'Top_Risk_Factor_{rank + 1}_Contribution'] = np.round(
+                    np.take_along_axis(contributions, top[:, rank:rank + 1], axis=1)[:, 0], 4
+                ).tolist()
+        
+        return negotiated_response(
+            {"customers": shape_columns(columns, requested_shape())},
+            columns,
+            default=CSV,
+            filename=f"customer_data_export_{exported_at.strftime('%Y%m%d_%H%M%S')}"
         )
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def detail_report(detector, options):
+    """Stream a PDF listing every stored customer at the requested risk levels, riskiest first"""
+    risk_levels = options.get('riskLevels', ['High'])
+    if (not isinstance(risk_levels, list) or not risk_levels
+            or any(level not in ('High', 'Medium', 'Low') for level in risk_levels)):
+        return jsonify({"error": "riskLevels must be a non-empty list of High, Medium and Low"}), 400
+    max_rows = options.get('maxRows')
+    if max_rows is not None and (not isinstance(max_rows, int) or isinstance(max_rows, bool) or max_rows < 1):
+        return jsonify({"error": "maxRows must be a positive integer"}), 400
+    
+    # Written page by page to a temporary file, which is streamed and then deleted
+    output, stats = detail_report_file(customer_indexes.get(detector), risk_levels, max_rows)
+    response = send_file(
+        output,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"detail_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    )
+    response.headers['X-Report-Customers'] = str(stats['customers'])
+    response.headers['X-Report-Pages'] = str(stats['pages'])
+    return response
+
 @app.route('/api/reports/generate', methods=['POST'])
+@run_in_bulkhead('reports')
 def generate_report():
     """Generate analytics report"""
+    detector = model_handle.current()
     try:
         data = request.get_json() or {}
         report_type = data.get('type', 'comprehensive')
+        if report_type == 'detail':
+            return detail_report(detector, data)
         
         # Generate sample data for report
         sample_data = detector.generate_synthetic_data(n_samples=1000)
         churn_proba, risk_levels = detector.predict_churn_risk(sample_data)
         is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(sample_data)
         
+        # Charts come from the cache when the aggregates match an earlier report
+        charts = chart_renderer.render(
+            report_type, chart_aggregates(churn_proba, risk_levels, anomaly_types, sample_data['tenure'])
+        )
+        
+        def add_chart(name):
+            if name in charts:
+                story.append(Spacer(1, 10))
+                story.append(Image(io.BytesIO(charts[name]), width=6*inch, height=3*inch))
+        
         # Create PDF report
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4)
@@ -454,6 +877,7 @@ def generate_report():
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
         ]))
         story.append(risk_table)
+        add_chart('risk_distribution')
         story.append(Spacer(1, 20))
         
         # Anomaly Analysis
@@ -479,8 +903,15 @@ def generate_report():
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
         ]))
         story.append(anomaly_table)
+        add_chart('anomaly_mix')
         story.append(Spacer(1, 20))
         
+        # Churn by tenure
+        if 'churn_vs_tenure' in charts:
+            story.append(Paragraph("Churn Risk by Tenure", styles['Heading2']))
+            add_chart('churn_vs_tenure')
+            story.append(Spacer(1, 20))
+        
         # Recommendations
         story.append(Paragraph("Recommendations", styles['Heading2']))
         
@@ -575,6 +1006,7 @@ def get_scheduled_reports():
 @app.route('/api/notifications', methods=['GET'])
 def get_notifications():
     """Get notifications for the user"""
+    detector = model_handle.current()
     try:
         # Generate sample notifications
         notifications = []
@@ -673,15 +1105,34 @@ def mark_all_notifications_read():
 @app.route('/api/alerts/<alert_id>/investigate', methods=['GET'])
 def investigate_alert(alert_id):
     """Get detailed investigation data for a specific alert"""
+    detector = model_handle.current()
     try:
         # Generate sample data for investigation
         sample_data = detector.generate_synthetic_data(n_samples=100)
         churn_proba, risk_levels = detector.predict_churn_risk(sample_data)
         is_anomaly, anomaly_scores, anomaly_types = detector.detect_anomalies(sample_data)
         
-        # Find the customer related to this alert (simulate)
-        customer_idx = np.random.randint(0, len(sample_data))
-        customer = sample_data.iloc[customer_idx]
+        customer_id = request.args.get('customerId')
+        if customer_id is not None:
+            # Fetch the alert's customer straight from the feature store
+            row = feature_store.lookup(customer_id)
+            if row is None:
+                return jsonify({"error": f"Customer {customer_id} not found"}), 404
+            _, churn, risk, anomalous, scores, types = feature_store.score(detector, [row])
+            customer = feature_store.record(row)
+            X_customer = feature_store.scaled_features([row], detector.scaler)
+            churn_prob, risk_level, customer_anomaly, anomaly_score, anomaly_type = (
+                churn[0], risk[0], anomalous[0], scores[0], types[0]
+            )
+        else:
+            # Find the customer related to this alert (simulate)
+            customer_idx = np.random.randint(0, len(sample_data))
+            customer = sample_data.iloc[customer_idx]
+            X_customer, _ = detector.preprocess_data(sample_data.iloc[[customer_idx]], fit=False)
+            churn_prob, risk_level, customer_anomaly, anomaly_score, anomaly_type = (
+                churn_proba[customer_idx], risk_levels[customer_idx], is_anomaly[customer_idx],
+                anomaly_scores[customer_idx], anomaly_types[customer_idx]
+            )
         
         # Generate investigation details
         investigation = {
@@ -703,15 +1154,20 @@ def investigate_alert(alert_id):
                 "contractType": customer['contract_type'],
                 "paymentMethod": customer['payment_method'],
                 "internetService": customer['internet_service'],
-                "churnProbability": round(churn_proba[customer_idx], 4),
-                "riskLevel": risk_levels[customer_idx],
-                "isAnomaly": bool(is_anomaly[customer_idx]),
-                "anomalyScore": round(anomaly_scores[customer_idx], 4),
-                "anomalyType": anomaly_types[customer_idx]
+                "churnProbability": round(float(churn_prob), 4),
+                "riskLevel": risk_level,
+                "isAnomaly": bool(customer_anomaly),
+                "anomalyScore": round(float(anomaly_score), 4),
+                "anomalyType": anomaly_type
             },
             "historicalData": generate_customer_history(customer['customer_id']),
-            "riskFactors": analyze_risk_factors(customer, churn_proba[customer_idx]),
-            "recommendations": generate_detailed_recommendations(customer, churn_proba[customer_idx], is_anomaly[customer_idx], anomaly_types[customer_idx]),
+            "riskFactors": analyze_risk_factors(customer, churn_prob),
+            "modelExplanation": explanation(
+                attributions.explain(detector, X_customer, [customer['customer_id']])[0],
+                detector.feature_names,
+                attributions.base_value(detector)
+            ),
+            "recommendations": generate_detailed_recommendations(customer, churn_prob, customer_anomaly, anomaly_type),
             "similarCases": find_similar_cases(customer, sample_data, churn_proba, risk_levels),
             "timeline": generate_alert_timeline(alert_id, customer['customer_id'])
         }
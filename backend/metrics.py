@@ -0,0 +1,181 @@
+"""
+Lightweight latency histograms and counters exposed in Prometheus text format
+
+Instrumentation is switched on with METRICS_ENABLED=1. When it is off, stage
+timers are a shared no-op context manager, so instrumented code pays only a
+flag check.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+_current_endpoint = contextvars.ContextVar('metrics_endpoint', default='none')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Per-process store of histograms, counters and scrape-time collectors"""
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._collectors = []
+
+    def observe(self, name, labels, seconds, help_text=''):
+        """Record one observation in the histogram identified by name and labels"""
+        key = (name, tuple(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+                self._help.setdefault(name, help_text)
+            histogram.observe(seconds)
+
+    def inc(self, name, labels, amount=1, help_text=''):
+        """Increment the counter identified by name and labels"""
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._help.setdefault(name, help_text)
+
+    def register_collector(self, collector):
+        """Add a callable returning (name, type, help, [(labels, value), ...]) tuples at scrape time"""
+        self._collectors.append(collector)
+
+    def stage(self, name):
+        """Context manager timing one pipeline stage under the current endpoint"""
+        if not self.enabled:
+            return _NOOP
+        return self._time_stage(name)
+
+    @contextmanager
+    def _time_stage(self, name):
+        labels = (('endpoint', _current_endpoint.get()), ('stage', name))
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc('churn_stage_errors_total', labels, help_text='Pipeline stages that raised')
+            raise
+        finally:
+            self.observe('churn_stage_duration_seconds', labels, time.perf_counter() - start,
+                         help_text='Latency of pipeline stages by endpoint')
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            help_texts = dict(self._help)
+
+        current = None
+        for (name, labels), histogram in histograms:
+            if name != current:
+                lines.append(f'# HELP {name} {help_texts.get(name, "")}')
+                lines.append(f'# TYPE {name} histogram')
+                current = name
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + [float('inf')], histogram.counts):
+                cumulative += count
+                bucket_labels = labels + (('le', _format_value(float(bound))),)
+                lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+
+        current = None
+        for (name, labels), value in counters:
+            if name != current:
+                lines.append(f'# HELP {name} {help_texts.get(name, "")}')
+                lines.append(f'# TYPE {name} counter')
+                current = name
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for collector in self._collectors:
+            for name, metric_type, help_text, samples in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(
+    enabled=os.environ.get('METRICS_ENABLED', '0').lower() in ('1', 'true', 'yes')
+)
+
+
+def stage(name):
+    """Time a block of code as a pipeline stage"""
+    return registry.stage(name)
+
+
+def timed(name):
+    """Decorator timing every call of a function as a pipeline stage"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            with registry.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def endpoint_scope(endpoint):
+    """Attribute stages timed inside the block to the given endpoint"""
+    token = _current_endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        _current_endpoint.reset(token)
+
+
+def set_endpoint(endpoint):
+    """Attribute stages timed from now on in the current thread to an endpoint"""
+    _current_endpoint.set(endpoint)
@@ -6,9 +6,78 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 from sklearn.model_selection import GridSearchCV
 import joblib
+import copy
+import uuid
 import warnings
+from metrics import stage, timed
+from streaming_stats import FeatureSummary
 warnings.filterwarnings('ignore')
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+CATEGORICAL_COLUMNS = ['contract_type', 'payment_method', 'internet_service']
+
+FEATURE_COLUMNS = [
+    'tenure', 'age', 'monthly_charges', 'total_charges', 'data_usage_gb',
+    'call_minutes', 'sms_count', 'complaints', 'service_calls', 
+    'downtime_hours', 'contract_type', 'payment_method', 'internet_service',
+    'charges_per_gb', 'complaints_per_tenure', 'usage_efficiency', 'service_issues_ratio'
+]
+
+# Use a simpler RandomForestClassifier to avoid version compatibility issues
+CHURN_FOREST_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 15,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+    'random_state': 42
+}
+
+CONTRACT_TYPES = ['Month-to-month', 'One year', 'Two year']
+PAYMENT_METHODS = ['Electronic check', 'Mailed check', 'Bank transfer', 'Credit card']
+INTERNET_SERVICES = ['DSL', 'Fiber optic', 'No']
+
+def to_lean_dtypes(data):
+    """Customer frame with float32 numbers, the smallest integer types that fit and categorical strings
+    
+    Integer columns are downcast without loss; floats keep about seven
+    significant digits. Object customer ids become Arrow strings when pyarrow
+    is installed. Columns are only copied where the dtype changes.
+    """
+    return pd.DataFrame({col: lean_column(col, data[col]) for col in data.columns}, index=data.index)
+
+def lean_column(name, values):
+    """One customer column, as a Series, in the dtype ``to_lean_dtypes`` gives it"""
+    values = pd.Series(values)
+    if name in CATEGORICAL_COLUMNS:
+        return values.astype('category')
+    if name == 'customer_id' and values.dtype == object and pa is not None:
+        return values.astype('string[pyarrow]')
+    if pd.api.types.is_float_dtype(values):
+        return values.astype(np.float32, copy=False)
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast='integer')
+    return values
+
+def compact_customer_ids(n_samples):
+    """CUST_000000-style ids built as one Arrow string array instead of a Python string per row"""
+    if pa is None:
+        return [f"CUST_{i:06d}" for i in range(n_samples)]
+    digits = pc.utf8_lpad(pa.array(np.arange(n_samples)).cast(pa.string()), 6, '0')
+    return pd.arrays.ArrowStringArray(pc.binary_join_element_wise('CUST_', digits, ''))
+
+# Incremental updates hold out 20% of the new customers to compare ROC-AUC before and
+# after, once the batch has this many customers of each class
+MIN_HOLDOUT_CLASS_ROWS = 10
+
+# Churn probabilities above these are reported as High and Medium risk
+HIGH_RISK_THRESHOLD = 0.7
+MEDIUM_RISK_THRESHOLD = 0.4
+
 class TelecomChurnAnomalyDetector:
     def __init__(self):
         self.churn_model = None
@@ -16,13 +85,23 @@ class TelecomChurnAnomalyDetector:
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.feature_names = []
+        self.model_version = None
+        
+    def _mark_models_changed(self):
+        """Assign a fresh version id whenever the fitted models are replaced"""
+        self.model_version = uuid.uuid4().hex[:12]
+        
+    @timed('generate_synthetic_data')
+    def generate_synthetic_data(self, n_samples=5000, lean=False):
+        """Generate realistic telecom customer data with churn and anomaly patterns
         
-    def generate_synthetic_data(self, n_samples=5000):
-        """Generate realistic telecom customer data with churn and anomaly patterns"""
+        With ``lean=True`` the same customers are returned with the compact
+        dtypes of ``to_lean_dtypes``, without building a Python string per row.
+        """
         np.random.seed(42)
         
         # Customer demographics
-        customer_ids = [f"CUST_{i:06d}" for i in range(n_samples)]
+        customer_ids = compact_customer_ids(n_samples) if lean else [f"CUST_{i:06d}" for i in range(n_samples)]
         tenure = np.random.exponential(24, n_samples)  # Average 24 months tenure
         age = np.random.normal(45, 15, n_samples).astype(int)
         age = np.clip(age, 18, 80)
@@ -41,108 +120,144 @@ class TelecomChurnAnomalyDetector:
         service_calls = np.random.poisson(1, n_samples)
         downtime_hours = np.random.gamma(1, 2, n_samples)
         
-        # Contract and service details
-        contract_type = np.random.choice(['Month-to-month', 'One year', 'Two year'], 
-                                       n_samples, p=[0.5, 0.3, 0.2])
-        payment_method = np.random.choice(['Electronic check', 'Mailed check', 'Bank transfer', 'Credit card'], 
-                                        n_samples, p=[0.4, 0.2, 0.2, 0.2])
+        # Contract and service details, drawn as codes (the same draws as choosing the labels)
+        contract_type = np.random.choice(len(CONTRACT_TYPES), n_samples, p=[0.5, 0.3, 0.2])
+        payment_method = np.random.choice(len(PAYMENT_METHODS), n_samples, p=[0.4, 0.2, 0.2, 0.2])
         
         # Internet service
-        internet_service = np.random.choice(['DSL', 'Fiber optic', 'No'], 
-                                          n_samples, p=[0.4, 0.5, 0.1])
-        
-        # Create DataFrame
-        data = pd.DataFrame({
-            'customer_id': customer_ids,
-            'tenure': tenure,
-            'age': age,
-            'monthly_charges': monthly_charges,
-            'total_charges': total_charges,
-            'data_usage_gb': data_usage_gb,
-            'call_minutes': call_minutes,
-            'sms_count': sms_count,
-            'complaints': complaints,
-            'service_calls': service_calls,
-            'downtime_hours': downtime_hours,
-            'contract_type': contract_type,
-            'payment_method': payment_method,
-            'internet_service': internet_service
-        })
+        internet_service = np.random.choice(len(INTERNET_SERVICES), n_samples, p=[0.4, 0.5, 0.1])
         
         # Generate churn based on realistic patterns
         churn_prob = (
             0.1 +  # Base churn rate
-            0.3 * (data['tenure'] < 6) +  # New customers more likely to churn
-            0.2 * (data['monthly_charges'] > 80) +  # High charges increase churn
-            0.15 * (data['complaints'] > 2) +  # Complaints increase churn
-            0.1 * (data['contract_type'] == 'Month-to-month') +  # Month-to-month more likely
-            0.05 * (data['service_calls'] > 3)  # Service issues
+            0.3 * (tenure < 6) +  # New customers more likely to churn
+            0.2 * (monthly_charges > 80) +  # High charges increase churn
+            0.15 * (complaints > 2) +  # Complaints increase churn
+            0.1 * (contract_type == CONTRACT_TYPES.index('Month-to-month')) +  # Month-to-month more likely
+            0.05 * (service_calls > 3)  # Service issues
         )
         churn_prob = np.clip(churn_prob, 0, 0.8)
-        data['churn'] = np.random.binomial(1, churn_prob)
+        churn = np.random.binomial(1, churn_prob)
         
-        # Generate anomalies (suspicious patterns)
+        # Generate anomalies (suspicious patterns); the patterns edit the
+        # arrays in place so no frame-sized copies are made before the end
         anomaly_patterns = np.zeros(n_samples)
         
         # Pattern 1: Sudden usage drop (potential account sharing or fraud)
         sudden_drop_mask = np.random.choice([True, False], n_samples, p=[0.05, 0.95])
-        data.loc[sudden_drop_mask, 'data_usage_gb'] *= 0.1
-        data.loc[sudden_drop_mask, 'call_minutes'] *= 0.2
+        data_usage_gb[sudden_drop_mask] *= 0.1
+        call_minutes[sudden_drop_mask] *= 0.2
         anomaly_patterns[sudden_drop_mask] = 1
         
         # Pattern 2: Billing anomalies (charges don't match usage)
         billing_anomaly_mask = np.random.choice([True, False], n_samples, p=[0.03, 0.97])
-        data.loc[billing_anomaly_mask, 'monthly_charges'] *= 2.5  # Unusually high charges
+        monthly_charges[billing_anomaly_mask] *= 2.5  # Unusually high charges
         anomaly_patterns[billing_anomaly_mask] = 1
         
         # Pattern 3: Unusual usage spikes (potential fraud)
         usage_spike_mask = np.random.choice([True, False], n_samples, p=[0.04, 0.96])
-        data.loc[usage_spike_mask, 'data_usage_gb'] *= 10
-        data.loc[usage_spike_mask, 'call_minutes'] *= 5
+        data_usage_gb[usage_spike_mask] *= 10
+        call_minutes[usage_spike_mask] *= 5
         anomaly_patterns[usage_spike_mask] = 1
         
         # Pattern 4: Service abuse (excessive complaints/calls)
         abuse_mask = np.random.choice([True, False], n_samples, p=[0.02, 0.98])
-        data.loc[abuse_mask, 'complaints'] += np.random.poisson(10, abuse_mask.sum())
-        data.loc[abuse_mask, 'service_calls'] += np.random.poisson(15, abuse_mask.sum())
+        complaints[abuse_mask] += np.random.poisson(10, abuse_mask.sum())
+        service_calls[abuse_mask] += np.random.poisson(15, abuse_mask.sum())
         anomaly_patterns[abuse_mask] = 1
         
-        data['is_anomaly'] = anomaly_patterns
+        categories = ((contract_type, CONTRACT_TYPES), (payment_method, PAYMENT_METHODS),
+                      (internet_service, INTERNET_SERVICES))
+        if lean:
+            contract_type, payment_method, internet_service = (
+                pd.Categorical.from_codes(codes, labels) for codes, labels in categories)
+        else:
+            contract_type, payment_method, internet_service = (
+                np.array(labels)[codes] for codes, labels in categories)
         
+        # Create DataFrame
+        columns = {
+            'customer_id': customer_ids,
+            'tenure': tenure,
+            'age': age,
+            'monthly_charges': monthly_charges,
+            'total_charges': total_charges,
+            'data_usage_gb': data_usage_gb,
+            'call_minutes': call_minutes,
+            'sms_count': sms_count,
+            'complaints': complaints,
+            'service_calls': service_calls,
+            'downtime_hours': downtime_hours,
+            'contract_type': contract_type,
+            'payment_method': payment_method,
+            'internet_service': internet_service,
+            'churn': churn,
+            'is_anomaly': anomaly_patterns
+        }
+        if lean:
+            # Converted column by column, so no float64 frame is built
+            columns = {col: lean_column(col, values) for col, values in columns.items()}
+        data = pd.DataFrame(columns)
         return data
     
-    def preprocess_data(self, data, fit=True):
-        """Preprocess data for training"""
-        df = data.copy()
+    def build_features(self, data, fit=False):
+        """Encode categorical variables and add engineered features, unscaled"""
+        # Columns are replaced, never modified in place, so the input's arrays can be shared
+        df = data.copy(deep=False)
         
         # Handle categorical variables
-        categorical_cols = ['contract_type', 'payment_method', 'internet_service']
-        
-        for col in categorical_cols:
-            if fit:
+        for col in CATEGORICAL_COLUMNS:
+            if isinstance(df[col].dtype, pd.CategoricalDtype) and not df[col].hasnans:
+                # Encode each category once instead of every row
+                values = df[col].cat.remove_unused_categories()
+                if fit:
+                    self.label_encoders[col] = LabelEncoder().fit(values.cat.categories)
+                codes = self.label_encoders[col].transform(values.cat.categories)
+                df[col] = codes[values.cat.codes.to_numpy()]
+            elif fit:
                 self.label_encoders[col] = LabelEncoder()
                 df[col] = self.label_encoders[col].fit_transform(df[col])
             else:
                 df[col] = self.label_encoders[col].transform(df[col])
         
-        # Feature engineering
-        df['charges_per_gb'] = df['monthly_charges'] / (df['data_usage_gb'] + 1)
-        df['complaints_per_tenure'] = df['complaints'] / (df['tenure'] + 1)
-        df['usage_efficiency'] = (df['data_usage_gb'] + df['call_minutes']/60) / df['monthly_charges']
-        df['service_issues_ratio'] = df['service_calls'] / (df['tenure'] + 1)
+        # Feature engineering, in float64 even when the columns are stored as float32
+        tenure, monthly_charges, data_usage_gb, call_minutes = (
+            df[col].astype(np.float64, copy=False)
+            for col in ('tenure', 'monthly_charges', 'data_usage_gb', 'call_minutes'))
+        df['charges_per_gb'] = monthly_charges / (data_usage_gb + 1)
+        df['complaints_per_tenure'] = df['complaints'] / (tenure + 1)
+        df['usage_efficiency'] = (data_usage_gb + call_minutes/60) / monthly_charges
+        df['service_issues_ratio'] = df['service_calls'] / (tenure + 1)
         
-        # Select features for modeling
-        feature_cols = [
-            'tenure', 'age', 'monthly_charges', 'total_charges', 'data_usage_gb',
-            'call_minutes', 'sms_count', 'complaints', 'service_calls', 
-            'downtime_hours', 'contract_type', 'payment_method', 'internet_service',
-            'charges_per_gb', 'complaints_per_tenure', 'usage_efficiency', 'service_issues_ratio'
-        ]
+        return df
+    
+    @timed('preprocess_data')
+    def preprocess_data(self, data, fit=True, lean=False):
+        """Preprocess data for training
+        
+        With ``lean=True`` the scaled features are written column by column
+        into one float32 matrix, the precision the trees compare in, instead
+        of a float64 copy of the feature frame plus a scaled float64 matrix.
+        """
+        df = self.build_features(data, fit=fit)
+        
+        if lean:
+            if fit:
+                self.feature_names = list(FEATURE_COLUMNS)
+                self.scaler = StandardScaler()
+                for start in range(0, len(df), 100000):
+                    self.scaler.partial_fit(df.iloc[start:start + 100000][FEATURE_COLUMNS])
+            X = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float32)
+            for j, col in enumerate(FEATURE_COLUMNS):
+                # Scaled in float64 as StandardScaler does, then rounded once
+                X[:, j] = (df[col].to_numpy(dtype=np.float64) - self.scaler.mean_[j]) / self.scaler.scale_[j]
+            return X, df
         
-        X = df[feature_cols]
+        # Select features for modeling
+        X = df[FEATURE_COLUMNS]
         
         if fit:
-            self.feature_names = feature_cols
+            self.feature_names = list(FEATURE_COLUMNS)
             X_scaled = self.scaler.fit_transform(X)
         else:
             X_scaled = self.scaler.transform(X)
@@ -161,16 +276,10 @@ class TelecomChurnAnomalyDetector:
             X_scaled, y_churn, test_size=0.2, random_state=42, stratify=y_churn
         )
         
-        # Use a simpler RandomForestClassifier to avoid version compatibility issues
-        self.churn_model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=15,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42
-        )
+        self.churn_model = RandomForestClassifier(**CHURN_FOREST_PARAMS)
         
         self.churn_model.fit(X_train, y_train)
+        self._mark_models_changed()
         
         # Evaluate model
         y_pred = self.churn_model.predict(X_test)
@@ -181,46 +290,175 @@ class TelecomChurnAnomalyDetector:
         print("\nClassification Report:")
         print(classification_report(y_test, y_pred))
         
-    def train_anomaly_model(self, data):
-        """Train anomaly detection model using a simple statistical approach"""
+    def update_churn_model(self, new_data, n_new_trees=25, max_trees=200, max_generations=None):
+        """Incrementally update the churn model with newly labelled customers
+        
+        Keeps the fitted trees, grows ``n_new_trees`` more on ``new_data`` only
+        (warm start) and then drops the oldest trees beyond ``max_trees`` or
+        older than the last ``max_generations`` updates. The scaler statistics
+        are updated with ``partial_fit``; split thresholds of the kept trees and
+        the anomaly statistics are moved to the new scaling so their decisions
+        do not change, except for inputs within float32 rounding of a split.
+        The cost depends on the new data, not the history.
+        
+        ``new_data`` must hold churned and retained customers. Batches with
+        fewer than ``MIN_HOLDOUT_CLASS_ROWS`` of either are trained on in full,
+        without the hold-out ROC-AUC comparison.
+        """
+        if not hasattr(self.churn_model, 'estimators_'):
+            raise ValueError("Incremental updates need the full RandomForestClassifier, not a compacted model")
+        for name, value in (('n_new_trees', n_new_trees), ('max_trees', max_trees),
+                            ('max_generations', max_generations)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+        if len(new_data) == 0 or new_data['churn'].nunique() < 2:
+            raise ValueError("Incremental updates need both churned and retained customers in the new data")
+        print(f"Updating churn prediction model with {len(new_data)} new customers...")
+        
+        _, df = self.preprocess_data(new_data, fit=False)
+        X_new = df[self.feature_names]
+        y_new = df['churn']
+        
+        # Small batches are all used for training, without the before/after comparison
+        evaluate = y_new.value_counts().min() >= MIN_HOLDOUT_CLASS_ROWS
+        if evaluate:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X_new, y_new, test_size=0.2, random_state=42, stratify=y_new
+            )
+        else:
+            X_train, y_train = X_new, y_new
+        
+        # Work on copies so requests keep using the current models until the swap
+        scaler = copy.deepcopy(self.scaler)
+        churn_model = copy.deepcopy(self.churn_model)
+        anomaly_model = copy.deepcopy(self.anomaly_model)
+        
+        if evaluate:
+            auc_before = roc_auc_score(y_test, churn_model.predict_proba(self.scaler.transform(X_test))[:, 1])
+        
+        old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+        scaler.partial_fit(X_new)
+        self._rescale_trees(churn_model.estimators_, old_mean, old_scale, scaler)
+        if anomaly_model is not None:
+            self._rescale_feature_stats(anomaly_model, old_mean, old_scale, scaler)
+        
+        # Each update adds one generation of trees
+        generations = list(getattr(churn_model, 'tree_generations_', [0] * len(churn_model.estimators_)))
+        generation = max(generations, default=-1) + 1
+        
+        churn_model.warm_start = True
+        churn_model.n_estimators = len(churn_model.estimators_) + n_new_trees
+        churn_model.fit(scaler.transform(X_train), y_train)
+        generations += [generation] * n_new_trees
+        
+        # Retention policy: age out the oldest trees
+        keep = len(generations)
+        if max_generations is not None:
+            keep = sum(1 for g in generations if g > generation - max_generations)
+        if max_trees is not None:
+            keep = min(keep, max_trees)
+        # Slice from an explicit start: a [-keep:] slice would keep every tree for keep == 0
+        first = len(generations) - keep
+        churn_model.estimators_ = churn_model.estimators_[first:]
+        churn_model.n_estimators = keep
+        churn_model.tree_generations_ = generations[first:]
+        
+        if evaluate:
+            auc_after = roc_auc_score(y_test, churn_model.predict_proba(scaler.transform(X_test))[:, 1])
+        
+        self.scaler = scaler
+        self.churn_model = churn_model
+        self.anomaly_model = anomaly_model
+        self._mark_models_changed()
+        
+        print(f"Churn model now has {keep} trees from generations "
+              f"{churn_model.tree_generations_[0]}-{churn_model.tree_generations_[-1]}")
+        if evaluate:
+            print(f"ROC-AUC on new data: {auc_before:.4f} before, {auc_after:.4f} after update")
+        else:
+            print(f"Fewer than {MIN_HOLDOUT_CLASS_ROWS} customers of one class; trained on all of them "
+                  f"without a hold-out evaluation")
+    
+    @staticmethod
+    def _rescale_trees(trees, old_mean, old_scale, scaler):
+        """Move split thresholds of fitted trees from the old to the new feature scaling"""
+        for tree in trees:
+            nodes = tree.tree_
+            split = nodes.feature >= 0
+            features = nodes.feature[split]
+            raw = nodes.threshold[split] * old_scale[features] + old_mean[features]
+            nodes.threshold[split] = (raw - scaler.mean_[features]) / scaler.scale_[features]
+    
+    def _rescale_feature_stats(self, anomaly_model, old_mean, old_scale, scaler):
+        """Move the anomaly model statistics from the old to the new feature scaling"""
+        for i, feature_name in enumerate(self.feature_names):
+            stats = anomaly_model['feature_stats'][feature_name]
+            for key in ('mean', 'q1', 'q3'):
+                stats[key] = (stats[key] * old_scale[i] + old_mean[i] - scaler.mean_[i]) / scaler.scale_[i]
+            stats['std'] = stats['std'] * old_scale[i] / scaler.scale_[i]
+        if 'reference' in anomaly_model:
+            edges = anomaly_model['reference']['edges']
+            anomaly_model['reference']['edges'] = (edges * old_scale[:, None] + old_mean[:, None]
+                                                   - scaler.mean_[:, None]) / scaler.scale_[:, None]
+        
+    def train_anomaly_model(self, data, chunk_size=50000):
+        """Train anomaly detection model using a simple statistical approach
+        
+        The feature statistics come from mergeable streaming summaries built
+        chunk by chunk, so only ``chunk_size`` scaled rows are in memory at once.
+        """
         print("\nTraining anomaly detection model...")
         
-        X_scaled, df = self.preprocess_data(data, fit=False)
-        
-        # Use a simple statistical approach instead of IsolationForest
-        # Calculate percentiles for each feature
-        self.anomaly_model = {
-            'feature_stats': {},
-            'thresholds': {}
-        }
-        
-        # Calculate statistics for each feature
-        for i, feature_name in enumerate(self.feature_names):
-            feature_values = X_scaled[:, i]
-            self.anomaly_model['feature_stats'][feature_name] = {
-                'mean': np.mean(feature_values),
-                'std': np.std(feature_values),
-                'q1': np.percentile(feature_values, 25),
-                'q3': np.percentile(feature_values, 75)
-            }
+        chunks = [data.iloc[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+        self.fit_anomaly_model(self.summarize_anomaly_features(chunks))
         
         # Simple anomaly detection based on statistical outliers
-        anomaly_pred = self._detect_statistical_anomalies(X_scaled)
-        y_anomaly = df['is_anomaly']
+        anomaly_pred = np.concatenate([
+            self._detect_statistical_anomalies(self.preprocess_data(chunk, fit=False)[0]) for chunk in chunks
+        ])
+        y_anomaly = data['is_anomaly']
         
         print("Anomaly Detection Performance:")
         print(classification_report(y_anomaly, anomaly_pred))
+    
+    def summarize_anomaly_features(self, chunks, summary=None):
+        """Add chunks of customer data to a mergeable summary of the scaled features
+        
+        ``chunks`` is any iterable of DataFrames, e.g. ``pd.read_csv(..., chunksize=...)``.
+        Summaries built on separate shards can be combined with ``FeatureSummary.merge``.
+        """
+        if summary is None:
+            summary = FeatureSummary(len(self.feature_names))
+        for chunk in chunks:
+            X_scaled, _ = self.preprocess_data(chunk, fit=False)
+            summary.update(X_scaled)
+        return summary
+    
+    def fit_anomaly_model(self, summary):
+        """Set the anomaly model's per-feature statistics from a feature summary"""
+        self.anomaly_model = {
+            'feature_stats': summary.feature_stats(self.feature_names),
+            'thresholds': {},
+            # Training-time distribution the drift monitor compares live traffic against
+            'reference': summary.reference_histogram()
+        }
+        self._mark_models_changed()
         
     def predict_churn_risk(self, customer_data):
         """Predict churn probability for customers"""
         X_scaled, _ = self.preprocess_data(customer_data, fit=False)
-        
-        churn_proba = self.churn_model.predict_proba(X_scaled)[:, 1]
-        risk_level = np.where(churn_proba > 0.7, 'High', 
-                             np.where(churn_proba > 0.4, 'Medium', 'Low'))
+        return self.churn_risk_from_features(X_scaled)
+    
+    def churn_risk_from_features(self, X_scaled):
+        """Churn probability and risk level for already scaled feature rows"""
+        with stage('predict_proba'):
+            churn_proba = self.churn_model.predict_proba(X_scaled)[:, 1]
+        risk_level = np.where(churn_proba > HIGH_RISK_THRESHOLD, 'High', 
+                             np.where(churn_proba > MEDIUM_RISK_THRESHOLD, 'Medium', 'Low'))
         
         return churn_proba, risk_level
     
+    @timed('anomaly_detection')
     def _detect_statistical_anomalies(self, X_scaled):
         """Simple statistical anomaly detection"""
         anomalies = np.zeros(X_scaled.shape[0], dtype=bool)
@@ -249,41 +487,57 @@ class TelecomChurnAnomalyDetector:
     def detect_anomalies(self, customer_data):
         """Detect anomalous usage patterns"""
         X_scaled, _ = self.preprocess_data(customer_data, fit=False)
+        return self.anomalies_from_features(X_scaled, customer_data)
+    
+    def anomalies_from_features(self, X_scaled, fields):
+        """Anomaly flags, scores and types for already scaled feature rows
         
+        ``fields`` maps the raw usage columns to arrays aligned with the rows,
+        e.g. the customer DataFrame itself or a feature store row.
+        """
         is_anomaly = self._detect_statistical_anomalies(X_scaled)
         is_anomaly = is_anomaly.astype(bool)
         
         # Simple anomaly scores (distance from mean)
-        anomaly_scores = []
-        for i in range(X_scaled.shape[0]):
-            score = 0
-            for j, feature_name in enumerate(self.feature_names):
-                stats = self.anomaly_model['feature_stats'][feature_name]
-                value = X_scaled[i, j]
-                score += abs(value - stats['mean']) / (stats['std'] + 1e-6)
-            anomaly_scores.append(-score / len(self.feature_names))  # Negative for consistency
-        
-        anomaly_scores = np.array(anomaly_scores)
-        
-        # Classify anomaly types based on feature patterns
-        anomaly_types = []
-        for i, row in customer_data.iterrows():
-            if is_anomaly[i]:
-                if row['data_usage_gb'] < 5 and row['call_minutes'] < 100:
-                    anomaly_types.append('Sudden Usage Drop')
-                elif row['monthly_charges'] > row['data_usage_gb'] * 10:
-                    anomaly_types.append('Billing Anomaly')
-                elif row['data_usage_gb'] > 100 or row['call_minutes'] > 2000:
-                    anomaly_types.append('Usage Spike')
-                elif row['complaints'] > 5 or row['service_calls'] > 8:
-                    anomaly_types.append('Service Abuse')
-                else:
-                    anomaly_types.append('Other Anomaly')
-            else:
-                anomaly_types.append('Normal')
+        with stage('anomaly_scoring'):
+            anomaly_scores = []
+            for i in range(X_scaled.shape[0]):
+                score = 0
+                for j, feature_name in enumerate(self.feature_names):
+                    stats = self.anomaly_model['feature_stats'][feature_name]
+                    value = X_scaled[i, j]
+                    score += abs(value - stats['mean']) / (stats['std'] + 1e-6)
+                anomaly_scores.append(-score / len(self.feature_names))  # Negative for consistency
+            
+            anomaly_scores = np.array(anomaly_scores)
+        
+        with stage('anomaly_typing'):
+            anomaly_types = self.classify_anomalies(fields, is_anomaly)
         
         return is_anomaly, anomaly_scores, anomaly_types
     
+    @staticmethod
+    def classify_anomalies(fields, is_anomaly):
+        """Classify anomaly types based on feature patterns; the first matching rule wins"""
+        data_usage = np.asarray(fields['data_usage_gb'], dtype=np.float64)
+        call_minutes = np.asarray(fields['call_minutes'], dtype=np.float64)
+        monthly_charges = np.asarray(fields['monthly_charges'], dtype=np.float64)
+        complaints = np.asarray(fields['complaints'])
+        service_calls = np.asarray(fields['service_calls'])
+        
+        anomaly_types = np.select(
+            [
+                (data_usage < 5) & (call_minutes < 100),
+                monthly_charges > data_usage * 10,
+                (data_usage > 100) | (call_minutes > 2000),
+                (complaints > 5) | (service_calls > 8)
+            ],
+            ['Sudden Usage Drop', 'Billing Anomaly', 'Usage Spike', 'Service Abuse'],
+            'Other Anomaly'
+        )
+        return np.where(np.asarray(is_anomaly, dtype=bool), anomaly_types, 'Normal').tolist()
+    
+    @timed('get_feature_importance')
     def get_feature_importance(self):
         """Get feature importance for interpretability"""
         if self.churn_model is None:
@@ -312,6 +566,7 @@ class TelecomChurnAnomalyDetector:
         self.scaler = joblib.load(f'{filepath_prefix}_scaler.joblib')
         self.label_encoders = joblib.load(f'{filepath_prefix}_encoders.joblib')
         self.feature_names = joblib.load(f'{filepath_prefix}_features.joblib')
+        self._mark_models_changed()
         print(f"Models loaded from prefix: {filepath_prefix}")
 
 # Training script
@@ -0,0 +1,279 @@
+"""
+Local registry of versioned model artifacts and a hot-swappable model handle
+
+Every registered version is an immutable directory holding the saved model
+files and a meta.json. The ACTIVE file names the version that should serve
+traffic and history.json records promotions for rollback. Both are replaced
+atomically, so any number of worker processes can read them safely. Promote
+and rollback hold an exclusive lock on the registry's .lock file while they
+update history.json, so concurrent updates from API workers and the CLI do
+not lose each other's changes.
+
+Each worker serves from a ModelHandle. Requests take ``handle.current()``
+once and use that detector to the end, while a new version is loaded and
+warmed up in a background thread and then swapped in by rebinding one
+reference. In-flight requests finish on the model they started with.
+
+Usage:
+    python model_registry.py list
+    python model_registry.py register [--prefix telecom_models] [--notes "weekly retrain"] [--promote]
+    python model_registry.py promote <version>
+    python model_registry.py rollback
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from ml_models import TelecomChurnAnomalyDetector
+
+MODEL_PREFIX = 'telecom_models'
+
+
+class ModelRegistry:
+    """Versioned model artifacts under one directory with an ACTIVE pointer"""
+
+    def __init__(self, root='model_registry'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-modify-write cycles across threads and, where fcntl exists, processes"""
+        with self._lock:
+            with open(self._path('.lock'), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _write_atomic(self, name, text):
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f'.{name}.')
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp, self._path(name))
+
+    def register(self, detector, notes=''):
+        """Save the detector's models as a new version and return its id"""
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:6]}"
+        staging = tempfile.mkdtemp(dir=self.root, prefix='.staging_')
+        try:
+            detector.save_models(os.path.join(staging, MODEL_PREFIX))
+            meta = {
+                "version": version,
+                "createdAt": datetime.now().isoformat(),
+                "notes": notes,
+                "churnModel": type(detector.churn_model).__name__,
+                "trees": getattr(detector.churn_model, 'n_estimators', None)
+            }
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=2)
+            # Versions appear complete or not at all
+            os.rename(staging, self._path(version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def versions(self):
+        """Registered version ids, oldest first"""
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith('.') and os.path.isfile(self._path(name, 'meta.json')))
+
+    def list_versions(self):
+        """Metadata of all versions, newest first, with the active one flagged"""
+        active = self.active_version()
+        listing = []
+        for version in reversed(self.versions()):
+            with open(self._path(version, 'meta.json')) as f:
+                meta = json.load(f)
+            meta['active'] = version == active
+            listing.append(meta)
+        return listing
+
+    def active_version(self):
+        try:
+            with open(self._path('ACTIVE')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def active_mtime(self):
+        """Modification time of the ACTIVE pointer, for cheap change polling"""
+        try:
+            return os.stat(self._path('ACTIVE')).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def history(self):
+        try:
+            with open(self._path('history.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def promote(self, version):
+        """Point ACTIVE at a registered version"""
+        if version not in self.versions():
+            raise KeyError(version)
+        with self._locked():
+            history = self.history()
+            if not history or history[-1] != version:
+                history.append(version)
+            self._write_atomic('history.json', json.dumps(history))
+            self._write_atomic('ACTIVE', version)
+        return version
+
+    def rollback(self):
+        """Re-activate the version promoted before the current one"""
+        with self._locked():
+            history = self.history()
+            if len(history) < 2:
+                raise LookupError("No earlier version to roll back to")
+            history.pop()
+            self._write_atomic('history.json', json.dumps(history))
+            self._write_atomic('ACTIVE', history[-1])
+            return history[-1]
+
+    def load(self, version):
+        """Load a version into a new detector whose model_version is the version id"""
+        detector = TelecomChurnAnomalyDetector()
+        detector.load_models(self._path(version, MODEL_PREFIX))
+        detector.model_version = version
+        return detector
+
+
+class ModelHandle:
+    """Read-copy-update reference to the detector serving requests"""
+
+    def __init__(self, detector, registry=None, poll_seconds=5.0, warmup=None):
+        self._detector = detector
+        self.registry = registry
+        self.poll_seconds = poll_seconds
+        self.warmup = warmup
+        self._lock = threading.Lock()
+        self._loading = None
+        self._last_poll = 0.0
+        self._seen_mtime = registry.active_mtime() if registry else None
+        self.last_error = None
+        self.swapped_at = datetime.now().isoformat()
+
+    def current(self):
+        """The detector to use for the whole of one request"""
+        return self._detector
+
+    def swap(self, detector):
+        self._detector = detector
+        self.swapped_at = datetime.now().isoformat()
+
+    @property
+    def loading(self):
+        return self._loading
+
+    def load_in_background(self, version):
+        """Load and warm up a registry version, then swap it in; returns False if a load is running"""
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = version
+
+        def run():
+            try:
+                detector = self.registry.load(version)
+                if self.warmup is not None:
+                    self.warmup(detector)
+                self.swap(detector)
+                self.last_error = None
+                print(f"Now serving model version {version}")
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                print(f"Failed to load model version {version}: {e}")
+            finally:
+                with self._lock:
+                    self._loading = None
+
+        threading.Thread(target=run, name=f'model-load-{version}', daemon=True).start()
+        return True
+
+    def poll(self):
+        """Start loading the active version if the ACTIVE pointer changed; cheap enough per request"""
+        if self.registry is None:
+            return
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_seconds:
+            return
+        self._last_poll = now
+
+        mtime = self.registry.active_mtime()
+        if mtime == self._seen_mtime:
+            return
+        active = self.registry.active_version()
+        if active is None or active == self._detector.model_version:
+            self._seen_mtime = mtime
+            return
+        if self.load_in_background(active):
+            self._seen_mtime = mtime
+
+    def status(self):
+        return {
+            "serving": self._detector.model_version,
+            "loading": self._loading,
+            "swappedAt": self.swapped_at,
+            "lastError": self.last_error
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=os.environ.get('MODEL_REGISTRY_DIR', 'model_registry'))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='list registered versions')
+    register_parser = subparsers.add_parser('register', help='register saved model files as a new version')
+    register_parser.add_argument('--prefix', default=MODEL_PREFIX)
+    register_parser.add_argument('--notes', default='')
+    register_parser.add_argument('--promote', action='store_true')
+    promote_parser = subparsers.add_parser('promote', help='make a version active')
+    promote_parser.add_argument('version')
+    subparsers.add_parser('rollback', help='re-activate the previously promoted version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        for meta in registry.list_versions():
+            marker = '*' if meta['active'] else ' '
+            print(f"{marker} {meta['version']}  {meta['churnModel']:<24} {meta['createdAt']}  {meta['notes']}")
+    elif args.command == 'register':
+        detector = TelecomChurnAnomalyDetector()
+        detector.load_models(args.prefix)
+        version = registry.register(detector, notes=args.notes)
+        print(f"Registered version {version}")
+        if args.promote:
+            registry.promote(version)
+            print(f"Promoted {version}")
+    elif args.command == 'promote':
+        print(f"Promoted {registry.promote(args.version)}")
+    else:
+        print(f"Rolled back to {registry.rollback()}")
+
+
+if __name__ == '__main__':
+    main()
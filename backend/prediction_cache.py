@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with TTL for single-customer prediction results"""
+
+    def __init__(self, max_size=10000, ttl_seconds=300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    @staticmethod
+    def make_key(record, model_version):
+        """Hash a normalized input record together with the model version"""
+        canonical = json.dumps(record, sort_keys=True, separators=(',', ':'), default=str)
+        digest = hashlib.sha256(f"{model_version}|{canonical}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _check_model_version(self, model_version):
+        # A new model makes every cached score stale, so drop them all at once
+        if model_version != self._model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model_version = model_version
+
+    def get(self, record, model_version):
+        """Return the cached result for a record, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(record, model_version)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_model_version(model_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, record, value, model_version):
+        """Store a result, evicting the least recently used entry when full"""
+        if not self.enabled:
+            return
+
+        key = self.make_key(record, model_version)
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            # A request still finishing on the previous model must not wipe the new one's entries
+            if self._model_version is not None and model_version != self._model_version:
+                return
+            self._model_version = model_version
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Get hit-rate and occupancy metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "ttlSeconds": self.ttl_seconds,
+                "modelVersion": self._model_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,200 @@
+"""
+Opt-in statistical profiler for individual API requests
+
+A background thread samples the Python stacks of the threads serving profiled
+requests every few milliseconds. Each finished profile is written in collapsed
+stack format (one "frame;frame;frame count" line per distinct stack, ready for
+flamegraph.pl or speedscope) to a bounded on-disk ring buffer.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+
+class ProfileSession:
+    """Samples collected for one request"""
+
+    def __init__(self, label):
+        self.id = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.started_at = datetime.now().isoformat()
+        self.start = time.perf_counter()
+        self.thread_ids = {threading.get_ident()}
+        self.stacks = Counter()
+        self.samples = 0
+
+
+class SamplingProfiler:
+    """Profiles a random sample of requests, or those carrying a debug header"""
+
+    def __init__(self, enabled=False, sample_rate=0.0, interval_ms=5.0,
+                 profile_dir='profiles', max_profiles=100):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000.0
+        self.profile_dir = profile_dir
+        self.max_profiles = max_profiles
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler = None
+        self._sampler_pid = None
+
+    def should_profile(self, forced=False):
+        """Decide whether to profile a request"""
+        if not self.enabled:
+            return False
+        return forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def _ensure_sampler(self):
+        # The sampler thread does not survive fork, so each worker starts its own
+        if self._sampler is not None and self._sampler.is_alive() and self._sampler_pid == os.getpid():
+            return
+        self._sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._sampler_pid = os.getpid()
+        self._sampler.start()
+
+    def start(self, label):
+        """Start sampling the current thread"""
+        session = ProfileSession(label)
+        with self._lock:
+            self._ensure_sampler()
+            self._sessions.add(session)
+        self._wakeup.set()
+        return session
+
+    def attach(self, session, fn):
+        """Wrap fn so the thread that runs it is sampled as part of session"""
+        if session is None:
+            return fn
+
+        def run(*args, **kwargs):
+            thread_id = threading.get_ident()
+            with self._lock:
+                session.thread_ids.add(thread_id)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    session.thread_ids.discard(thread_id)
+        return run
+
+    def stop(self, session, status=None):
+        """Stop sampling and store the profile in the ring buffer"""
+        # The sampler may still hold the session from its last pass, so copy the
+        # samples under the lock it updates them with
+        with self._lock:
+            self._sessions.discard(session)
+            stacks = Counter(session.stacks)
+            samples = session.samples
+        duration_ms = (time.perf_counter() - session.start) * 1000.0
+        meta = {
+            "id": session.id,
+            "label": session.label,
+            "startedAt": session.started_at,
+            "durationMs": round(duration_ms, 2),
+            "samples": samples,
+            "intervalMs": self.interval * 1000.0,
+            "status": status
+        }
+        self._save(session.id, stacks, meta)
+        return meta
+
+    def _run(self):
+        while True:
+            with self._lock:
+                sessions = list(self._sessions)
+            if not sessions:
+                # Sleep until the next profiled request instead of polling
+                self._wakeup.clear()
+                with self._lock:
+                    idle = not self._sessions
+                if idle:
+                    self._wakeup.wait()
+                continue
+
+            frames = sys._current_frames()
+            with self._lock:
+                for session in sessions:
+                    for thread_id in session.thread_ids:
+                        frame = frames.get(thread_id)
+                        if frame is not None:
+                            session.stacks[self._collapse(frame)] += 1
+                            session.samples += 1
+            del frames
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _save(self, profile_id, stacks, meta):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, profile_id)
+        with open(f'{base}.collapsed', 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        with open(f'{base}.json', 'w') as f:
+            json.dump(meta, f)
+        self._prune()
+
+    def _prune(self):
+        ids = self.list_ids()
+        excess = len(ids) - self.max_profiles
+        for profile_id in ids[:max(excess, 0)]:
+            for ext in ('.collapsed', '.json'):
+                try:
+                    os.remove(os.path.join(self.profile_dir, profile_id + ext))
+                except FileNotFoundError:
+                    pass
+
+    def list_ids(self):
+        """Stored profile ids, oldest first"""
+        if not os.path.isdir(self.profile_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.profile_dir) if name.endswith('.json'))
+
+    def list_profiles(self):
+        """Metadata of the stored profiles, newest first"""
+        profiles = []
+        for profile_id in reversed(self.list_ids()):
+            try:
+                with open(os.path.join(self.profile_dir, f'{profile_id}.json')) as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue
+        return profiles
+
+    def read_collapsed(self, profile_id):
+        """Collapsed stacks of one stored profile, or None if it is gone"""
+        if os.path.basename(profile_id) != profile_id:
+            return None
+        try:
+            with open(os.path.join(self.profile_dir, f'{profile_id}.collapsed')) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def aggregate(self, label_filter=None):
+        """Merge the collapsed stacks of all stored profiles, optionally filtered by label"""
+        totals = Counter()
+        for meta in self.list_profiles():
+            if label_filter and label_filter not in meta['label']:
+                continue
+            collapsed = self.read_collapsed(meta['id']) or ''
+            for line in collapsed.splitlines():
+                stack, _, count = line.rpartition(' ')
+                totals[stack] += int(count)
+        return ''.join(f'{stack} {count}\n' for stack, count in totals.most_common())
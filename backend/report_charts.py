@@ -0,0 +1,370 @@
+"""
+Report charts rendered in worker processes and cached by their aggregates
+
+Charts are drawn from small aggregates (counts per risk level, per anomaly
+type and per tenure band) rather than from customer rows. Each PNG is stored
+under a hash of the chart name, the report type and those aggregates, so a
+report whose numbers did not change reuses the image without rendering it
+again. Cache misses are rendered with matplotlib's Agg backend by worker
+processes that run this file as a script (``python report_charts.py``). They
+import only NumPy and matplotlib, never the API module or its models, and
+matplotlib is never imported by the API process itself.
+
+A chart that fails to render within the timeout is left out of the report,
+and the worker process that was rendering it is killed.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+RISK_LEVELS = ['Low', 'Medium', 'High']
+RISK_COLORS = ['#2e7d32', '#f9a825', '#c62828']
+
+TENURE_BANDS = [0, 6, 12, 24, 48, np.inf]
+TENURE_LABELS = ['0-6', '6-12', '12-24', '24-48', '48+']
+
+CHART_TITLES = {
+    'risk_distribution': 'Churn Risk Distribution',
+    'anomaly_mix': 'Anomaly Mix',
+    'churn_vs_tenure': 'Churn Probability by Tenure'
+}
+
+
+def chart_aggregates(churn_proba, risk_levels, anomaly_types, tenure):
+    """The numbers behind every report chart, rounded so equal reports hash equally"""
+    churn_proba = np.asarray(churn_proba, dtype=np.float64)
+    risk_levels = np.asarray(risk_levels)
+    anomaly_types = np.asarray(anomaly_types)
+    band = np.digitize(np.asarray(tenure, dtype=np.float64), TENURE_BANDS[1:-1], right=False)
+
+    types, type_counts = np.unique(anomaly_types[anomaly_types != 'Normal'], return_counts=True)
+    order = np.argsort(-type_counts, kind='stable')
+    band_counts = np.bincount(band, minlength=len(TENURE_LABELS))
+    band_sums = np.bincount(band, weights=churn_proba, minlength=len(TENURE_LABELS))
+    return {
+        'risk_distribution': {
+            'levels': RISK_LEVELS,
+            'counts': [int((risk_levels == level).sum()) for level in RISK_LEVELS]
+        },
+        'anomaly_mix': {
+            'types': types[order].tolist(),
+            'counts': type_counts[order].tolist(),
+            'normal': int((anomaly_types == 'Normal').sum())
+        },
+        'churn_vs_tenure': {
+            'bands': TENURE_LABELS,
+            'counts': band_counts.tolist(),
+            'meanChurn': [round(float(s / c), 4) if c else 0.0 for s, c in zip(band_sums, band_counts)]
+        }
+    }
+
+
+def _draw_risk_distribution(ax, aggregates):
+    bars = ax.bar(aggregates['levels'], aggregates['counts'], color=RISK_COLORS)
+    ax.bar_label(bars)
+    ax.margins(y=0.15)
+    ax.set_ylabel('Customers')
+
+
+def _draw_anomaly_mix(ax, aggregates):
+    if aggregates['types']:
+        ax.barh(aggregates['types'][::-1], aggregates['counts'][::-1], color='#6a1b9a')
+    else:
+        ax.text(0.5, 0.5, 'No anomalies detected', ha='center', va='center', transform=ax.transAxes)
+    ax.set_xlabel(f"Customers ({aggregates['normal']} normal not shown)")
+
+
+def _draw_churn_vs_tenure(ax, aggregates):
+    ax.bar(aggregates['bands'], aggregates['counts'], color='#b0bec5')
+    ax.set_xlabel('Tenure (months)')
+    ax.set_ylabel('Customers')
+    churn_ax = ax.twinx()
+    churn_ax.plot(aggregates['bands'], [p * 100 for p in aggregates['meanChurn']], color='#c62828', marker='o')
+    churn_ax.set_ylabel('Mean churn probability (%)')
+    churn_ax.set_ylim(0, 100)
+
+
+CHART_PAINTERS = {
+    'risk_distribution': _draw_risk_distribution,
+    'anomaly_mix': _draw_anomaly_mix,
+    'churn_vs_tenure': _draw_churn_vs_tenure
+}
+
+
+def render_chart(chart, aggregates):
+    """PNG bytes of one chart; runs in a chart worker process"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(6, 3), dpi=120)
+    try:
+        CHART_PAINTERS[chart](ax, aggregates)
+        ax.set_title(CHART_TITLES[chart])
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def serve_renders(requests, replies):
+    """Chart worker loop: one JSON request per line in, one JSON reply per line out"""
+    for line in requests:
+        try:
+            request = json.loads(line)
+            png = render_chart(request['chart'], request['aggregates'])
+            reply = {"png": base64.b64encode(png).decode('ascii')}
+        except Exception as e:
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        replies.write(json.dumps(reply).encode('utf-8') + b'\n')
+        replies.flush()
+
+
+class ChartRenderError(Exception):
+    """A chart worker reported that a chart could not be drawn; the worker itself is fine"""
+
+
+class ChartWorker:
+    """One chart worker process and the pipes to it"""
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def render(self, chart, aggregates):
+        request = json.dumps({'chart': chart, 'aggregates': aggregates}).encode('utf-8') + b'\n'
+        self.process.stdin.write(request)
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"chart worker {self.process.pid} exited")
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise ChartRenderError(reply['error'])
+        return base64.b64decode(reply['png'])
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        """Stop the process at once; the thread using the worker then sees it exit and closes it"""
+        if self.alive():
+            self.process.kill()
+
+    def close(self):
+        """Let the worker finish its loop and exit, killing it if it does not"""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+def cache_key(chart, report_type, aggregates):
+    payload = json.dumps({'chart': chart, 'reportType': report_type, 'aggregates': aggregates}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChartRenderer:
+    """Renders report charts in worker processes and caches the PNGs on disk
+
+    Up to ``max_workers`` charts render at once, each in its own worker
+    process. Idle workers are kept for the next report; a worker whose render
+    times out is killed and replaced on demand.
+    """
+
+    def __init__(self, cache_dir='chart_cache', max_workers=1, max_files=200, timeout=30):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.max_files = max_files
+        self.timeout = timeout
+        self._threads = None
+        self._threads_pid = None
+        self._idle = []
+        self._busy = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.killed = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _executor(self):
+        # Started on first use, so each server worker gets its own threads and processes after the fork
+        with self._lock:
+            if self._threads is None or self._threads_pid != os.getpid():
+                self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='chart-render')
+                self._threads_pid = os.getpid()
+                self._idle, self._busy = [], set()
+            return self._threads
+
+    def _checkout(self):
+        with self._lock:
+            worker = None
+            while self._idle and worker is None:
+                worker = self._idle.pop()
+                if not worker.alive():
+                    worker.close()
+                    worker = None
+        if worker is None:
+            worker = ChartWorker()
+        with self._lock:
+            self._busy.add(worker)
+        return worker
+
+    def _render_in_worker(self, chart, aggregates, assigned):
+        worker = self._checkout()
+        assigned.append(worker)
+        try:
+            png = worker.render(chart, aggregates)
+        except ChartRenderError:
+            with self._lock:
+                self._busy.discard(worker)
+                self._idle.append(worker)
+            raise
+        except Exception:
+            with self._lock:
+                self._busy.discard(worker)
+            worker.close()
+            raise
+        with self._lock:
+            self._busy.discard(worker)
+            self._idle.append(worker)
+        return png
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.png')
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                png = f.read()
+        except FileNotFoundError:
+            return None
+        # Touch the file so pruning removes the least recently used charts first
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+        return png
+
+    def _write(self, key, png):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix='.chart.')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(png)
+        os.replace(tmp, self._path(key))
+
+    def _prune(self):
+        names = [name for name in os.listdir(self.cache_dir) if name.endswith('.png')]
+        excess = len(names) - self.max_files
+        if excess <= 0:
+            return
+        ages = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                ages.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                pass
+        for _, path in sorted(ages)[:excess]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def render(self, report_type, aggregates):
+        """PNG bytes per chart name; charts that could not be rendered are left out"""
+        charts, missing = {}, {}
+        for chart, values in aggregates.items():
+            key = cache_key(chart, report_type, values)
+            png = self._read(key)
+            if png is None:
+                missing[chart] = key
+            else:
+                charts[chart] = png
+        with self._lock:
+            self.hits += len(charts)
+            self.misses += len(missing)
+        if not missing:
+            return charts
+
+        executor = self._executor()
+        assigned = {chart: [] for chart in missing}
+        futures = {executor.submit(self._render_in_worker, chart, aggregates[chart], assigned[chart]): chart
+                   for chart in missing}
+        done, not_done = wait(futures, timeout=self.timeout)
+        failed = len(not_done)
+        for future in done:
+            chart = futures[future]
+            try:
+                png = future.result()
+            except Exception as e:
+                print(f"Rendering chart {chart} failed: {e}")
+                failed += 1
+                continue
+            self._write(missing[chart], png)
+            charts[chart] = png
+        if not_done:
+            print(f"Chart rendering timed out after {self.timeout}s; killing the stuck chart workers")
+            for future in not_done:
+                # A queued render has not started; cancelling it keeps it from starting late
+                if not future.cancel():
+                    for worker in assigned[futures[future]]:
+                        worker.kill()
+                        with self._lock:
+                            self.killed += 1
+        with self._lock:
+            self.failures += failed
+        self._prune()
+        return charts
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+                "killedWorkers": self.killed,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "cachedCharts": sum(1 for name in os.listdir(self.cache_dir) if name.endswith('.png')),
+                "maxCachedCharts": self.max_files,
+                "workers": self.max_workers,
+                "workerProcesses": len(self._idle) + len(self._busy)
+            }
+
+    def shutdown(self):
+        with self._lock:
+            threads, self._threads = self._threads, None
+            idle, busy = self._idle, list(self._busy)
+            self._idle = []
+        for worker in busy:
+            worker.kill()
+        for worker in idle:
+            worker.close()
+        if threads is not None:
+            threads.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    replies = sys.stdout.buffer
+    # Anything a library prints must not end up in the reply stream
+    sys.stdout = sys.stderr
+    serve_renders(sys.stdin.buffer, replies)
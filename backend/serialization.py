@@ -0,0 +1,258 @@
+"""
+Column-wise encoding of scored customer batches for API responses
+
+Response fields are converted straight from the NumPy/pandas columns with
+vectorized rounding and casts and a single ``tolist()`` per column, so the
+JSON encoder only ever sees native Python values. Batches can be emitted as
+the usual list of row objects or in a columnar shape with one array per field.
+
+Negotiated responses honour ``Accept`` (MessagePack and Arrow IPC when msgpack
+and pyarrow are installed) and ``Accept-Encoding`` (zstd when zstandard is
+installed, gzip otherwise). Without those headers the defaults are unchanged.
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import Response, request
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SHAPES = ('rows', 'columnar')
+
+JSON = 'application/json'
+CSV = 'text/csv'
+MSGPACK = 'application/msgpack'
+ARROW = 'application/vnd.apache.arrow.stream'
+
+FILE_EXTENSIONS = {JSON: 'json', CSV: 'csv', MSGPACK: 'msgpack', ARROW: 'arrow'}
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+# (response field, source column, kind, decimals)
+CUSTOMER_FIELDS = [
+    ('id', 'customer_id', 'str', None),
+    ('tenure', 'tenure', 'float', 1),
+    ('age', 'age', 'int', None),
+    ('monthlyCharges', 'monthly_charges', 'float', 2),
+    ('totalCharges', 'total_charges', 'float', 2),
+    ('dataUsageGB', 'data_usage_gb', 'float', 2),
+    ('callMinutes', 'call_minutes', 'float', 0),
+    ('smsCount', 'sms_count', 'int', None),
+    ('complaints', 'complaints', 'int', None),
+    ('serviceCalls', 'service_calls', 'int', None),
+    ('downtimeHours', 'downtime_hours', 'float', 2),
+    ('contractType', 'contract_type', 'str', None),
+    ('paymentMethod', 'payment_method', 'str', None),
+    ('internetService', 'internet_service', 'str', None),
+    ('churnProbability', 'churn_proba', 'float', 4),
+    ('riskLevel', 'risk_levels', 'str', None),
+    ('isAnomaly', 'is_anomaly', 'bool', None),
+    ('anomalyScore', 'anomaly_scores', 'float', 4),
+    ('anomalyType', 'anomaly_types', 'str', None),
+    ('actualChurn', 'churn', 'bool', None)
+]
+
+# Response field -> column name in customer exports
+EXPORT_NAMES = {
+    'id': 'Customer_ID',
+    'tenure': 'Tenure_Months',
+    'age': 'Age',
+    'monthlyCharges': 'Monthly_Charges',
+    'totalCharges': 'Total_Charges',
+    'dataUsageGB': 'Data_Usage_GB',
+    'callMinutes': 'Call_Minutes',
+    'smsCount': 'SMS_Count',
+    'complaints': 'Complaints',
+    'serviceCalls': 'Service_Calls',
+    'downtimeHours': 'Downtime_Hours',
+    'contractType': 'Contract_Type',
+    'paymentMethod': 'Payment_Method',
+    'internetService': 'Internet_Service',
+    'churnProbability': 'Churn_Probability',
+    'riskLevel': 'Risk_Level',
+    'isAnomaly': 'Is_Anomaly',
+    'anomalyScore': 'Anomaly_Score',
+    'anomalyType': 'Anomaly_Type',
+    'actualChurn': 'Actual_Churn'
+}
+
+
+def encode_column(values, kind, decimals=None):
+    """Convert one column to a list of native Python values"""
+    if kind == 'float':
+        return np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+    if kind == 'int':
+        return np.asarray(values).astype(np.int64).tolist()
+    if kind == 'bool':
+        return np.asarray(values).astype(bool).tolist()
+    return np.asarray(values, dtype=object).tolist()
+
+
+def recent_activity(n, max_days=30):
+    """ISO timestamps of the last activity, a random 0-29 days ago"""
+    now = datetime.now()
+    choices = np.array([(now - timedelta(days=d)).isoformat() for d in range(max_days)], dtype=object)
+    return choices[np.random.randint(0, max_days, n)].tolist()
+
+
+def customer_columns(data, churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types):
+    """Build the response columns for a scored batch of customers
+
+    ``data`` is a DataFrame or any mapping of source columns to arrays.
+    """
+    sources = {
+        'churn_proba': churn_proba,
+        'risk_levels': risk_levels,
+        'is_anomaly': is_anomaly,
+        'anomaly_scores': anomaly_scores,
+        'anomaly_types': anomaly_types
+    }
+    columns = {}
+    for field, source, kind, decimals in CUSTOMER_FIELDS:
+        values = sources[source] if source in sources else np.asarray(data[source])
+        columns[field] = encode_column(values, kind, decimals)
+    columns['lastActivity'] = recent_activity(len(columns['id']))
+    return columns
+
+
+def export_columns(columns, exported_at):
+    """Rename customer columns for file exports and stamp the export date"""
+    exported = {EXPORT_NAMES[field]: values for field, values in columns.items() if field in EXPORT_NAMES}
+    exported['Export_Date'] = [exported_at.strftime("%Y-%m-%d %H:%M:%S")] * len(columns['id'])
+    return exported
+
+
+def frame_columns(df):
+    """Columns of a DataFrame as lists of native Python values"""
+    return {column: df[column].tolist() for column in df.columns}
+
+
+def columns_to_rows(columns):
+    """Turn a dict of equal-length columns into a list of row objects"""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def shape_columns(columns, shape):
+    """Columns as-is for the columnar shape, otherwise as row objects"""
+    return columns if shape == 'columnar' else columns_to_rows(columns)
+
+
+def json_response(payload, status=200):
+    """Encode a payload of native Python values as a compact JSON response"""
+    return Response(encode_json(payload), status=status, mimetype=JSON)
+
+
+def encode_json(payload):
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def encode_msgpack(payload):
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def arrow_array(values):
+    """Arrow array for one column, dictionary-encoding repetitive strings"""
+    array = pa.array(values)
+    if pa.types.is_string(array.type):
+        encoded = array.dictionary_encode()
+        if len(encoded.dictionary) * 2 <= len(array):
+            return encoded
+    return array
+
+
+def encode_arrow(columns, metadata=None):
+    """Arrow IPC stream of one record batch; metadata values are stored as JSON"""
+    table = pa.table({name: arrow_array(values) for name, values in columns.items()})
+    if metadata:
+        table = table.replace_schema_metadata({key: json.dumps(value) for key, value in metadata.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_csv(columns):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(columns.keys())
+    writer.writerows(zip(*columns.values()))
+    return output.getvalue().encode('utf-8')
+
+
+def compress(body, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def media_types(default=JSON):
+    """Media types the server can produce, preferred first"""
+    types = [default] if default == JSON else [default, JSON]
+    if msgpack is not None:
+        types.append(MSGPACK)
+    if pa is not None:
+        types.append(ARROW)
+    return types
+
+
+def content_encodings():
+    return ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+
+
+def negotiate(default=JSON):
+    """Pick the response media type and content encoding for the current request
+
+    Unsupported or missing Accept headers fall back to the default type, and
+    the body is sent uncompressed unless the client accepts gzip or zstd.
+    """
+    media_type = request.accept_mimetypes.best_match(media_types(default)) or default
+    encoding = request.accept_encodings.best_match(content_encodings())
+    return media_type, encoding
+
+
+def negotiated_response(payload, columns, metadata=None, default=JSON, filename=None):
+    """Encode a scored batch in the negotiated format
+
+    JSON and MessagePack bodies carry ``payload``; Arrow and CSV bodies carry
+    the flat ``columns`` table, with Arrow keeping ``metadata`` in its schema.
+    """
+    media_type, encoding = negotiate(default)
+    if media_type == ARROW:
+        body = encode_arrow(columns, metadata)
+    elif media_type == CSV:
+        body = encode_csv(columns)
+    elif media_type == MSGPACK:
+        body = encode_msgpack(payload)
+    else:
+        body = encode_json(payload)
+
+    response = Response(mimetype=media_type)
+    if encoding and len(body) >= COMPRESS_MIN_BYTES:
+        body = compress(body, encoding)
+        response.headers['Content-Encoding'] = encoding
+    response.set_data(body)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    if filename:
+        response.headers.set('Content-Disposition', 'attachment',
+                             filename=f'{filename}.{FILE_EXTENSIONS[media_type]}')
+    return response
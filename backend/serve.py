@@ -0,0 +1,112 @@
+"""
+Production server for the Telecom Churn & Anomaly Detection API
+
+Models are loaded once in the parent process and N workers are forked from it,
+so every worker shares the model pages copy-on-write instead of holding its own
+copy. Workers are recycled gracefully after a number of requests.
+
+Usage: python serve.py [--workers 4] [--threads 4] [--bind 0.0.0.0:5000]
+
+Every option can also be set with an environment variable (SERVE_WORKERS,
+SERVE_THREADS, SERVE_BIND, SERVE_MAX_REQUESTS, SERVE_MAX_REQUESTS_JITTER,
+SERVE_TIMEOUT, SERVE_GRACEFUL_TIMEOUT). Send SIGHUP to the parent to replace
+all workers gracefully; SIGTERM drains in-flight requests before exiting.
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pre_fork(server, worker):
+    """Move preloaded objects out of the collector's reach before forking"""
+    # Without this, the first GC pass in each worker touches every object
+    # header and turns the shared model pages into private copies
+    gc.freeze()
+
+
+class PreforkServer(BaseApplication):
+    """Gunicorn application that serves flask_api.app"""
+
+    def __init__(self, options):
+        self.options = options
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        if self.application is None:
+            from flask_api import app
+            self.application = app
+        return self.application
+
+
+def build_options(args):
+    """Translate command line arguments into gunicorn settings"""
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests_jitter,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'preload_app': not args.no_preload,
+        'accesslog': '-',
+    }
+    if options['preload_app']:
+        options['pre_fork'] = pre_fork
+    return options
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description='Run the churn API with pre-forked workers')
+    parser.add_argument('--bind', default=env('SERVE_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int,
+                        default=int(env('SERVE_WORKERS', multiprocessing.cpu_count())))
+    parser.add_argument('--threads', type=int, default=int(env('SERVE_THREADS', 4)),
+                        help='request threads per worker')
+    parser.add_argument('--max-requests', type=int, default=int(env('SERVE_MAX_REQUESTS', 1000)),
+                        help='recycle a worker after this many requests (0 disables)')
+    parser.add_argument('--max-requests-jitter', type=int,
+                        default=int(env('SERVE_MAX_REQUESTS_JITTER', 100)),
+                        help='random extra requests so workers do not recycle together')
+    parser.add_argument('--timeout', type=int, default=int(env('SERVE_TIMEOUT', 120)))
+    parser.add_argument('--graceful-timeout', type=int, default=int(env('SERVE_GRACEFUL_TIMEOUT', 30)),
+                        help='seconds a recycled worker gets to finish in-flight requests')
+    parser.add_argument('--no-preload', action='store_true',
+                        help='load models separately in every worker (for comparison only)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # flask_api sizes the bulkheads' shared request budget from the thread count
+    os.environ['SERVE_THREADS'] = str(args.threads)
+    server = PreforkServer(build_options(args))
+
+    if not args.no_preload:
+        # Keep the collector quiet while the models load so their objects
+        # land in the frozen generation untouched
+        gc.disable()
+        server.load()
+        gc.freeze()
+        gc.enable()
+        print(f"Models loaded in parent process {os.getpid()}, forking {args.workers} workers")
+
+    server.run()
+
+
+if __name__ == '__main__':
+    main()
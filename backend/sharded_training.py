@@ -0,0 +1,142 @@
+"""
+Sharded multi-process training of the churn forest
+
+The scaled feature matrix is written chunk by chunk to a memory-mapped .npy
+file instead of being held in memory as one array. The training rows are then
+split into stratified shards. Each worker process maps the file, copies only
+its own shard and fits a sub-forest on it. The sub-forests are merged into one
+RandomForestClassifier whose predict_proba averages all trees, just like a
+forest trained in one process.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from ml_models import CATEGORICAL_COLUMNS, CHURN_FOREST_PARAMS, FEATURE_COLUMNS
+
+
+def write_feature_memmap(detector, data, directory, chunk_size=100000):
+    """Fit the encoders and scaler in chunks and write scaled features and labels to .npy files
+
+    Returns the paths of the feature matrix (float32, which is what the trees
+    compare against anyway) and of the churn labels.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        detector.label_encoders[col] = LabelEncoder().fit(data[col])
+    detector.feature_names = list(FEATURE_COLUMNS)
+
+    chunks = [data.iloc[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+    scaler = StandardScaler()
+    for chunk in chunks:
+        scaler.partial_fit(detector.build_features(chunk)[FEATURE_COLUMNS])
+    detector.scaler = scaler
+
+    X_path = os.path.join(directory, 'features.npy')
+    y_path = os.path.join(directory, 'churn.npy')
+    X = open_memmap(X_path, mode='w+', dtype=np.float32, shape=(len(data), len(FEATURE_COLUMNS)))
+    y = open_memmap(y_path, mode='w+', dtype=np.int8, shape=(len(data),))
+    start = 0
+    for chunk in chunks:
+        df = detector.build_features(chunk)
+        X[start:start + len(df)] = scaler.transform(df[FEATURE_COLUMNS])
+        y[start:start + len(df)] = df['churn'].to_numpy()
+        start += len(df)
+    X.flush()
+    y.flush()
+    del X, y
+    return X_path, y_path
+
+
+def fit_shard(X_path, y_path, rows, n_estimators, random_state):
+    """Fit a sub-forest on one shard of the memory-mapped training data"""
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    params = dict(CHURN_FOREST_PARAMS, n_estimators=n_estimators, random_state=random_state)
+    return RandomForestClassifier(**params).fit(X[rows], y[rows])
+
+
+def merge_forests(forests):
+    """Combine fitted forests into one whose predict_proba averages all their trees"""
+    merged = forests[0]
+    for forest in forests[1:]:
+        if not np.array_equal(forest.classes_, merged.classes_):
+            raise ValueError("Cannot merge forests trained on different classes")
+    merged.estimators_ = [tree for forest in forests for tree in forest.estimators_]
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def train_churn_model_sharded(detector, data, n_shards=4, n_workers=None, n_estimators=None,
+                              chunk_size=100000, workdir=None):
+    """Train the detector's churn model on stratified shards in separate processes
+
+    Uses the same 80/20 stratified split and forest settings as
+    ``train_churn_model``. The ``n_estimators`` trees (100 by default) are
+    spread over the shards, the first ``n_estimators % n_shards`` shards
+    growing one extra tree, so the merged forest has exactly that many trees.
+    Returns a small report with the hold-out ROC-AUC and timings.
+    """
+    n_estimators = n_estimators or CHURN_FOREST_PARAMS['n_estimators']
+    if n_estimators < n_shards:
+        raise ValueError(f"Cannot spread {n_estimators} trees over {n_shards} shards")
+    n_workers = n_workers or min(n_shards, os.cpu_count() or 1)
+    directory = workdir or tempfile.mkdtemp(prefix='churn_shards_')
+    print(f"Training churn model on {n_shards} shards with {n_workers} worker processes...")
+
+    try:
+        start = time.perf_counter()
+        X_path, y_path = write_feature_memmap(detector, data, directory, chunk_size)
+        prepared = time.perf_counter()
+
+        y = np.load(y_path, mmap_mode='r')
+        counts = np.bincount(y, minlength=2)
+        if (counts < 2).any():
+            raise ValueError("Sharded training needs at least two churned and two retained customers")
+        train_rows, test_rows = train_test_split(
+            np.arange(len(y)), test_size=0.2, random_state=42, stratify=y
+        )
+        # Every sub-forest must see both classes, or the forests cannot be merged
+        if np.bincount(y[train_rows], minlength=2).min() < n_shards:
+            raise ValueError(f"Too few customers of one class for {n_shards} shards; use fewer shards")
+        folds = StratifiedKFold(n_splits=n_shards, shuffle=True, random_state=42)
+        shards = [np.sort(train_rows[fold]) for _, fold in folds.split(train_rows, y[train_rows])]
+
+        trees_per_shard = [n_estimators // n_shards + (i < n_estimators % n_shards) for i in range(n_shards)]
+        seed = CHURN_FOREST_PARAMS['random_state']
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [pool.submit(fit_shard, X_path, y_path, rows, trees_per_shard[i], seed + i)
+                       for i, rows in enumerate(shards)]
+            detector.churn_model = merge_forests([future.result() for future in futures])
+        detector._mark_models_changed()
+        trained = time.perf_counter()
+
+        X = np.load(X_path, mmap_mode='r')
+        test_rows = np.sort(test_rows)
+        auc = roc_auc_score(y[test_rows], detector.churn_model.predict_proba(X[test_rows])[:, 1])
+        del X, y
+    finally:
+        if workdir is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "rows": len(data),
+        "shards": n_shards,
+        "workers": n_workers,
+        "trees": detector.churn_model.n_estimators,
+        "rocAuc": round(auc, 4),
+        "prepareSeconds": round(prepared - start, 3),
+        "trainSeconds": round(trained - prepared, 3),
+        "totalSeconds": round(trained - start, 3)
+    }
+    print(f"ROC-AUC Score: {auc:.4f} ({report['trees']} trees, {report['totalSeconds']}s)")
+    return report
@@ -0,0 +1,171 @@
+"""
+Customer detail reports written page by page
+
+``SimpleDocTemplate.build`` normally takes a list holding every flowable of
+the report, and the usual pattern builds the PDF into a BytesIO. With one
+table row per customer, both grow with the number of customers.
+
+Here the flowables come from a generator that reads the next page-sized
+chunk of customers only when ReportLab has placed the previous one, and the
+PDF is written to a temporary file that the response then streams. Memory
+stays flat apart from ReportLab's own page bookkeeping: it keeps each
+finished page's compressed content stream until the file is written, a few
+kilobytes per page.
+
+Usage:
+    python streaming_report.py report.pdf [--risk High Medium] [--max-rows 100000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Customers per detail table; one table fills about one A4 page
+ROWS_PER_TABLE = 45
+
+DETAIL_HEADER = ["Customer ID", "Tenure", "Monthly", "Contract", "Internet", "Churn Prob", "Risk", "Anomaly"]
+
+DETAIL_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.beige]),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2)
+])
+
+
+class LazyFlowables(list):
+    """A list that pulls flowables from an iterator as ReportLab consumes them
+
+    ``BaseDocTemplate.build`` only reads ``len``, the first few items and
+    removes items from the front, so keeping a few items buffered is enough.
+    """
+
+    def __init__(self, source, lookahead=4):
+        super().__init__()
+        self._source = iter(source)
+        self.lookahead = lookahead
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self.lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, item):
+        self._fill()
+        return list.__getitem__(self, item)
+
+
+def detail_table(fields, churn_proba, risk_levels, anomaly_types):
+    """One page of customers as a ReportLab table"""
+    rows = [DETAIL_HEADER]
+    for i in range(len(churn_proba)):
+        rows.append([
+            fields['customer_id'][i],
+            f"{fields['tenure'][i]:.0f}",
+            f"${fields['monthly_charges'][i]:.2f}",
+            fields['contract_type'][i],
+            fields['internet_service'][i],
+            f"{churn_proba[i] * 100:.1f}%",
+            risk_levels[i],
+            anomaly_types[i]
+        ])
+    widths = [1.0*inch, 0.5*inch, 0.65*inch, 1.0*inch, 0.75*inch, 0.7*inch, 0.55*inch, 1.15*inch]
+    return Table(rows, colWidths=widths, repeatRows=1, style=DETAIL_STYLE)
+
+
+def detail_flowables(index, rows, title, rows_per_table=ROWS_PER_TABLE):
+    """Title and summary followed by one table per chunk of ``rows``, built on demand"""
+    styles = getSampleStyleSheet()
+    yield Paragraph(title, styles['Heading1'])
+    yield Paragraph(
+        f"{len(rows)} customers, highest churn probability first. "
+        f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} "
+        f"with model version {index.model_version}.",
+        styles['Normal']
+    )
+    yield Spacer(1, 12)
+    for start in range(0, len(rows), rows_per_table):
+        fields, churn_proba, risk_levels, _, _, anomaly_types = index.page(rows[start:start + rows_per_table])
+        yield detail_table(fields, churn_proba, risk_levels, anomaly_types)
+
+
+def detail_document(output, title):
+    return SimpleDocTemplate(output, pagesize=A4, title=title,
+                             leftMargin=0.6*inch, rightMargin=0.6*inch, topMargin=0.6*inch, bottomMargin=0.6*inch)
+
+
+def write_detail_report(output, index, risk_levels=('High',), max_rows=None, rows_per_table=ROWS_PER_TABLE):
+    """Write a PDF listing the customers at the given risk levels to a path or binary file
+
+    Returns the number of customers, pages and seconds taken.
+    """
+    start = time.perf_counter()
+    rows, total = index.query({'riskLevel': list(risk_levels)}, 'churnProbability', descending=True,
+                                 offset=0, limit=max_rows if max_rows is not None else index.size)
+    title = f"{' and '.join(risk_levels)} Risk Customer Detail Report"
+    doc = detail_document(output, title)
+    doc.build(LazyFlowables(detail_flowables(index, rows, title, rows_per_table)))
+    return {
+        "customers": len(rows),
+        "matching": total,
+        "pages": doc.page,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def detail_report_file(index, risk_levels=('High',), max_rows=None):
+    """The report in an anonymous temporary file, rewound for streaming, and its stats"""
+    output = tempfile.TemporaryFile(prefix='detail_report_')
+    try:
+        stats = write_detail_report(output, index, risk_levels, max_rows)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output, stats
+
+
+def main():
+    from customer_index import CustomerIndex
+    from feature_store import FeatureStore
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='PDF file to write')
+    parser.add_argument('--risk', nargs='+', default=['High'], choices=['High', 'Medium', 'Low'])
+    parser.add_argument('--max-rows', type=int)
+    parser.add_argument('--store', default=os.environ.get('FEATURE_STORE_DIR', 'feature_store'))
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY_DIR', 'model_registry'))
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    version = registry.active_version()
+    if version is None:
+        raise SystemExit("No active model version; register one with: python model_registry.py register --promote")
+    index = CustomerIndex(FeatureStore(args.store), registry.load(version))
+    stats = write_detail_report(args.output, index, args.risk, args.max_rows)
+    print(f"Wrote {stats['customers']} customers on {stats['pages']} pages to {args.output} "
+          f"in {stats['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Mergeable streaming summaries of feature columns
+
+``FeatureSummary`` keeps, for every feature, the count/mean/M2 moments
+(Welford updates, combined with Chan's parallel formula) and a KLL-style
+quantile sketch. Summaries can be fed chunk by chunk and summaries built on
+different shards can be merged, so nothing requires the full matrix in memory.
+
+Accuracy: mean and std match np.mean/np.std up to float rounding. Quantiles
+are exact while a feature has seen at most ``sketch_size`` values; beyond that
+the rank error is bounded by roughly ``log2(n / sketch_size) / sketch_size``
+of n (about 0.3% of the ranks for 1M rows with the default size of 2048).
+"""
+
+import numpy as np
+
+
+class RunningMoments:
+    """Per-feature count, mean and sum of squared deviations"""
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return
+        chunk = RunningMoments(X.shape[1])
+        chunk.count = len(X)
+        chunk.mean = X.mean(axis=0)
+        chunk.m2 = ((X - chunk.mean) ** 2).sum(axis=0)
+        self.merge(chunk)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / total)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / total)
+        self.count = total
+
+    @property
+    def std(self):
+        """Population standard deviation, as np.std computes by default"""
+        return np.sqrt(self.m2 / self.count) if self.count else np.zeros_like(self.mean)
+
+
+class QuantileSketch:
+    """KLL-style quantile sketch over all features at once
+
+    Level ``h`` holds items of weight ``2**h`` as a (rows, n_features) array.
+    Every feature sees the same number of rows, so each column can be sorted
+    and halved independently while the levels stay rectangular.
+    """
+
+    def __init__(self, n_features, sketch_size=2048, seed=0):
+        self.n_features = n_features
+        self.sketch_size = sketch_size
+        self.levels = [np.empty((0, n_features))]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        self.levels[0] = np.vstack([self.levels[0], X])
+        self._compact()
+
+    def merge(self, other):
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty((0, self.n_features)))
+            self.levels[h] = np.vstack([self.levels[h], items])
+        self._compact()
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.sketch_size:
+                items = np.sort(items, axis=0)
+                # An odd item out stays at this level so the weights add up
+                keep = items[:len(items) % 2]
+                paired = items[len(keep):]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty((0, self.n_features)))
+                self.levels[h + 1] = np.vstack([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, q):
+        """Per-feature q-th quantile (0-1), interpolated like np.percentile"""
+        values = np.vstack(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, axis=0)
+        values = np.take_along_axis(values, order, axis=0)
+        cumulative = np.cumsum(weights[order], axis=0)
+
+        # Rank r (0-based) is held by the first item whose cumulative weight exceeds r
+        position = q * (cumulative[-1] - 1)
+        lower = np.floor(position)
+        result = np.empty(self.n_features)
+        for j in range(self.n_features):
+            below = values[np.searchsorted(cumulative[:, j], lower[j], side='right'), j]
+            above_index = min(np.searchsorted(cumulative[:, j], lower[j] + 1, side='right'), len(values) - 1)
+            above = values[above_index, j]
+            result[j] = below + (above - below) * (position[j] - lower[j])
+        return result
+
+    def histogram(self, edges):
+        """Per-feature weighted item counts in the bins split at ``edges`` (features x inner edges)
+
+        A value falls in bin i when it is above edge i-1 and at most edge i.
+        """
+        values = np.vstack(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        counts = np.empty((self.n_features, edges.shape[1] + 1))
+        for j in range(self.n_features):
+            bins = np.searchsorted(edges[j], values[:, j], side='left')
+            counts[j] = np.bincount(bins, weights=weights, minlength=edges.shape[1] + 1)
+        return counts
+
+
+class FeatureSummary:
+    """Mergeable moments and quartile sketch for a matrix of features"""
+
+    def __init__(self, n_features, sketch_size=2048, seed=0):
+        self.moments = RunningMoments(n_features)
+        self.sketch = QuantileSketch(n_features, sketch_size, seed)
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def update(self, X):
+        """Add a chunk of rows"""
+        self.moments.update(X)
+        self.sketch.update(X)
+        return self
+
+    def merge(self, other):
+        """Fold in a summary built on another chunk or shard"""
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def feature_stats(self, feature_names):
+        """Per-feature mean, std, q1 and q3 in the anomaly model's format"""
+        std = self.moments.std
+        q1 = self.sketch.quantiles(0.25)
+        q3 = self.sketch.quantiles(0.75)
+        return {
+            name: {
+                'mean': self.moments.mean[i],
+                'std': std[i],
+                'q1': q1[i],
+                'q3': q3[i]
+            }
+            for i, name in enumerate(feature_names)
+        }
+
+    def reference_histogram(self, n_bins=10):
+        """Quantile bin edges and the share of rows per bin, as a drift monitoring reference
+
+        Repeated edges of discrete features are dropped and the rows padded
+        with +inf, so every feature has ``n_bins - 1`` edges and some bins
+        may stay empty.
+        """
+        quantiles = np.column_stack([self.sketch.quantiles(q) for q in np.arange(1, n_bins) / n_bins])
+        edges = np.full_like(quantiles, np.inf)
+        for j, row in enumerate(quantiles):
+            unique = np.unique(row)
+            edges[j, :len(unique)] = unique
+        counts = self.sketch.histogram(edges)
+        return {
+            'edges': edges,
+            'proportions': counts / counts.sum(axis=1, keepdims=True),
+            'count': self.count
+        }
@@ -0,0 +1,33 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_models import TelecomChurnAnomalyDetector
+
+
+def quietly(fn, *args, **kwargs):
+    """Call fn without its progress output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+@pytest.fixture(scope='session')
+def customers():
+    """Synthetic customers; the generator is seeded, so every run gets the same ones"""
+    return quietly(TelecomChurnAnomalyDetector().generate_synthetic_data, n_samples=4000)
+
+
+@pytest.fixture(scope='session')
+def detector(customers):
+    """Detector trained on the first half of ``customers``; copy it before changing it"""
+    detector = TelecomChurnAnomalyDetector()
+    training = customers.iloc[:2000]
+    quietly(detector.train_churn_model, training)
+    quietly(detector.train_anomaly_model, training)
+    return detector
@@ -0,0 +1,66 @@
+import copy
+
+import numpy as np
+import pytest
+
+from attribution import AttributionEngine, PathAttribution, explanation, top_contributions
+from compact_forest import CompactForest
+
+
+@pytest.fixture(scope='module')
+def scaled(detector, customers):
+    return detector.preprocess_data(customers.iloc[:1000], fit=False)[0]
+
+
+def test_contributions_add_up_to_the_prediction(detector, scaled):
+    paths = PathAttribution(detector.churn_model)
+    contributions = paths.explain(scaled, batch_size=300)
+    assert contributions.shape == scaled.shape
+    proba = detector.churn_model.predict_proba(scaled)[:, 1]
+    assert np.allclose(paths.base_value + contributions.sum(axis=1), proba, atol=1e-9)
+
+
+def test_compact_forest_contributions_match(detector, scaled):
+    paths = PathAttribution(detector.churn_model)
+    compact = PathAttribution(CompactForest.from_forest(detector.churn_model))
+    contributions = compact.explain(scaled)
+    # The compact forest stores node probabilities as float32
+    assert compact.base_value == pytest.approx(paths.base_value, abs=1e-6)
+    assert np.allclose(contributions, paths.explain(scaled), atol=1e-5)
+    proba = detector.churn_model.predict_proba(scaled)[:, 1]
+    assert np.allclose(compact.base_value + contributions.sum(axis=1), proba, atol=1e-5)
+
+
+def test_engine_reuses_rows_only_while_they_are_unchanged(detector, scaled, customers):
+    engine = AttributionEngine(max_size=100)
+    ids = list(customers['customer_id'].iloc[:10])
+    first = engine.explain(detector, scaled[:10], ids)
+    assert np.array_equal(engine.explain(detector, scaled[:10], ids), first)
+    assert (engine.hits, engine.misses) == (10, 10)
+
+    changed = scaled[:10].copy()
+    changed[0, 0] += 1.0
+    engine.explain(detector, changed, ids)
+    assert (engine.hits, engine.misses) == (19, 11)
+
+
+def test_engine_separates_model_versions_and_evicts(detector, scaled, customers):
+    engine = AttributionEngine(max_size=5)
+    ids = list(customers['customer_id'].iloc[:10])
+    engine.explain(detector, scaled[:10], ids)
+    assert engine.stats()['size'] == 5
+
+    retrained = copy.copy(detector)
+    retrained.model_version = 'retrained'
+    engine.explain(retrained, scaled[5:10], ids[5:10])
+    assert engine.hits == 0
+    assert engine.stats()['modelVersions'] == [detector.model_version, 'retrained']
+
+
+def test_top_contributions_are_ordered():
+    contributions = np.array([[0.1, -0.3, 0.5, 0.2], [-0.1, -0.2, -0.05, 0.0]])
+    assert top_contributions(contributions, ['a', 'b', 'c', 'd'], k=2).tolist() == [[2, 3], [3, 2]]
+
+    result = explanation(contributions[0], ['a', 'b', 'c', 'd'], 0.25, limit=2)
+    assert [item['feature'] for item in result['contributions']] == ['c', 'b']
+    assert result['contributions'][1]['effect'] == 'decreases risk'
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from batching import MicroBatchDispatcher
+
+
+class Scorer:
+    """Doubles each record's value; like an unseen category, a negative value fails the whole call
+
+    A lone record of 0 holds up the dispatcher until ``release`` is set, so the
+    records submitted meanwhile are queued up for the next batch together.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.holding = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, records):
+        if records == [0]:
+            self.holding.set()
+            self.release.wait(5)
+            return [0]
+        self.calls.append(len(records))
+        if any(record < 0 for record in records):
+            raise ValueError("y contains previously unseen labels")
+        return [record * 2 for record in records]
+
+
+def hold(dispatcher, scorer):
+    dispatcher.submit(0)
+    assert scorer.holding.wait(5)
+
+
+def test_records_are_scored_in_one_batch():
+    scorer = Scorer()
+    dispatcher = MicroBatchDispatcher(scorer)
+    hold(dispatcher, scorer)
+    futures = [dispatcher.submit(record) for record in (1, 2, 3)]
+    scorer.release.set()
+    assert [future.result(timeout=5) for future in futures] == [2, 4, 6]
+    assert scorer.calls == [3]
+    assert dispatcher.stats()['pending'] == 0
+
+
+def test_invalid_record_only_fails_its_own_request():
+    scorer = Scorer()
+    dispatcher = MicroBatchDispatcher(scorer)
+    hold(dispatcher, scorer)
+    futures = [dispatcher.submit(record) for record in (1, -1, 3, 4)]
+    scorer.release.set()
+
+    assert futures[0].result(timeout=5) == 2
+    with pytest.raises(ValueError, match='unseen'):
+        futures[1].result(timeout=5)
+    assert [future.result(timeout=5) for future in futures[2:]] == [6, 8]
+    # One failed batch call, then each record on its own
+    assert scorer.calls == [4, 1, 1, 1, 1]
+    assert dispatcher.stats()['records'] == 5
+
+
+def test_lone_failing_record_is_not_scored_twice():
+    scorer = Scorer()
+    dispatcher = MicroBatchDispatcher(scorer)
+    with pytest.raises(ValueError):
+        dispatcher.score(-1, timeout=5)
+    assert scorer.calls == [1]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from compact_forest import CompactForest
+
+
+@pytest.fixture(scope='module')
+def scaled(detector, customers):
+    return detector.preprocess_data(customers, fit=False)[0]
+
+
+def test_predictions_match_the_forest(detector, scaled):
+    compact = CompactForest.from_forest(detector.churn_model)
+    expected = detector.churn_model.predict_proba(scaled)
+    # Leaf probabilities are stored as float32
+    assert np.allclose(compact.predict_proba(scaled), expected, atol=1e-6)
+    assert np.array_equal(compact.predict(scaled), detector.churn_model.predict(scaled))
+    assert np.allclose(compact.feature_importances_, detector.churn_model.feature_importances_)
+
+
+def test_inputs_on_a_split_take_the_same_branch(detector, scaled):
+    forest = detector.churn_model
+    tree = forest.estimators_[0].tree_
+    # Put every split value of the first tree into the column it splits on
+    split = np.nonzero(tree.feature >= 0)[0]
+    X = np.repeat(scaled[:1], len(split), axis=0)
+    X[np.arange(len(split)), tree.feature[split]] = tree.threshold[split].astype(np.float32)
+
+    compact = CompactForest.from_forest(forest)
+    assert np.allclose(compact.predict_proba(X), forest.predict_proba(X), atol=1e-6)
+
+
+def test_small_batches_give_the_same_result(detector, scaled):
+    compact = CompactForest.from_forest(detector.churn_model)
+    assert np.array_equal(compact.predict_proba(scaled[:1000], batch_size=7), compact.predict_proba(scaled[:1000]))
+
+
+def test_pruning_moves_each_tree_by_at_most_the_tolerance(detector, scaled):
+    full = CompactForest.from_forest(detector.churn_model)
+    pruned = CompactForest.from_forest(detector.churn_model, prune_tolerance=0.05)
+    assert pruned.nbytes < full.nbytes
+    difference = np.abs(pruned.predict_proba(scaled)[:, 1] - full.predict_proba(scaled)[:, 1])
+    assert difference.max() <= 0.05 + 1e-6
+
+
+def test_max_trees_keeps_the_first_trees(detector, scaled):
+    compact = CompactForest.from_forest(detector.churn_model, max_trees=10)
+    assert compact.n_estimators == 10
+    expected = np.mean([tree.predict_proba(scaled)[:, 1] for tree in detector.churn_model.estimators_[:10]], axis=0)
+    assert np.allclose(compact.predict_proba(scaled)[:, 1], expected, atol=1e-6)
+
+
+def test_multiclass_forests_are_rejected():
+    X = np.arange(30, dtype=float).reshape(-1, 1)
+    forest = RandomForestClassifier(n_estimators=2, random_state=0).fit(X, np.arange(30) % 3)
+    with pytest.raises(ValueError, match='binary'):
+        CompactForest.from_forest(forest)
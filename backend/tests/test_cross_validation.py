@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from conftest import quietly
+from cross_validation import RISK_TIERS, cross_validate, evaluate_fold, tier_metrics, write_folds
+from ml_models import CHURN_FOREST_PARAMS
+
+
+@pytest.fixture
+def labels():
+    # 30% churners, in a deterministic but unsorted order
+    return np.random.default_rng(3).permutation(np.repeat([0, 1], [140, 60])).astype(np.int8)
+
+
+def test_each_repeat_puts_every_row_in_one_stratified_fold(labels, tmp_path):
+    folds = np.load(write_folds(labels, str(tmp_path), n_folds=5, n_repeats=3))
+    assert folds.shape == (3, 200)
+    for repeat in folds:
+        # Every row has exactly one test fold, and every fold is used
+        assert sorted(np.unique(repeat)) == [0, 1, 2, 3, 4]
+        for fold in range(5):
+            in_fold = repeat == fold
+            assert in_fold.sum() == 40
+            assert labels[in_fold].sum() == 12
+    # Repeats shuffle the rows differently
+    assert not np.array_equal(folds[0], folds[1])
+
+
+def test_tier_metrics():
+    y = np.array([1, 1, 0, 1, 0, 0])
+    proba = np.array([0.9, 0.8, 0.75, 0.5, 0.45, 0.1])
+    tiers = tier_metrics(y, proba)
+    assert tiers['High'] == {"customers": 3, "precision": 2 / 3, "recall": 2 / 3}
+    assert tiers['Medium'] == {"customers": 2, "precision": 0.5, "recall": 1 / 3}
+    assert tiers['Low'] == {"customers": 1, "precision": 0.0, "recall": 0.0}
+
+
+def test_fold_is_scored_on_its_held_out_rows(labels, tmp_path):
+    X = np.random.default_rng(0).normal(size=(200, 3)).astype(np.float32)
+    X[:, 0] += labels
+    np.save(tmp_path / 'X.npy', X)
+    np.save(tmp_path / 'y.npy', labels)
+    folds_path = write_folds(labels, str(tmp_path), n_folds=4)
+    params = dict(CHURN_FOREST_PARAMS, n_estimators=10)
+
+    result = evaluate_fold(str(tmp_path / 'X.npy'), str(tmp_path / 'y.npy'), folds_path, 0, 2, params)
+    assert (result['repeat'], result['fold'], result['trainRows'], result['testRows']) == (0, 2, 150, 50)
+    assert 0.5 < result['rocAuc'] <= 1.0
+    assert sum(tier['customers'] for tier in result['tiers'].values()) == 50
+
+
+def test_report_has_the_documented_keys(customers):
+    report = quietly(cross_validate, customers.iloc[:600], n_folds=3, n_repeats=2, n_workers=1,
+                     forest_params={'n_estimators': 10})
+    assert (report['rows'], report['folds'], report['repeats']) == (600, 3, 2)
+    assert report['forestParams']['n_estimators'] == 10
+    assert set(report['rocAuc']) == {'mean', 'std'}
+    assert set(report['tiers']) == set(RISK_TIERS)
+    for tier in report['tiers'].values():
+        assert set(tier) == {'customers', 'precision', 'recall'}
+        assert all(set(metric) == {'mean', 'std'} for metric in tier.values())
+    assert set(report['fitSeconds']) == set(report['predictSeconds']) == {'mean', 'std'}
+    assert [(fold['repeat'], fold['fold']) for fold in report['perFold']] == [(r, f) for r in range(2) for f in range(3)]
+    assert all(fold['testRows'] == 200 for fold in report['perFold'])
+    # Each churner is in exactly one tier, so the recalls add up to one
+    assert sum(tier['recall']['mean'] for tier in report['tiers'].values()) == pytest.approx(1.0, abs=1e-3)
@@ -0,0 +1,109 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from customer_index import FILTER_FIELDS, SORT_FIELDS, CustomerIndex, CustomerIndexCache
+from feature_store import FeatureStore
+
+
+@pytest.fixture(scope='module')
+def store(detector, customers, tmp_path_factory):
+    return FeatureStore.build(str(tmp_path_factory.mktemp('store') / 'feature_store'), detector, customers)
+
+
+@pytest.fixture(scope='module')
+def index(store, detector):
+    # A small chunk size so the scores are stitched together from several parts
+    return CustomerIndex(store, detector, chunk_size=700)
+
+
+@pytest.fixture(scope='module')
+def reference(store, detector):
+    """Every stored customer scored in one go, as a DataFrame"""
+    fields, churn_proba, risk_levels, is_anomaly, anomaly_scores, anomaly_types = store.score(
+        detector, np.arange(len(store)))
+    return pd.DataFrame({**fields, 'churn_proba': churn_proba, 'risk_levels': risk_levels,
+                         'is_anomaly': is_anomaly, 'anomaly_scores': anomaly_scores,
+                         'anomaly_types': anomaly_types})
+
+
+def expected_rows(reference, filters, sort, descending):
+    df = reference
+    for field, values in (filters or {}).items():
+        df = df[df[FILTER_FIELDS[field]].isin(values)]
+    if sort is not None:
+        # The index walks a stable ascending sort backwards, so descending ties come last row first
+        df = df.iloc[::-1] if descending else df
+        df = df.sort_values(SORT_FIELDS[sort], ascending=not descending, kind='stable')
+    return df.index.to_numpy()
+
+
+QUERIES = [
+    (None, None, True),
+    ({'riskLevel': ['High']}, 'churnProbability', True),
+    ({'riskLevel': ['High', 'Medium'], 'contractType': ['Month-to-month']}, 'monthlyCharges', False),
+    ({'anomalyType': ['Normal']}, 'anomalyScore', True),
+    ({'internetService': ['Fiber optic']}, None, True),
+    ({'riskLevel': ['Unknown']}, 'churnProbability', True),
+]
+
+
+@pytest.mark.parametrize('filters, sort, descending', QUERIES)
+@pytest.mark.parametrize('offset, limit', [(0, 50), (120, 25), (3990, 50)])
+def test_pages_match_pandas(index, reference, filters, sort, descending, offset, limit):
+    expected = expected_rows(reference, filters, sort, descending)
+    rows, total = index.query(filters, sort, descending, offset, limit)
+    assert total == len(expected)
+    assert list(rows) == list(expected[offset:offset + limit])
+
+
+def test_page_returns_the_scored_rows(index, reference):
+    rows, _ = index.query({'riskLevel': ['High']}, 'churnProbability', limit=10)
+    fields, churn_proba, risk_levels, *_ = index.page(rows)
+    assert list(fields['customer_id']) == list(reference['customer_id'].iloc[rows])
+    assert np.array_equal(churn_proba, reference['churn_proba'].iloc[rows])
+    assert set(risk_levels) == {'High'}
+
+
+def test_summary_matches_pandas(index, reference):
+    filters = {'contractType': ['Month-to-month']}
+    df = reference[reference['contract_type'].isin(filters['contractType'])]
+    assert index.summary(filters) == {
+        "total": len(df),
+        "highRisk": int((df['risk_levels'] == 'High').sum()),
+        "mediumRisk": int((df['risk_levels'] == 'Medium').sum()),
+        "lowRisk": int((df['risk_levels'] == 'Low').sum()),
+        "anomalies": int((df['anomaly_types'] != 'Normal').sum()),
+        "averageChurnProb": round(float(df['churn_proba'].mean()), 4)
+    }
+    assert index.summary()['total'] == len(reference)
+
+
+def test_cache_keeps_the_most_recent_versions(store, detector):
+    retrained = copy.copy(detector)
+    retrained.model_version = 'retrained'
+    cache = CustomerIndexCache(store, max_versions=1)
+    first = cache.get(detector)
+    assert cache.get(detector) is first
+    assert cache.get(retrained).model_version == 'retrained'
+    # Only one version is kept, so the first index was dropped
+    assert cache.get(detector) is not first
+
+
+def test_filter_bitmaps_are_combined_once(store, detector, monkeypatch):
+    index = CustomerIndex(store, detector)
+    combined = []
+    select = index.select
+    monkeypatch.setattr(index, 'select', lambda filters: combined.append(filters) or select(filters))
+    filters = {'riskLevel': ['Medium', 'High'], 'contractType': ['Month-to-month']}
+
+    first, total = index.query(filters, 'churnProbability', limit=20)
+    summary = index.summary(filters)
+    # The same filter with its values in another order is the same selection
+    second, again = index.query({'contractType': ['Month-to-month'], 'riskLevel': ['High', 'Medium']},
+                                'churnProbability', offset=10, limit=10)
+    assert len(combined) == 1
+    assert (again, list(second)) == (total, list(first[10:]))
+    assert index.summary(filters) is summary and summary['total'] == total
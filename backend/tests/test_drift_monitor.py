@@ -0,0 +1,104 @@
+import copy
+
+import numpy as np
+import pytest
+
+from drift_monitor import DriftMonitor, drift_status, population_stability_index
+
+
+def test_psi_of_known_shares():
+    expected = np.array([[0.5, 0.5], [0.25, 0.75]])
+    actual = np.array([[0.5, 0.5], [0.75, 0.25]])
+    psi = population_stability_index(expected, actual)
+    assert psi[0] == 0
+    assert psi[1] == pytest.approx(2 * 0.5 * np.log(3))
+
+
+def test_psi_stays_finite_for_empty_bins():
+    psi = population_stability_index(np.array([[1.0, 0.0]]), np.array([[0.0, 1.0]]))
+    assert np.isfinite(psi).all() and psi[0] > 10
+
+
+@pytest.mark.parametrize('psi, status', [(0.0, 'stable'), (0.0999, 'stable'), (0.1, 'moderate'),
+                                         (0.2499, 'moderate'), (0.25, 'significant')])
+def test_status_thresholds(psi, status):
+    assert drift_status(psi) == status
+
+
+@pytest.fixture(scope='module')
+def training(detector, customers):
+    return detector.preprocess_data(customers.iloc[:2000], fit=False)[0]
+
+
+def window(report, seconds):
+    return next(w for w in report['windows'] if w['seconds'] == seconds)
+
+
+def by_feature(window):
+    return {f['feature']: f for f in window['features']}
+
+
+def test_training_traffic_is_stable(detector, training):
+    monitor = DriftMonitor(bucket_seconds=60, windows=(5, 60))
+    monitor.update(detector, training, now=0)
+    report = monitor.report(detector, now=0)
+    assert report['available'] and report['referenceRows'] == 2000
+    recent = window(report, 300)
+    assert recent['rows'] == 2000 and recent['status'] == 'stable'
+    for feature in recent['features']:
+        assert feature['psi'] < 0.01 and feature['ks'] < 0.01 and abs(feature['meanShift']) < 0.01
+
+
+def test_shifted_feature_is_flagged(detector, training):
+    shifted = training.copy()
+    j = detector.feature_names.index('monthly_charges')
+    shifted[:, j] += 1.0
+    monitor = DriftMonitor()
+    monitor.update(detector, shifted, now=0)
+    recent = window(monitor.report(detector, now=0), 300)
+    assert recent['driftedFeatures'] == ['monthly_charges']
+    feature = by_feature(recent)['monthly_charges']
+    assert feature['status'] == 'significant'
+    assert feature['meanShift'] == pytest.approx(1.0 / detector.anomaly_model['feature_stats']['monthly_charges']['std'],
+                                                 abs=1e-3)
+
+    # KS: the largest CDF gap at the reference bin edges
+    reference = detector.anomaly_model['reference']
+    edges = reference['edges'][j]
+    live_cdf = np.array([(shifted[:, j] <= edge).mean() for edge in edges])
+    ks = np.abs(live_cdf - np.cumsum(reference['proportions'][j])[:-1]).max()
+    assert feature['ks'] == pytest.approx(ks, abs=1e-4)
+
+
+def test_windows_slide_and_buckets_are_reused(detector, training):
+    monitor = DriftMonitor(bucket_seconds=10, n_buckets=6, windows=(2, 6), min_rows=100)
+    monitor.update(detector, training[:500], now=0)
+    monitor.update(detector, training[500:700], now=25)
+
+    report = monitor.report(detector, now=25)
+    assert [w['rows'] for w in report['windows']] == [200, 700]
+    # The ring wraps after 6 buckets: bucket 6 takes bucket 0's slot
+    monitor.update(detector, training[700:800], now=60)
+    report = monitor.report(detector, now=60)
+    assert [w['rows'] for w in report['windows']] == [100, 300]
+    assert monitor.report(detector, now=200)['windows'][1] == {
+        "seconds": 60, "rows": 0, "status": 'insufficient data', "features": []}
+
+
+def test_new_model_version_starts_over(detector, training):
+    monitor = DriftMonitor()
+    monitor.update(detector, training, now=0)
+    retrained = copy.copy(detector)
+    retrained.model_version = 'retrained'
+    report = monitor.report(retrained, now=0)
+    assert report['modelVersion'] == 'retrained'
+    assert window(report, 300)['rows'] == 0
+
+
+def test_models_without_a_reference_are_reported_unavailable(detector, training):
+    legacy = copy.copy(detector)
+    legacy.model_version = 'legacy'
+    legacy.anomaly_model = {k: v for k, v in detector.anomaly_model.items() if k != 'reference'}
+    monitor = DriftMonitor()
+    monitor.update(legacy, training, now=0)
+    assert monitor.report(legacy, now=0)['available'] is False
@@ -0,0 +1,74 @@
+import copy
+
+import numpy as np
+import pytest
+
+from feature_store import EMPTY_SLOT, FeatureStore, build_index, hash_ids
+
+
+def probe(table, hashes, row):
+    """Follow the linear probe sequence of a row's hash to its slot"""
+    mask = len(table) - 1
+    slot = int(hashes[row]) & mask
+    while table[slot] != row:
+        assert table[slot] != EMPTY_SLOT
+        slot = (slot + 1) & mask
+    return slot
+
+
+def test_every_row_is_reachable_through_collisions():
+    # Hashes sharing their low bits all want the same few slots
+    hashes = (np.arange(200, dtype=np.uint64) << np.uint64(20)) | np.uint64(3)
+    table = build_index(hashes)
+    assert len(table) >= 2 * len(hashes)
+    assert sorted(table[table != EMPTY_SLOT]) == list(range(200))
+    slots = [probe(table, hashes, row) for row in range(200)]
+    assert len(set(slots)) == 200
+
+
+def test_hashes_are_stable_and_spread():
+    ids = np.array([f'CUST_{i:06d}'.encode() for i in range(1000)], dtype='S16')
+    hashes = hash_ids(ids)
+    assert np.array_equal(hashes, hash_ids(ids.copy()))
+    assert len(np.unique(hashes)) == len(ids)
+    # The low bits pick the slot, so they must spread too
+    assert len(np.unique(hashes & np.uint64(1023))) > 600
+
+
+@pytest.fixture(scope='module')
+def store(detector, customers, tmp_path_factory):
+    return FeatureStore.build(str(tmp_path_factory.mktemp('store') / 'feature_store'), detector, customers)
+
+
+def test_lookup_finds_every_customer(store, customers):
+    assert len(store) == len(customers)
+    assert [store.lookup(customer_id) for customer_id in customers['customer_id']] == list(range(len(customers)))
+
+
+@pytest.mark.parametrize('customer_id', ['CUST_999999', '', 'CUST_000001_and_a_much_longer_suffix'])
+def test_lookup_misses_unknown_ids(store, customer_id):
+    assert store.lookup(customer_id) is None
+
+
+def test_rows_match_the_source_data(store, detector, customers):
+    row = store.lookup('CUST_000123')
+    record = store.record(row)
+    expected = customers.iloc[row]
+    for field, value in record.items():
+        assert value == expected[field]
+    assert np.allclose(store.scaled_features([row]), detector.preprocess_data(customers.iloc[[row]], fit=False)[0])
+
+
+def test_features_follow_a_newer_scaler(store, detector, customers):
+    scaler = copy.deepcopy(detector.scaler)
+    scaler.mean_ = scaler.mean_ + 1.0
+    scaler.scale_ = scaler.scale_ * 2.0
+    raw = detector.build_features(customers.iloc[:50])[detector.feature_names]
+    assert np.allclose(store.scaled_features(np.arange(50), scaler), scaler.transform(raw))
+
+
+def test_duplicate_ids_are_rejected(detector, customers, tmp_path):
+    data = customers.iloc[[0, 1, 1]]
+    with pytest.raises(ValueError, match='unique'):
+        FeatureStore.build(str(tmp_path / 'feature_store'), detector, data)
+    assert list(tmp_path.iterdir()) == []
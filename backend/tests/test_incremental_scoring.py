@@ -0,0 +1,90 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import quietly
+from incremental_scoring import IncrementalScorer, row_hashes
+
+
+@pytest.fixture
+def export(customers):
+    return customers.iloc[:500].reset_index(drop=True)
+
+
+@pytest.fixture
+def scorer(detector, tmp_path):
+    return IncrementalScorer(detector, str(tmp_path / 'score_state'))
+
+
+def test_hashes_ignore_formatting_noise(export, tmp_path):
+    noisy = export.copy()
+    noisy['monthly_charges'] += 1e-9
+    noisy['contract_type'] = ' ' + noisy['contract_type'].astype(str) + ' '
+    export.to_csv(tmp_path / 'export.csv', index=False)
+    round_trip = pd.read_csv(tmp_path / 'export.csv')
+
+    hashes = row_hashes(export)
+    assert np.array_equal(row_hashes(noisy), hashes)
+    assert np.array_equal(row_hashes(round_trip), hashes)
+
+
+def test_hashes_change_with_any_input(export):
+    hashes = row_hashes(export)
+    for field, value in (('complaints', 9), ('monthly_charges', 12.34), ('internet_service', 'No')):
+        changed = export.copy()
+        changed.loc[3, field] = value if changed.loc[3, field] != value else 0
+        different = row_hashes(changed) != hashes
+        assert list(np.flatnonzero(different)) == [3]
+
+
+def test_unchanged_export_is_skipped(scorer, export):
+    first = quietly(scorer.run, export)
+    assert (first['new'], first['rescored'], first['skipped']) == (500, 500, 0)
+    table = scorer.load_scores()
+
+    second = quietly(scorer.run, export)
+    assert (second['new'], second['changed'], second['rescored'], second['skipped']) == (0, 0, 0, 500)
+    pd.testing.assert_frame_equal(scorer.load_scores(), table)
+
+
+def test_only_changed_rows_are_rescored(scorer, export):
+    quietly(scorer.run, export)
+    before = scorer.load_scores()
+    updated = export.copy()
+    rows = [5, 17, 400]
+    updated.loc[rows, 'complaints'] += 4
+    # New and removed customers, and the export in a different order
+    updated = pd.concat([updated.drop(index=[0, 1]), export.iloc[:1].assign(customer_id='CUST_NEW')])
+    updated = updated.iloc[::-1].reset_index(drop=True)
+
+    stats = quietly(scorer.run, updated)
+    assert (stats['new'], stats['changed'], stats['removed'], stats['rescored']) == (1, 3, 2, 4)
+
+    after = scorer.load_scores()
+    assert list(after['customer_id']) == list(updated['customer_id'])
+    expected = scorer.score(updated)
+    assert np.allclose(after['churn_probability'], expected['churn_probability'])
+    assert list(after['risk_level']) == list(expected['risk_level'])
+
+    # Customers that did not change keep the row, timestamp included, from the first run
+    kept = after.set_index('customer_id').loc[before['customer_id'].iloc[2:5]]
+    assert list(kept['scored_at']) == list(before['scored_at'].iloc[2:5])
+
+    merged = before.merge(after, on='customer_id', suffixes=('_before', '_after'))
+    moved = merged[merged['risk_level_before'] != merged['risk_level_after']]
+    changelog_path = os.path.join(scorer.state_dir, 'changelog.csv')
+    changelog = pd.read_csv(changelog_path) if os.path.exists(changelog_path) else pd.DataFrame()
+    assert stats['riskTransitions'] == len(moved) == len(changelog)
+
+
+def test_new_model_version_rescores_everyone(scorer, export):
+    quietly(scorer.run, export)
+    scorer.detector = copy.copy(scorer.detector)
+    scorer.detector.model_version = 'retrained'
+
+    stats = quietly(scorer.run, export)
+    assert (stats['modelChanged'], stats['changed'], stats['skipped']) == (500, 0, 0)
+    assert set(scorer.load_scores()['model_version']) == {'retrained'}
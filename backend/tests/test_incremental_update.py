@@ -0,0 +1,89 @@
+import contextlib
+import copy
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import quietly
+
+
+def updated(detector, data, **kwargs):
+    detector = copy.deepcopy(detector)
+    quietly(detector.update_churn_model, data, **kwargs)
+    return detector
+
+
+def test_max_trees_drops_the_oldest_trees(detector, customers):
+    new_data = customers.iloc[2000:]
+    oldest_kept = detector.churn_model.estimators_[30]
+    model = updated(detector, new_data, n_new_trees=10, max_trees=80).churn_model
+
+    assert len(model.estimators_) == model.n_estimators == 80
+    assert model.tree_generations_ == [0] * 70 + [1] * 10
+    assert model.estimators_[0].tree_ is not oldest_kept.tree_
+    assert np.array_equal(model.estimators_[0].tree_.feature, oldest_kept.tree_.feature)
+
+
+def test_max_generations_keeps_only_recent_updates(detector, customers):
+    first = updated(detector, customers.iloc[2000:3000], n_new_trees=10)
+    assert first.churn_model.tree_generations_ == [0] * 100 + [1] * 10
+
+    second = updated(first, customers.iloc[3000:], n_new_trees=5, max_generations=1)
+    assert second.churn_model.tree_generations_ == [2] * 5
+    assert len(second.churn_model.estimators_) == second.churn_model.n_estimators == 5
+
+
+@pytest.mark.parametrize('limit', ['n_new_trees', 'max_trees', 'max_generations'])
+def test_limits_below_one_are_rejected(detector, customers, limit):
+    with pytest.raises(ValueError, match=limit):
+        detector.update_churn_model(customers.iloc[2000:], **{limit: 0})
+    assert len(detector.churn_model.estimators_) == 100
+
+
+def raw_thresholds(tree, scaler):
+    split = tree.tree_.feature >= 0
+    features = tree.tree_.feature[split]
+    return tree.tree_.threshold[split] * scaler.scale_[features] + scaler.mean_[features]
+
+
+def test_rescaled_trees_keep_their_decisions(detector, customers):
+    features = detector.build_features(customers.iloc[2000:])[detector.feature_names]
+    after_update = updated(detector, customers.iloc[2000:], n_new_trees=5)
+    assert not np.allclose(detector.scaler.mean_, after_update.scaler.mean_)
+    X_old, X_new = detector.scaler.transform(features), after_update.scaler.transform(features)
+    raw = features.to_numpy()
+
+    for old, new in zip(detector.churn_model.estimators_, after_update.churn_model.estimators_[:100]):
+        assert np.allclose(raw_thresholds(old, detector.scaler), raw_thresholds(new, after_update.scaler))
+        # Rows may only change leaf where the value sits within float32 rounding of a split
+        for row in np.nonzero(old.apply(X_old) != new.apply(X_new))[0]:
+            path_old = old.decision_path(X_old[row:row + 1]).indices
+            path_new = new.decision_path(X_new[row:row + 1]).indices
+            node = path_old[np.argmax(path_old[:len(path_new)] != path_new[:len(path_old)]) - 1]
+            feature = old.tree_.feature[node]
+            split = old.tree_.threshold[node] * detector.scaler.scale_[feature] + detector.scaler.mean_[feature]
+            assert raw[row, feature] == pytest.approx(split, rel=1e-6)
+
+
+def test_single_class_batch_is_rejected(detector, customers):
+    retained = customers.iloc[2000:][customers['churn'].iloc[2000:] == 0].iloc[:200]
+    with pytest.raises(ValueError, match='both churned and retained'):
+        detector.update_churn_model(retained)
+    with pytest.raises(ValueError, match='both churned and retained'):
+        detector.update_churn_model(customers.iloc[:0])
+    assert len(detector.churn_model.estimators_) == 100
+
+
+def test_small_batch_trains_without_a_holdout(detector, customers):
+    new_data = customers.iloc[2000:]
+    batch = pd.concat([new_data[new_data['churn'] == 1].iloc[:3], new_data[new_data['churn'] == 0].iloc[:5]])
+    updated_detector = copy.deepcopy(detector)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        updated_detector.update_churn_model(batch, n_new_trees=5)
+
+    assert updated_detector.churn_model.tree_generations_ == [0] * 100 + [1] * 5
+    assert 'without a hold-out evaluation' in output.getvalue()
+    assert 'ROC-AUC' not in output.getvalue()
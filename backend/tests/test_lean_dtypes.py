@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import quietly
+from data_loader import DatasetLoader
+from ml_models import CATEGORICAL_COLUMNS, TelecomChurnAnomalyDetector, to_lean_dtypes
+
+
+@pytest.fixture(scope='module')
+def lean_customers():
+    return quietly(TelecomChurnAnomalyDetector().generate_synthetic_data, n_samples=4000, lean=True)
+
+
+def test_lean_generation_gives_the_same_customers(customers, lean_customers):
+    assert list(lean_customers.columns) == list(customers.columns)
+    assert list(lean_customers['customer_id']) == list(customers['customer_id'])
+    for col in customers.columns.drop('customer_id'):
+        lean = lean_customers[col]
+        if col in CATEGORICAL_COLUMNS:
+            assert isinstance(lean.dtype, pd.CategoricalDtype)
+            assert list(lean.astype(str)) == list(customers[col])
+        elif pd.api.types.is_float_dtype(customers[col]):
+            assert lean.dtype == np.float32
+            assert np.array_equal(lean.to_numpy(), customers[col].to_numpy().astype(np.float32))
+        else:
+            assert lean.dtype.itemsize < customers[col].dtype.itemsize
+            assert np.array_equal(lean.to_numpy(), customers[col].to_numpy())
+
+
+def test_conversion_matches_lean_generation(customers, lean_customers):
+    converted = to_lean_dtypes(customers)
+    pd.testing.assert_frame_equal(converted, lean_customers, check_categorical=False)
+    assert converted.memory_usage(deep=True).sum() < customers.memory_usage(deep=True).sum() / 3
+
+
+def test_integers_are_downcast_without_loss():
+    data = pd.DataFrame({'complaints': [0, 3, 120], 'call_minutes': [0, 70000, 1], 'churn': [0, 1, 0]})
+    lean = to_lean_dtypes(data)
+    assert [lean[col].dtype for col in data.columns] == [np.int8, np.int32, np.int8]
+    assert (lean.astype(np.int64) == data).all().all()
+
+
+def test_lean_scaled_features_are_the_rounded_default(detector, customers, lean_customers):
+    X_default, _ = detector.preprocess_data(customers, fit=False)
+    X_lean, _ = detector.preprocess_data(customers, fit=False, lean=True)
+    assert X_lean.dtype == np.float32
+    assert np.array_equal(X_lean, X_default.astype(np.float32))
+    # From float32 inputs the features move by about float32 rounding of the raw values
+    X_from_lean, _ = detector.preprocess_data(lean_customers, fit=False, lean=True)
+    assert np.allclose(X_from_lean, X_default, atol=1e-5)
+
+
+def test_lean_predictions_match_the_default(detector, customers, lean_customers):
+    default = detector.churn_model.predict_proba(detector.preprocess_data(customers, fit=False)[0])[:, 1]
+    lean = detector.churn_model.predict_proba(detector.preprocess_data(lean_customers, fit=False, lean=True)[0])[:, 1]
+    moved = np.flatnonzero(lean != default)
+    # Only rows sitting on a split may change, and only by the votes of the trees splitting there
+    assert len(moved) <= len(default) * 0.001
+    assert np.abs(lean - default).max() <= 2.0 / detector.churn_model.n_estimators
+
+
+def test_lean_transform_keeps_the_values(customers):
+    loader = DatasetLoader()
+    mapping = {col: col for col in customers.columns}
+    default = quietly(loader.transform_dataset, customers, mapping)
+    lean = quietly(loader.transform_dataset, customers, mapping, lean=True)
+    assert lean['monthly_charges'].dtype == np.float32
+    assert isinstance(lean['contract_type'].dtype, pd.CategoricalDtype)
+    assert np.array_equal(lean['monthly_charges'], default['monthly_charges'].astype(np.float32))
+    assert list(lean['customer_id']) == list(default['customer_id'])
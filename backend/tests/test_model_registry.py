@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from conftest import quietly
+from model_registry import ModelHandle, ModelRegistry
+
+
+@pytest.fixture
+def registry(detector, tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'model_registry'))
+    registry.first = quietly(registry.register, detector, notes='first')
+    registry.second = quietly(registry.register, detector, notes='second')
+    return registry
+
+
+def wait_for_load(handle):
+    deadline = time.monotonic() + 10
+    while handle.loading is not None:
+        assert time.monotonic() < deadline, "model load did not finish"
+        time.sleep(0.01)
+
+
+def test_rollback_restores_the_previous_active_version(registry):
+    registry.promote(registry.first)
+    registry.promote(registry.second)
+    assert registry.active_version() == registry.second
+
+    assert registry.rollback() == registry.first
+    assert registry.active_version() == registry.first
+    assert registry.history() == [registry.first]
+    assert [meta['active'] for meta in registry.list_versions()] == [False, True]
+
+
+def test_rollback_needs_an_earlier_version(registry):
+    with pytest.raises(LookupError):
+        registry.rollback()
+    registry.promote(registry.first)
+    # Promoting the active version again does not add a history entry
+    registry.promote(registry.first)
+    with pytest.raises(LookupError):
+        registry.rollback()
+    assert registry.active_version() == registry.first
+
+
+def test_promote_rejects_unknown_versions(registry):
+    with pytest.raises(KeyError):
+        registry.promote('no_such_version')
+    assert registry.active_version() is None
+
+
+def test_poll_swaps_the_new_version_in_after_warmup(registry):
+    registry.promote(registry.first)
+    warming = threading.Event()
+    release = threading.Event()
+
+    def warmup(detector):
+        warming.set()
+        assert release.wait(10)
+
+    serving = quietly(registry.load, registry.first)
+    handle = ModelHandle(serving, registry, poll_seconds=0, warmup=warmup)
+    handle.poll()
+    assert handle.loading is None
+
+    registry.promote(registry.second)
+    quietly(handle.poll)
+    assert warming.wait(10)
+    assert handle.loading == registry.second
+    # Requests keep the old model while the new one warms up, and polls start no second load
+    assert handle.current() is serving
+    handle.poll()
+    assert handle.current() is serving and handle.status()['serving'] == registry.first
+
+    release.set()
+    quietly(wait_for_load, handle)
+    assert handle.current() is not serving
+    assert handle.current().model_version == registry.second
+    status = handle.status()
+    assert (status['serving'], status['loading'], status['lastError']) == (registry.second, None, None)
+
+
+def test_failed_load_keeps_serving_the_old_version(registry):
+    registry.promote(registry.first)
+    serving = quietly(registry.load, registry.first)
+
+    def warmup(detector):
+        raise RuntimeError("warm-up failed")
+
+    handle = ModelHandle(serving, registry, poll_seconds=0, warmup=warmup)
+    assert quietly(handle.load_in_background, registry.second)
+    quietly(wait_for_load, handle)
+    assert handle.current() is serving
+    assert handle.last_error == f"{registry.second}: warm-up failed"
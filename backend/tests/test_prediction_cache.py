@@ -0,0 +1,83 @@
+import prediction_cache
+from prediction_cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def make_cache(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(prediction_cache, 'time', clock)
+    return PredictionCache(**kwargs), clock
+
+
+def test_hit_after_put(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache.put({'tenure': 12}, 'result', 'v1')
+    assert cache.get({'tenure': 12}, 'v1') == 'result'
+    assert cache.get({'tenure': 13}, 'v1') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_ignores_field_order():
+    assert PredictionCache.make_key({'a': 1, 'b': 2}, 'v1') == PredictionCache.make_key({'b': 2, 'a': 1}, 'v1')
+    assert PredictionCache.make_key({'a': 1}, 'v1') != PredictionCache.make_key({'a': 1}, 'v2')
+
+
+def test_evicts_least_recently_used(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_size=2)
+    cache.put({'id': 1}, 1, 'v1')
+    cache.put({'id': 2}, 2, 'v1')
+    # Reading 1 makes 2 the least recently used entry
+    assert cache.get({'id': 1}, 'v1') == 1
+    cache.put({'id': 3}, 3, 'v1')
+
+    assert cache.get({'id': 2}, 'v1') is None
+    assert cache.get({'id': 1}, 'v1') == 1
+    assert cache.get({'id': 3}, 'v1') == 3
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache, clock = make_cache(monkeypatch, ttl_seconds=10)
+    cache.put({'id': 1}, 1, 'v1')
+    clock.now += 9.9
+    assert cache.get({'id': 1}, 'v1') == 1
+    clock.now += 0.1
+    assert cache.get({'id': 1}, 'v1') is None
+    assert cache.expirations == 1
+    assert cache.stats()['size'] == 0
+
+
+def test_new_model_version_invalidates_everything(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache.put({'id': 1}, 1, 'v1')
+    cache.put({'id': 2}, 2, 'v1')
+    assert cache.get({'id': 1}, 'v2') is None
+    assert cache.stats()['size'] == 0
+    assert cache.invalidations == 1
+
+
+def test_disabled_cache_stores_nothing(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_size=0)
+    cache.put({'id': 1}, 1, 'v1')
+    assert cache.get({'id': 1}, 'v1') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_results_of_the_previous_version_are_not_stored(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    assert cache.get({'id': 1}, 'v1') is None
+    # The model is swapped while the v1 request is still scoring
+    assert cache.get({'id': 2}, 'v2') is None
+    cache.put({'id': 2}, 2, 'v2')
+    cache.put({'id': 1}, 1, 'v1')
+
+    assert cache.get({'id': 2}, 'v2') == 2
+    assert cache.get({'id': 1}, 'v2') is None
+    assert cache.stats()['size'] == 1
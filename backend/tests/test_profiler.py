@@ -0,0 +1,51 @@
+import time
+
+from profiler import SamplingProfiler
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile_is_saved_in_collapsed_format(tmp_path):
+    profiler = SamplingProfiler(enabled=True, interval_ms=1, profile_dir=str(tmp_path))
+    session = profiler.start('GET /api/test')
+    busy_wait(0.1)
+    meta = profiler.stop(session, status=200)
+
+    assert meta['samples'] > 0 and meta['status'] == 200
+    assert profiler.list_profiles() == [meta]
+    lines = profiler.read_collapsed(meta['id']).splitlines()
+    counts = [int(line.rpartition(' ')[2]) for line in lines]
+    assert sum(counts) == meta['samples']
+    assert counts == sorted(counts, reverse=True)
+    assert any('busy_wait' in line for line in lines)
+
+
+def test_samples_after_stop_are_not_saved(tmp_path):
+    profiler = SamplingProfiler(enabled=True, interval_ms=1, profile_dir=str(tmp_path))
+    session = profiler.start('GET /api/test')
+    busy_wait(0.05)
+    save = profiler._save
+
+    def save_after_a_late_sample(*args):
+        # The sampler can still add to a session it picked up before stop() discarded it
+        with profiler._lock:
+            session.stacks['late;sample'] += 1
+            session.samples += 1
+        save(*args)
+
+    profiler._save = save_after_a_late_sample
+    meta = profiler.stop(session)
+    collapsed = profiler.read_collapsed(meta['id'])
+    assert 'late' not in collapsed
+    assert sum(int(line.rpartition(' ')[2]) for line in collapsed.splitlines()) == meta['samples']
+
+
+def test_profiles_beyond_the_limit_are_pruned(tmp_path):
+    profiler = SamplingProfiler(enabled=True, profile_dir=str(tmp_path), max_profiles=3)
+    ids = [profiler.stop(profiler.start(f'GET /{i}'))['id'] for i in range(5)]
+    assert profiler.list_ids() == ids[2:]
+    assert profiler.read_collapsed('../secrets') is None
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import quietly
+from data_loader import DatasetLoader, dtype_kind, read_shard
+
+
+@pytest.fixture
+def raw(customers):
+    """Customers in an export's own column names and label format"""
+    raw = customers.iloc[:600].rename(columns={'customer_id': 'CustomerID', 'monthly_charges': 'MonthlyCharges',
+                                               'churn': 'Churn'})
+    raw['Churn'] = np.where(raw['Churn'] == 1, 'Yes', 'No')
+    raw['total_charges'] = raw['total_charges'].astype(str)
+    raw.loc[raw.index[::37], 'total_charges'] = ' '
+    return raw.reset_index(drop=True)
+
+
+@pytest.fixture
+def shards(raw, tmp_path):
+    """The export split into CSV and JSON files"""
+    paths = []
+    for i, part in enumerate(np.array_split(raw, 4)):
+        path = tmp_path / f'part_{i}.{"csv" if i % 2 == 0 else "json"}'
+        part.to_csv(path, index=False) if i % 2 == 0 else part.to_json(path, orient='records')
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def mapping(raw):
+    return quietly(DatasetLoader().auto_detect_columns, raw)
+
+
+@pytest.mark.parametrize('values, kind', [
+    ([1, 2], 'number'), ([1.5, None], 'number'), ([True, False], 'boolean'), (['a', 'b'], 'text'),
+    (pd.to_datetime(['2024-01-01', None]), 'datetime'), ([None, None], None),
+])
+def test_dtype_kind(values, kind):
+    assert dtype_kind(pd.Series(values)) == kind
+
+
+def test_sources_expand_to_sorted_unique_files(shards, tmp_path):
+    loader = DatasetLoader()
+    (tmp_path / 'notes.txt').write_text('not a dataset')
+    assert loader.expand_sources(str(tmp_path)) == sorted(shards)
+    assert loader.expand_sources(str(tmp_path / 'part_*.csv')) == [shards[0], shards[2]]
+    assert loader.expand_sources([shards[1], str(tmp_path / 'part_*')]) == [shards[1], shards[0]] + shards[2:]
+    with pytest.raises(ValueError, match='No dataset files'):
+        loader.expand_sources(str(tmp_path / 'missing_*.csv'))
+
+
+def test_shard_is_mapped_and_converted(shards, mapping):
+    shard, problems, rows = read_shard(shards[0], mapping)
+    assert problems == [] and rows == len(shard) == 150
+    assert set(shard.columns) == set(mapping)
+    assert shard['total_charges'].dtype == np.float64 and shard['total_charges'].isnull().any()
+    assert set(shard['churn'].unique()) <= {0, 1}
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_shards_load_like_one_file(raw, shards, mapping, n_workers, tmp_path):
+    loader = DatasetLoader()
+    raw.to_csv(tmp_path / 'whole.csv', index=False)
+    expected = quietly(loader.transform_dataset, pd.read_csv(tmp_path / 'whole.csv'), mapping)
+    combined = quietly(loader.load_datasets, str(tmp_path / 'part_*'), mapping, n_workers=n_workers)
+    pd.testing.assert_frame_equal(combined[expected.columns], expected, check_dtype=False)
+
+
+def test_missing_columns_and_unparseable_numbers_are_reported(raw, shards, mapping, tmp_path, capsys):
+    raw.iloc[:50].drop(columns=['Churn']).to_csv(tmp_path / 'part_4.csv', index=False)
+    raw.iloc[:50].assign(tenure='unknown').to_csv(tmp_path / 'part_5.csv', index=False)
+
+    assert DatasetLoader().load_datasets(str(tmp_path / 'part_*'), mapping, n_workers=1) is None
+    output = capsys.readouterr().out
+    assert f"{tmp_path / 'part_4.csv'} has no column Churn" in output
+    assert f"{tmp_path / 'part_5.csv'} has no numbers in column tenure" in output
+
+
+def test_mixed_kinds_across_files_are_reported(raw, shards, mapping, tmp_path, capsys):
+    raw.iloc[:50].assign(Churn=raw['Churn'].iloc[:50] == 'Yes').to_csv(tmp_path / 'part_4.csv', index=False)
+    raw.iloc[:50].assign(contract_type=range(50)).to_csv(tmp_path / 'part_5.csv', index=False)
+
+    assert DatasetLoader().load_datasets(str(tmp_path / 'part_*'), mapping, n_workers=1) is None
+    output = capsys.readouterr().out
+    assert "contract_type holds different kinds of values: text in" in output
+    assert f"number in {tmp_path / 'part_5.csv'}" in output
+
+
+def test_duplicate_ids_only_warn(raw, shards, mapping, tmp_path, capsys):
+    raw.iloc[:10].to_csv(tmp_path / 'part_4.csv', index=False)
+    combined = DatasetLoader().load_datasets(str(tmp_path / 'part_*'), mapping, n_workers=1)
+    assert len(combined) == 610
+    assert "10 customer ids appear more than once" in capsys.readouterr().out
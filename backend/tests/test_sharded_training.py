@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from conftest import quietly
+from ml_models import TelecomChurnAnomalyDetector
+from sharded_training import merge_forests, train_churn_model_sharded
+
+
+def test_merged_forest_has_exactly_the_requested_trees(customers):
+    detector = TelecomChurnAnomalyDetector()
+    data = customers.iloc[:900]
+    report = quietly(train_churn_model_sharded, detector, data, n_shards=3, n_workers=1, n_estimators=100)
+
+    forest = detector.churn_model
+    assert report['trees'] == forest.n_estimators == len(forest.estimators_) == 100
+    assert list(forest.classes_) == [0, 1]
+    X_scaled, _ = detector.preprocess_data(data, fit=False)
+    proba = forest.predict_proba(X_scaled)
+    assert proba.shape == (900, 2)
+    assert np.allclose(proba.sum(axis=1), 1.0)
+    assert detector.model_version is not None
+
+
+def test_forests_with_different_classes_are_not_merged():
+    X = np.arange(20, dtype=float).reshape(-1, 1)
+    both = RandomForestClassifier(n_estimators=2, random_state=0).fit(X, np.arange(20) % 2)
+    single = RandomForestClassifier(n_estimators=2, random_state=0).fit(X, np.zeros(20, dtype=int))
+    with pytest.raises(ValueError, match='different classes'):
+        merge_forests([both, single])
+
+
+def test_shards_without_both_classes_are_rejected(customers):
+    churned = customers[customers['churn'] == 1].iloc[:5]
+    data = customers[customers['churn'] == 0].iloc[:400]
+    detector = TelecomChurnAnomalyDetector()
+    # Four churned customers in the training split cannot cover eight shards
+    with pytest.raises(ValueError, match='fewer shards'):
+        quietly(train_churn_model_sharded, detector, pd.concat([data, churned]), n_shards=8, n_workers=1,
+                n_estimators=16)
+    with pytest.raises(ValueError, match='two churned and two retained'):
+        quietly(train_churn_model_sharded, detector, data, n_shards=2, n_workers=1)
+    assert detector.churn_model is None
+
+
+def test_fewer_trees_than_shards_are_rejected(customers):
+    with pytest.raises(ValueError, match='spread 2 trees over 4 shards'):
+        train_churn_model_sharded(TelecomChurnAnomalyDetector(), customers, n_shards=4, n_estimators=2)
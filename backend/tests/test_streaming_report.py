@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+import streaming_report
+from customer_index import CustomerIndex
+from feature_store import FeatureStore
+from streaming_report import LazyFlowables, write_detail_report
+
+
+@pytest.fixture(scope='module')
+def index(detector, customers, tmp_path_factory):
+    store = FeatureStore.build(str(tmp_path_factory.mktemp('store') / 'feature_store'), detector, customers)
+    return CustomerIndex(store, detector)
+
+
+def pdf_pages(path):
+    return len(re.findall(rb'/Type /Page\b', path.read_bytes()))
+
+
+def test_lazy_flowables_only_buffer_the_lookahead():
+    pulled = []
+
+    def source():
+        for i in range(10):
+            pulled.append(i)
+            yield i
+
+    flowables = LazyFlowables(source(), lookahead=3)
+    assert pulled == []
+    assert len(flowables) == 3 and flowables[0] == 0
+    del flowables[0]
+    assert flowables[0:2] == [1, 2] and pulled == [0, 1, 2, 3]
+    flowables[0:0] = ['split part']
+    assert flowables[0] == 'split part'
+    consumed = []
+    while len(flowables):
+        consumed.append(flowables[0])
+        del flowables[0]
+    assert consumed == ['split part', 1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+
+def test_detail_report_pages_are_built_as_they_are_consumed(index, tmp_path, monkeypatch):
+    documents = []
+    make_document = streaming_report.detail_document
+    monkeypatch.setattr(streaming_report, 'detail_document',
+                        lambda *args: documents.append(make_document(*args)) or documents[-1])
+    # The page ReportLab is on whenever the report asks for the next table
+    pulled_on = []
+    make_flowables = streaming_report.detail_flowables
+
+    def recorded_flowables(*args):
+        for flowable in make_flowables(*args):
+            pulled_on.append(getattr(documents[0], 'page', 0))
+            yield flowable
+
+    monkeypatch.setattr(streaming_report, 'detail_flowables', recorded_flowables)
+
+    output = tmp_path / 'detail.pdf'
+    stats = write_detail_report(str(output), index, ('High', 'Medium', 'Low'), max_rows=450, rows_per_table=45)
+    assert stats['customers'] == 450 and stats['matching'] == len(index.store)
+    assert stats['pages'] == pdf_pages(output) == 11
+    # Title, summary and spacer, then one table per 45 customers
+    assert len(pulled_on) == 3 + 10
+    # An eager build would pull every table before the first page is finished,
+    assert pulled_on == sorted(pulled_on)
+    # and at most the lookahead of four tables may be waiting for a page
+    assert pulled_on[-1] >= stats['pages'] - 4
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from streaming_stats import FeatureSummary, QuantileSketch, RunningMoments
+
+
+def shards(X, n_shards):
+    return np.array_split(X, n_shards)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(7)
+    # Large offset: naive sum-of-squares variance loses most digits here
+    return np.column_stack([rng.normal(1e6, 3.0, 20000), rng.exponential(2.0, 20000), rng.integers(0, 5, 20000)])
+
+
+def test_chunked_moments_match_numpy(data):
+    moments = RunningMoments(data.shape[1])
+    for chunk in np.array_split(data, 37):
+        moments.update(chunk)
+    assert moments.count == len(data)
+    assert np.allclose(moments.mean, data.mean(axis=0), rtol=1e-12)
+    assert np.allclose(moments.std, data.std(axis=0), rtol=1e-9)
+
+
+def test_merged_moments_match_numpy(data):
+    merged = RunningMoments(data.shape[1])
+    for shard in shards(data, 5):
+        part = RunningMoments(data.shape[1])
+        part.update(shard)
+        merged.merge(part)
+    merged.merge(RunningMoments(data.shape[1]))
+    assert merged.count == len(data)
+    assert np.allclose(merged.mean, data.mean(axis=0), rtol=1e-12)
+    assert np.allclose(merged.std, data.std(axis=0), rtol=1e-9)
+
+
+def test_empty_chunk_leaves_moments_alone():
+    moments = RunningMoments(2)
+    moments.update(np.empty((0, 2)))
+    assert moments.count == 0
+    assert np.array_equal(moments.std, np.zeros(2))
+
+
+def test_sketch_is_exact_below_its_size(data):
+    sketch = QuantileSketch(data.shape[1], sketch_size=2048)
+    sample = data[:2000]
+    sketch.update(sample)
+    for q in (0.0, 0.25, 0.5, 0.75, 1.0):
+        assert np.allclose(sketch.quantiles(q), np.percentile(sample, q * 100, axis=0))
+
+
+def rank_range(column, estimate):
+    """First and last 0-based rank the estimate could take in the sorted column"""
+    ordered = np.sort(column)
+    return np.searchsorted(ordered, estimate, side='left'), np.searchsorted(ordered, estimate, side='right') - 1
+
+
+@pytest.mark.parametrize('n_shards', [1, 8])
+def test_merged_sketch_rank_error_is_bounded(data, n_shards):
+    sketch_size = 256
+    summaries = [FeatureSummary(data.shape[1], sketch_size=sketch_size, seed=i).update(shard)
+                 for i, shard in enumerate(shards(data, n_shards))]
+    merged = summaries[0]
+    for summary in summaries[1:]:
+        merged.merge(summary)
+    assert merged.count == len(data)
+
+    n = len(data)
+    bound = math.log2(n / sketch_size) / sketch_size
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        estimates = merged.sketch.quantiles(q)
+        for j in range(data.shape[1]):
+            low, high = rank_range(data[:, j], estimates[j])
+            target = q * (n - 1)
+            # Ties give the estimate a range of ranks; the target must be near it
+            error = max(low - target, target - high, 0) / n
+            assert error <= bound
+
+
+def test_reference_histogram_shares_sum_to_one(data):
+    reference = FeatureSummary(data.shape[1]).update(data).reference_histogram()
+    assert reference['count'] == len(data)
+    assert reference['edges'].shape == (data.shape[1], 9)
+    assert np.allclose(reference['proportions'].sum(axis=1), 1.0)
+    # The discrete column keeps only its distinct edges, padded with +inf
+    assert np.isinf(reference['edges'][2, -1])
+    assert np.allclose(reference['proportions'][0], 0.1, atol=0.02)
@@ -335,12 +335,13 @@ const Telecom = () => {
     }
   };
 
-  const handleInvestigateAlert = async (alertId) => {
+  const handleInvestigateAlert = async (alertId, customerId) => {
     try {
       setInvestigationLoading(true);
       setShowInvestigationModal(true);
       
-      const response = await fetch(`${import.meta.env.VITE_BASE_URL}/api/alerts/${alertId}/investigate`);
+      const query = customerId ? `?customerId=${encodeURIComponent(customerId)}` : '';
+      const response = await fetch(`${import.meta.env.VITE_BASE_URL}/api/alerts/${alertId}/investigate${query}`);
       
       if (!response.ok) {
         throw new Error('Failed to load investigation data');
@@ -935,7 +936,7 @@ const Telecom = () => {
                             </span>
                           )}
                           <button 
-                            onClick={() => handleInvestigateAlert(alert.id)}
+                            onClick={() => handleInvestigateAlert(alert.id, alert.customerId)}
                             className="text-blue-600 hover:text-blue-800 text-sm font-medium"
                           >
                             Investigate